@@ -7,14 +7,14 @@ import os
 import sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from utils.gemini_client import GeminiClient
+from utils.gemini_client import get_gemini_client
 
 class ConAgent:
     def __init__(self):
-        self.client = GeminiClient()
+        self.client = get_gemini_client()
         self.agent_name = "Con Agent"
     
-    def generate_response(self, question, history=None):
+    def generate_response(self, question, history=None, bypass_cache=False):
         """Generate con argument that directly responds to Pro"""
         try:
             # Get the last Pro argument
@@ -59,7 +59,8 @@ Make a strong opening argument:"""
             response = self.client.generate(
                 prompt=prompt,
                 max_tokens=1500,  # INCREASED - was 800
-                temperature=0.8
+                temperature=0.8,
+                bypass_cache=bypass_cache
             )
             
             print(f" Con: {len(response)} chars\n")
@@ -7,14 +7,14 @@ import os
 import sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from utils.gemini_client import GeminiClient
+from utils.gemini_client import get_gemini_client
 
 class ModeratorAgent:
     def __init__(self):
-        self.client = GeminiClient()
+        self.client = get_gemini_client()
         self.agent_name = "Moderator Agent"
     
-    def generate_response(self, question, pro_argument, con_argument, history=None):
+    def generate_response(self, question, pro_argument, con_argument, history=None, bypass_cache=False):
         """Generate concise synthesis of the current round"""
         try:
             # Determine round number
@@ -48,7 +48,8 @@ Provide a brief, insightful synthesis of this round:"""
             response = self.client.generate(
                 prompt=prompt,
                 max_tokens=1200,  # INCREASED - was 600
-                temperature=0.7
+                temperature=0.7,
+                bypass_cache=bypass_cache
             )
             
             print(f" Moderator: {len(response)} chars\n")
@@ -4,25 +4,243 @@ Generates all three agent responses in one call to save rate limits
 IMPROVED: Better readability with bullet points for long responses
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, g
 from flask_cors import CORS
 import os
+import contextvars
+import hmac
+import time
+from concurrent.futures import ThreadPoolExecutor
 import json
-import re
 from dotenv import load_dotenv
 
-from utils.gemini_client import GeminiClient
+from utils.gemini_client import get_gemini_client
 from memory.session_store import SessionStore
+from memory.sqlite_store import SQLiteSessionStore
+from utils.response_parser import (
+    StreamingSectionParser, CombinedResponseParser, DEBATE_RESPONSE_SCHEMA, missing_placeholder, split_rounds
+)
+from utils.prefetch import RoundPrefetcher
+from utils.topic_index import TopicIndex
+from utils.scheduler import FairScheduler, PRIORITY_INTERACTIVE, PRIORITY_CONTINUATION, PRIORITY_PREFETCH
+from utils.job_queue import JobQueue, JobQueueFull
+from utils.context_builder import RollingContextBuilder
+from utils.metrics import get_metrics, current_route, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from utils.profiler import RequestProfiler, attach_thread
+from agents.pro_agent import ProAgent
+from agents.con_agent import ConAgent
+from agents.moderator_agent import ModeratorAgent
 
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app)
 
-session_store = SessionStore()
-gemini_client = GeminiClient()
+def create_session_store():
+    """
+    Create the session store selected by SESSION_BACKEND ('memory' or 'sqlite')
+    """
+    backend = os.getenv('SESSION_BACKEND', 'memory').lower()
+    ttl_seconds = float(os.getenv('SESSION_TTL_SECONDS', '3600'))
+    
+    if backend == 'sqlite':
+        return SQLiteSessionStore(
+            db_path=os.getenv('SESSION_DB_PATH', 'sessions.db'),
+            ttl_seconds=ttl_seconds
+        )
+    
+    return SessionStore(
+        max_sessions=int(os.getenv('SESSION_MAX_COUNT', '1000')),
+        ttl_seconds=ttl_seconds
+    )
+
+session_store = create_session_store()
+gemini_client = get_gemini_client()
+
+GEMINI_API_KEY = gemini_client.async_client.api_key
+PREFETCH_ENABLED = os.getenv('PREFETCH_ENABLED', 'true').lower() == 'true'
+TOPIC_INDEX_ENABLED = os.getenv('TOPIC_INDEX_ENABLED', 'false').lower() == 'true'
+
+topic_index = TopicIndex(
+    threshold=float(os.getenv('TOPIC_SIMILARITY_THRESHOLD', '0.8')),
+    max_entries=int(os.getenv('TOPIC_INDEX_MAX_ENTRIES', '10000'))
+) if TOPIC_INDEX_ENABLED else None
+
+# Most rounds /debate/rounds generates in one call
+ROUNDS_BATCH_MAX = int(os.getenv('ROUNDS_BATCH_MAX', '3'))
+
+# Continuation prompts: rolling per-session summary + recent comments + last exchange, within a token budget
+context_builder = RollingContextBuilder(
+    session_store,
+    token_budget=int(os.getenv('CONTEXT_TOKEN_BUDGET', '800')),
+    summary_budget=int(os.getenv('CONTEXT_SUMMARY_BUDGET', '400')),
+    max_comments=int(os.getenv('CONTEXT_MAX_COMMENTS', '3'))
+)
+
+# Fair, prioritized admission of generation calls across sessions
+llm_scheduler = FairScheduler(max_concurrent=int(os.getenv('LLM_MAX_CONCURRENT', '4')))
+
+# Background round generation for clients that submit a job and poll for the result
+job_queue = JobQueue(
+    max_workers=int(os.getenv('JOB_WORKERS', '4')),
+    max_pending=int(os.getenv('JOB_MAX_PENDING', '100')),
+    retention_seconds=float(os.getenv('JOB_RETENTION_SECONDS', '600'))
+)
+JOB_MAX_WAIT_SECONDS = float(os.getenv('JOB_MAX_WAIT_SECONDS', '30'))
+
+# 'combined': one call per round; 'parallel': Pro and Con concurrently, then Moderator;
+# 'auto': parallel while the rate limiter has headroom for the extra calls
+GENERATION_MODES = ('combined', 'parallel', 'auto')
+GENERATION_MODE = os.getenv('GENERATION_MODE', 'combined').lower()
+PARALLEL_MIN_HEADROOM = float(os.getenv('PARALLEL_MIN_HEADROOM', '6'))
+
+# Single-pass parser for combined completions with parse failure / repair counters
+section_parser = CombinedResponseParser()
+
+# 'markers': sections delimited by [PRO_AGENT] / [CON_AGENT] / [MODERATOR];
+# 'json': one schema-validated JSON object per round, falling back to markers if invalid
+RESPONSE_FORMAT = os.getenv('RESPONSE_FORMAT', 'markers').lower()
+
+# Agents share gemini_client through the client registry
+pro_agent = ProAgent()
+con_agent = ConAgent()
+moderator_agent = ModeratorAgent()
+agent_executor = ThreadPoolExecutor(max_workers=llm_scheduler.max_concurrent * 2, thread_name_prefix='agent')
+
+# Prometheus-style metrics at /metrics; stage timings are labelled with the request route
+metrics = get_metrics()
+http_request_seconds = metrics.histogram(
+    'http_request_duration_seconds',
+    'Request latency by route, method and status (time to the first byte for streamed responses)',
+    ('route', 'method', 'status')
+)
+
+def _session_store_samples():
+    stats = session_store.get_stats()
+    return [({'kind': 'sessions'}, stats['sessions']), ({'kind': 'messages'}, stats['messages'])]
+
+def _parse_failure_samples():
+    stats = section_parser.get_stats()
+    return [({'format': 'markers'}, stats['failures']), ({'format': 'json'}, stats['json_failures'])]
 
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+def _repair_samples():
+    stats = section_parser.get_stats()
+    return [({'result': 'repaired'}, stats['repaired']), ({'result': 'failed'}, stats['repair_failures'])]
+
+def _rate_limiter_samples():
+    stats = gemini_client.rate_limiter.get_stats()
+    return [({'kind': 'wait'}, stats['total_wait_seconds']), ({'kind': 'pause'}, stats['total_pause_seconds'])]
+
+def _model_availability_samples():
+    models = gemini_client.router.get_stats()['models']
+    return [({'model': name}, int(model_stats['state'] != 'open')) for name, model_stats in models.items()]
+
+def _model_latency_samples():
+    models = gemini_client.router.get_stats()['models']
+    return [({'model': name}, model_stats['latency_ewma_ms'] / 1000)
+            for name, model_stats in models.items() if model_stats['latency_ewma_ms'] is not None]
+
+def _hedge_samples():
+    if gemini_client.hedger is None:
+        return []
+    stats = gemini_client.hedger.get_stats()
+    return [({'result': result}, stats[key]) for result, key in
+            (('sent', 'hedged'), ('won', 'hedge_wins'), ('budget_denied', 'budget_denied'), ('skipped', 'skipped'))]
+
+def _api_key_samples():
+    if gemini_client.key_pool is None:
+        return []
+    samples = []
+    for label, key_stats in gemini_client.key_pool.get_stats().items():
+        samples.append(({'key': label, 'result': 'sent'}, key_stats['requests']))
+        samples.append(({'key': label, 'result': 'rate_limited'}, key_stats['rate_limited']))
+    return samples
+
+metrics.register_collector('debate_session_store_size', 'gauge',
+                           'Sessions and messages held by the session store', _session_store_samples)
+metrics.register_collector('debate_parse_failures_total', 'counter',
+                           'Completions with missing sections (markers) or failing schema validation (json)',
+                           _parse_failure_samples)
+metrics.register_collector('debate_section_repairs_total', 'counter',
+                           'Missing sections regenerated by their agent, by result', _repair_samples)
+metrics.register_collector('rate_limiter_sleep_seconds_total', 'counter',
+                           'Time callers slept in the shared rate limiter (quota waits and 429 pauses)',
+                           _rate_limiter_samples)
+metrics.register_collector('llm_scheduler_queued', 'gauge', 'Generation calls waiting for a slot, by priority',
+                           lambda: [({'priority': name}, llm_scheduler.get_stats()[name]['queued'])
+                                    for name in ('interactive', 'continuation', 'prefetch')])
+metrics.register_collector('gemini_model_available', 'gauge',
+                           'Whether a model takes requests (1) or its circuit breaker is open (0)',
+                           _model_availability_samples)
+metrics.register_collector('gemini_model_latency_seconds', 'gauge',
+                           'Moving average latency of successful calls, by model (used for routing)',
+                           _model_latency_samples)
+metrics.register_collector('gemini_api_key_calls_total', 'counter',
+                           'LLM calls sent with each pooled API key, and 429s they got', _api_key_samples)
+metrics.register_collector('gemini_hedges_total', 'counter',
+                           'Hedged LLM calls sent and won, and hedges not sent (budget used up, or no other model or quota)',
+                           _hedge_samples)
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_start = time.perf_counter()
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    g.metrics_route_token = current_route.set(route)
+
+@app.after_request
+def record_request_metrics(response):
+    if 'metrics_start' in g:
+        http_request_seconds.observe(
+            time.perf_counter() - g.metrics_start,
+            current_route.get(), request.method, str(response.status_code)
+        )
+    return response
+
+@app.teardown_request
+def reset_request_metrics(error=None):
+    token = g.pop('metrics_route_token', None)
+    if token is not None:
+        current_route.reset(token)
+
+# Opt-in sampling profiler for /debate/* requests: asked for with an "X-Profile: 1"
+# header or picked at PROFILE_SAMPLE_RATE; no hooks are installed unless enabled
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'false').lower() == 'true'
+PROFILE_ADMIN_TOKEN = os.getenv('PROFILE_ADMIN_TOKEN', '')
+
+request_profiler = RequestProfiler(
+    interval=float(os.getenv('PROFILE_INTERVAL_MS', '5')) / 1000,
+    max_profiles=int(os.getenv('PROFILE_MAX_PROFILES', '20')),
+    sample_rate=float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+) if PROFILING_ENABLED else None
+
+def is_profile_admin():
+    """Whether the request carries the admin token (always true when no token is configured)"""
+    if not PROFILE_ADMIN_TOKEN:
+        return True
+    return hmac.compare_digest(request.headers.get('X-Admin-Token', ''), PROFILE_ADMIN_TOKEN)
+
+if request_profiler:
+    @app.before_request
+    def start_request_profile():
+        if not request.path.startswith('/debate/'):
+            return
+        requested = request.headers.get('X-Profile') == '1' and is_profile_admin()
+        if request_profiler.should_profile(requested):
+            g.profile_id = request_profiler.start(f"{request.method} {request.path}")
+    
+    @app.after_request
+    def add_profile_header(response):
+        if 'profile_id' in g:
+            response.headers['X-Profile-Id'] = str(g.profile_id)
+            g.profile_status = response.status_code
+        return response
+    
+    @app.teardown_request
+    def stop_request_profile(error=None):
+        # Runs after a streamed body has been sent, so streams are profiled to the end
+        profile_id = g.pop('profile_id', None)
+        if profile_id is not None:
+            request_profiler.stop(profile_id, g.pop('profile_status', 500 if error else None))
 
 @app.route('/')
 def home():
@@ -32,25 +250,13 @@ def home():
         'version': '3.1.0'
     })
 
-def generate_all_responses(question, round_num, history):
+def build_debate_prompt(question, round_num, history, session_id='default'):
     """
-    Generate all three agent responses in a single API call
-    Returns: {'pro': '...', 'con': '...', 'moderator': '...'}
+    Build the unified prompt asking for all three agent responses
+    session_id: whose rolling summary provides the context of continuation rounds
+    Returns: prompt string with [PRO_AGENT] / [CON_AGENT] / [MODERATOR] format
     """
     
-    # Get previous arguments for context
-    last_pro_arg = None
-    last_con_arg = None
-    
-    if history:
-        for msg in reversed(history):
-            if msg.get('role') == 'con' and not last_con_arg:
-                last_con_arg = msg.get('content', '')
-            if msg.get('role') == 'pro' and not last_pro_arg:
-                last_pro_arg = msg.get('content', '')
-            if last_pro_arg and last_con_arg:
-                break
-    
     # Build the unified prompt
     if round_num == 1:
         # Opening round
@@ -96,16 +302,8 @@ MODERATOR:
 Now generate all three responses:"""
 
     else:
-        # Continuation round
-        context = f"""
-PREVIOUS EXCHANGE:
-
-PRO previously argued:
-{last_pro_arg[:400] if last_pro_arg else 'N/A'}...
-
-CON previously argued:
-{last_con_arg[:400] if last_con_arg else 'N/A'}...
-"""
+        # Continuation round - bounded context regardless of how many rounds came before
+        context = context_builder.build(session_id, round_num, history or [])
         
         prompt = f"""You are managing Round {round_num} of a debate on: "{question}"
 
@@ -151,88 +349,548 @@ MODERATOR:
 
 Now generate all three responses:"""
     
+    return prompt
+
+def build_multi_round_prompt(question, first_round, last_round, history, session_id='default'):
+    """
+    Build the prompt asking for several consecutive continuation rounds at once
+    Returns: prompt string with a [ROUND n] header before each round's
+    [PRO_AGENT] / [CON_AGENT] / [MODERATOR] sections
+    """
+    context = context_builder.build(session_id, first_round, history)
+    count = last_round - first_round + 1
+    round_format = '\n\n'.join(
+        f"[ROUND {round_num}]\n[PRO_AGENT]\n[Pro's response]\n\n"
+        f"[CON_AGENT]\n[Con's response]\n\n[MODERATOR]\n[Moderator's synthesis]"
+        for round_num in range(first_round, last_round + 1)
+    )
+    
+    prompt = f"""You are managing Rounds {first_round} to {last_round} of a debate on: "{question}"
+
+{context}
+
+Generate {count} consecutive rounds in this EXACT format:
+
+{round_format}
+
+INSTRUCTIONS:
+
+EVERY ROUND:
+- Continues from the round before it: Pro and Con answer each other's latest points
+- Adds NEW points - never repeat an argument from an earlier round
+
+PRO AGENT:
+- Address the main objection Con raised
+- Make 1-2 NEW points supporting your position
+- Keep TOTAL response under 250 words
+- If response exceeds 200 words, use bullet points (•)
+- If under 200 words, use paragraphs
+- Be concise but complete
+
+CON AGENT:
+- Address what Pro just argued
+- Point out specific flaws
+- Make 1-2 NEW counter-points
+- Keep TOTAL response under 250 words
+- If response exceeds 200 words, use bullet points (•)
+- If under 200 words, use paragraphs
+- Be concise but complete
+
+MODERATOR:
+- Summarize the key clash in THIS round
+- Note how debate has evolved
+- Keep TOTAL response under 200 words
+- If response exceeds 150 words, use bullet points (•)
+- If under 150 words, use paragraphs
+- Be balanced and fair
+
+Now generate all {count} rounds:"""
+    
+    return prompt
+
+# Appended to the debate prompt in JSON output mode; overrides the marker format above
+JSON_FORMAT_INSTRUCTIONS = """
+
+OUTPUT FORMAT OVERRIDE:
+Ignore the [PRO_AGENT] / [CON_AGENT] / [MODERATOR] format above. Respond with ONLY a
+JSON object (no code fences, no other text) with these fields:
+{
+  "pro": "Pro's response as plain paragraphs",
+  "pro_key_points": ["1-3 short key points Pro made"],
+  "con": "Con's response as plain paragraphs",
+  "con_key_points": ["1-3 short key points Con made"],
+  "moderator": "Moderator's synthesis as plain paragraphs",
+  "moderator_key_points": ["1-3 short key points of the synthesis"]
+}
+Put bullet-style points in the key_points arrays instead of using bullets (•) in the text."""
+
+def choose_generation_mode(mode=None):
+    """
+    Resolve the generation mode of a round ('combined' or 'parallel')
+    mode: requested mode, defaults to GENERATION_MODE; 'auto' picks parallel
+    only while the rate limiter can take its three calls without waiting
+    """
+    mode = mode or GENERATION_MODE
+    if mode != 'auto':
+        return mode
+    
+    headroom = gemini_client.rate_limiter.headroom()
+    if headroom['paused_for'] == 0 and headroom['requests'] >= PARALLEL_MIN_HEADROOM:
+        return 'parallel'
+    return 'combined'
+
+def generate_all_responses(question, round_num, history, bypass_cache=False,
+                           session_id='default', priority=PRIORITY_CONTINUATION, mode=None):
+    """
+    Generate all three agent responses in a single API call
+    bypass_cache: skip the response cache lookup for a fresh debate
+    session_id, priority: queue position of the call in llm_scheduler
+    mode: 'combined', 'parallel' or 'auto' (see choose_generation_mode)
+    Returns: {'pro': '...', 'con': '...', 'moderator': '...'}
+    """
+    
+    if choose_generation_mode(mode) == 'parallel':
+        return dict(generate_parallel_round(question, round_num, history, bypass_cache, session_id, priority))
+    
+    if RESPONSE_FORMAT == 'json':
+        responses = generate_json_round(question, round_num, history, bypass_cache, session_id, priority)
+        if responses is not None:
+            return responses
+        print(" JSON output failed validation - falling back to the marker format")
+    
+    with metrics.stage('prompt_build'):
+        prompt = build_debate_prompt(question, round_num, history, session_id)
+    
     print(f"\n{'-'*60}")
     print(f" Generating all agents for Round {round_num}...")
     print(f"{'-'*60}\n")
     
     # Single API call for all three
-    response = gemini_client.generate(
-        prompt=prompt,
-        max_tokens=3000,  # Reduced since we want shorter responses
-        temperature=0.8
-    )
+    with llm_scheduler.slot(session_id, priority), metrics.stage('llm_call'):
+        response = gemini_client.generate(
+            prompt=prompt,
+            max_tokens=3000,  # Reduced since we want shorter responses
+            temperature=0.8,
+            bypass_cache=bypass_cache
+        )
     
     print(f" Received combined response: {len(response)} chars\n")
     
-    # Parse the response
-    try:
-        # Extract each agent's response using markers
-        pro_match = re.search(r'\[PRO_AGENT\]\s*(.*?)\s*\[CON_AGENT\]', response, re.DOTALL)
-        con_match = re.search(r'\[CON_AGENT\]\s*(.*?)\s*\[MODERATOR\]', response, re.DOTALL)
-        mod_match = re.search(r'\[MODERATOR\]\s*(.*?)$', response, re.DOTALL)
+    # Parse the response in one pass, tolerating marker variants and reordering
+    with metrics.stage('parse'):
+        responses, missing = section_parser.parse(response)
+    
+    # Regenerate only the missing agents instead of the whole round
+    if missing:
+        repair_sections(question, history, responses, missing, bypass_cache, session_id, priority)
+    
+    print(f" Parsed responses:")
+    print(f"   Pro: {len(responses['pro'])} chars")
+    print(f"   Con: {len(responses['con'])} chars")
+    print(f"   Mod: {len(responses['moderator'])} chars\n")
+    
+    return responses
+
+def generate_json_round(question, round_num, history, bypass_cache=False,
+                        session_id='default', priority=PRIORITY_CONTINUATION):
+    """
+    Generate all three agent responses as one JSON object matching DEBATE_RESPONSE_SCHEMA
+    Returns: {'pro', 'con', 'moderator'} plus optional 'key_points' {agent: [...]},
+    or None if the completion failed validation
+    """
+    with metrics.stage('prompt_build'):
+        prompt = build_debate_prompt(question, round_num, history, session_id) + JSON_FORMAT_INSTRUCTIONS
+    
+    print(f"\n{'-'*60}")
+    print(f" Generating all agents for Round {round_num} (JSON)...")
+    print(f"{'-'*60}\n")
+    
+    with llm_scheduler.slot(session_id, priority), metrics.stage('llm_call'):
+        response = gemini_client.generate(
+            prompt=prompt,
+            max_tokens=3000,
+            temperature=0.8,
+            bypass_cache=bypass_cache,
+            json_schema=DEBATE_RESPONSE_SCHEMA
+        )
+    
+    print(f" Received JSON response: {len(response)} chars\n")
+    with metrics.stage('parse'):
+        return section_parser.parse_json(response)
+
+def generate_round_batch(question, first_round, last_round, history,
+                         session_id='default', priority=PRIORITY_CONTINUATION):
+    """
+    Generate rounds first_round..last_round in a single API call
+    Returns: list of responses dicts in round order - cut at the first round with
+    a missing section, since later rounds build on it (may be empty)
+    """
+    with metrics.stage('prompt_build'):
+        prompt = build_multi_round_prompt(question, first_round, last_round, history, session_id)
+    count = last_round - first_round + 1
+    
+    print(f"\n{'-'*60}")
+    print(f" Generating Rounds {first_round}-{last_round} in one call...")
+    print(f"{'-'*60}\n")
+    
+    with llm_scheduler.slot(session_id, priority), metrics.stage('llm_call'):
+        response = gemini_client.generate(
+            prompt=prompt,
+            max_tokens=min(8192, 2500 * count),
+            temperature=0.8
+        )
+    
+    with metrics.stage('parse'):
+        blocks = split_rounds(response)
+        rounds = []
+        for round_num in range(first_round, last_round + 1):
+            if round_num not in blocks:
+                break
+            responses, missing = section_parser.parse(blocks[round_num])
+            if missing:
+                break
+            rounds.append(responses)
+    
+    print(f" Parsed {len(rounds)} of {count} rounds from {len(response)} chars\n")
+    return rounds
+
+def run_agent(session_id, priority, bypass_cache, generate_fn, *args):
+    """Call an agent's generate_response inside a scheduler slot"""
+    with attach_thread(), llm_scheduler.slot(session_id, priority), metrics.stage('llm_call'):
+        return generate_fn(*args, bypass_cache=bypass_cache)
+
+def repair_sections(question, history, responses, missing, bypass_cache=False,
+                    session_id='default', priority=PRIORITY_CONTINUATION):
+    """
+    Fill sections missing from a combined completion using the matching agent
+    Updates responses in place; a failed repair leaves the agent's error text
+    """
+    for agent in ('pro', 'con', 'moderator'):
+        if agent not in missing:
+            continue
         
-        pro_response = pro_match.group(1).strip() if pro_match else "Error: Could not parse Pro response"
-        con_response = con_match.group(1).strip() if con_match else "Error: Could not parse Con response"
-        moderator_response = mod_match.group(1).strip() if mod_match else "Error: Could not parse Moderator response"
+        print(f" {agent.capitalize()} section missing - regenerating it with the agent...")
         
-        print(f" Parsed responses:")
-        print(f"   Pro: {len(pro_response)} chars")
-        print(f"   Con: {len(con_response)} chars")
-        print(f"   Mod: {len(moderator_response)} chars\n")
+        if agent == 'pro':
+            text = run_agent(session_id, priority, bypass_cache, pro_agent.generate_response, question, history)
+        elif agent == 'con':
+            # Let Con answer this round's Pro argument
+            con_history = list(history)
+            if not responses['pro'].startswith('Error'):
+                con_history.append({'role': 'pro', 'content': responses['pro']})
+            text = run_agent(session_id, priority, bypass_cache, con_agent.generate_response, question, con_history)
+        else:
+            text = run_agent(
+                session_id, priority, bypass_cache, moderator_agent.generate_response,
+                question, responses['pro'], responses['con'], history
+            )
         
-        return {
-            'pro': pro_response,
-            'con': con_response,
-            'moderator': moderator_response
-        }
+        repaired = bool(text) and not text.startswith('Error')
+        section_parser.record_repair(repaired)
+        responses[agent] = text if repaired else (text or missing_placeholder(agent))
+
+def generate_parallel_round(question, round_num, history, bypass_cache=False,
+                            session_id='default', priority=PRIORITY_CONTINUATION):
+    """
+    Generate a round with one call per agent: Pro and Con run concurrently,
+    then the Moderator synthesizes their outputs
+    Yields: (agent, response) in pro, con, moderator order as each becomes available
+    Raises: Exception if an agent returned an error, before the Moderator is called
+            on it, so the round is never stored
+    """
+    print(f"\n{'-'*60}")
+    print(f" Generating Round {round_num} with parallel agents...")
+    print(f"{'-'*60}\n")
     
-    except Exception as e:
-        print(f" Error parsing response: {e}")
-        return {
-            'pro': f"Error parsing response: {e}",
-            'con': f"Error parsing response: {e}",
-            'moderator': f"Error parsing response: {e}"
-        }
+    # Copy the context so the agents' stage timings keep the request route
+    pro_future = agent_executor.submit(
+        contextvars.copy_context().run,
+        run_agent, session_id, priority, bypass_cache, pro_agent.generate_response, question, history
+    )
+    con_future = agent_executor.submit(
+        contextvars.copy_context().run,
+        run_agent, session_id, priority, bypass_cache, con_agent.generate_response, question, history
+    )
+    
+    pro_response = check_agent_response('Pro', pro_future.result())
+    yield 'pro', pro_response
+    
+    con_response = check_agent_response('Con', con_future.result())
+    yield 'con', con_response
+    
+    yield 'moderator', check_agent_response('Moderator', run_agent(
+        session_id, priority, bypass_cache, moderator_agent.generate_response,
+        question, pro_response, con_response, history
+    ))
+
+def check_agent_response(agent_name, response):
+    """Raise on an agent's "Error: ..." response instead of passing it on as debate text"""
+    if response.startswith('Error'):
+        raise Exception(f"{agent_name} agent failed: {response}")
+    return response
+
+def store_round(session_id, round_num, responses):
+    """Store all three agent responses of a round in one write and extend the rolling summary"""
+    with metrics.stage('store'):
+        session_store.add_messages(session_id, [
+            ('pro', responses['pro']),
+            ('con', responses['con']),
+            ('moderator', responses['moderator'])
+        ])
+        context_builder.update(session_id, round_num, responses)
+
+def find_similar_topic(question, bypass_cache=False):
+    """Look up a previously generated Round 1 for a near-duplicate question"""
+    if topic_index is None or bypass_cache:
+        return None
+    
+    match = topic_index.lookup(question)
+    if match:
+        print(f" Reusing Round 1 of similar topic ({match['similarity']:.2f}): {match['question']}")
+    return match
+
+def remember_topic(question, responses):
+    """Index a freshly generated Round 1 unless any section failed to parse"""
+    if topic_index is not None and not any(responses[agent].startswith('Error') for agent in ('pro', 'con', 'moderator')):
+        topic_index.add(question, responses)
+
+def schedule_prefetch(session_id, question, completed_round, total_rounds):
+    """Start generating the round after completed_round in the background, unless it is batched"""
+    if not PREFETCH_ENABLED or completed_round >= total_rounds:
+        return
+    
+    batch = session_store.get_pending_rounds(session_id)
+    if batch is not None and batch['first_round'] == completed_round + 1:
+        return
+    
+    history = session_store.get_history(session_id)
+    round_prefetcher.schedule(session_id, question, completed_round + 1, history, total_rounds)
+
+def prefetch_round(session_id, question, round_num, history):
+    """Generate a speculative round at the lowest scheduler priority"""
+    return generate_all_responses(question, round_num, history, session_id=session_id, priority=PRIORITY_PREFETCH)
+
+def take_prefetched_round(session_id, round_num, history_len):
+    """Take the prefetched round, moving it ahead of other prefetches now that a user waits on it"""
+    llm_scheduler.promote(session_id, PRIORITY_CONTINUATION)
+    return round_prefetcher.take(session_id, round_num, history_len)
+
+round_prefetcher = RoundPrefetcher(
+    prefetch_round,
+    max_pending=int(os.getenv('SESSION_MAX_COUNT', '1000')),
+    ttl_seconds=session_store.ttl_seconds
+) if PREFETCH_ENABLED else None
+
+if round_prefetcher:
+    # A round prefetched for an evicted session can never be served
+    session_store.on_evict = round_prefetcher.invalidate
+
+def take_batched_round(session_id, round_num, history_len):
+    """
+    Take the next round of the session's batch if it is the one requested and no
+    comment was added since the batch was generated; a stale batch is dropped
+    """
+    batch = session_store.get_pending_rounds(session_id)
+    if batch is None:
+        return None
+    
+    if batch['first_round'] != round_num or batch['history_len'] != history_len:
+        session_store.set_pending_rounds(session_id, None)
+        return None
+    
+    responses, rest = batch['rounds'][0], batch['rounds'][1:]
+    session_store.set_pending_rounds(
+        session_id,
+        dict(batch, first_round=round_num + 1, rounds=rest, history_len=history_len + 3) if rest else None
+    )
+    print(f" Serving batched Round {round_num} for session {session_id}")
+    return responses
+
+def take_ready_round(session_id, round_num, history_len):
+    """Take an already generated round: batched by /debate/rounds, else prefetched"""
+    responses = take_batched_round(session_id, round_num, history_len)
+    if responses is None and round_prefetcher:
+        responses = take_prefetched_round(session_id, round_num, history_len)
+    return responses
+
+def run_new_debate(session_id, question, total_rounds, bypass_cache=False, mode=None):
+    """
+    Replace the session's debate with a new question and produce its Round 1
+    Returns: the /debate/start response body
+    """
+    # Clear previous session
+    session_store.clear_session(session_id)
+    session_store.add_message(session_id, 'user', question)
+    if round_prefetcher:
+        round_prefetcher.invalidate(session_id)
+    
+    print(f"\n{'-'*60}")
+    print(f" NEW DEBATE STARTED")
+    print(f"Question: {question}")
+    print(f"Total Rounds: {total_rounds}")
+    print(f"{'-'*60}\n")
+    
+    return run_start_round(session_id, question, total_rounds, bypass_cache, mode)
+
+def run_start_round(session_id, question, total_rounds, bypass_cache=False, mode=None):
+    """
+    Produce Round 1 for a freshly reset session (reused or generated), store it
+    and schedule the next round
+    Returns: the /debate/start response body
+    """
+    # Serve a previously generated opening for a near-duplicate topic
+    reused = find_similar_topic(question, bypass_cache)
+    if reused:
+        responses = reused['value']
+    else:
+        # Generate all Round 1 responses in one call
+        responses = generate_all_responses(
+            question, 1, [],
+            bypass_cache=bypass_cache,
+            session_id=session_id,
+            priority=PRIORITY_INTERACTIVE,
+            mode=mode
+        )
+        remember_topic(question, responses)
+    
+    # Store all responses
+    store_round(session_id, 1, responses)
+    
+    schedule_prefetch(session_id, question, 1, total_rounds)
+    
+    result = {
+        'success': True,
+        'round': 1,
+        'total_rounds': total_rounds,
+        'responses': responses,
+        'session_id': session_id
+    }
+    if reused:
+        result['reused_topic'] = {'question': reused['question'], 'similarity': reused['similarity']}
+    
+    return result
+
+def run_next_round(session_id, next_round_num, total_rounds, mode=None):
+    """
+    Produce the next round (batched, prefetched or generated), store it and schedule the one after
+    Returns: the /debate/next-round response body
+    """
+    with metrics.stage('history_scan'):
+        history = session_store.get_history(session_id)
+    question = history[0]['content'] if history else "No question"
+    
+    # Use a round generated ahead of time if the history hasn't changed
+    responses = take_ready_round(session_id, next_round_num, len(history))
+    
+    if responses is None:
+        print(f"\n{'-'*60}")
+        print(f" Generating Round {next_round_num}")
+        print(f"{'-'*60}\n")
+        
+        # Generate all responses for this round
+        responses = generate_all_responses(question, next_round_num, history, session_id=session_id, mode=mode)
+    
+    # Store all responses
+    store_round(session_id, next_round_num, responses)
+    
+    schedule_prefetch(session_id, question, next_round_num, total_rounds)
+    
+    return {
+        'success': True,
+        'round': next_round_num,
+        'total_rounds': total_rounds,
+        'responses': responses,
+        'debate_complete': next_round_num >= total_rounds,
+        'session_id': session_id
+    }
+
+def run_round_batch(session_id, next_round_num, last_round, total_rounds, mode=None):
+    """
+    Generate rounds next_round_num..last_round in one call, serve the first and keep
+    the rest in the session store for the following /debate/next-round requests
+    Falls back to single-round generation if no complete round could be parsed
+    Returns: the /debate/next-round response body plus batched_rounds
+    """
+    with metrics.stage('history_scan'):
+        history = session_store.get_history(session_id)
+    question = history[0]['content'] if history else "No question"
+    
+    # The batch replaces any round generated ahead of time
+    session_store.set_pending_rounds(session_id, None)
+    if round_prefetcher:
+        round_prefetcher.invalidate(session_id)
+    
+    rounds = []
+    if last_round > next_round_num:
+        rounds = generate_round_batch(question, next_round_num, last_round, history, session_id)
+    
+    if not rounds:
+        result = run_next_round(session_id, next_round_num, total_rounds, mode)
+        result['batched_rounds'] = 1
+        return result
+    
+    if len(rounds) > 1:
+        session_store.set_pending_rounds(session_id, {
+            'first_round': next_round_num + 1,
+            'rounds': rounds[1:],
+            'history_len': len(history) + 3,
+            'question': question,
+            'total_rounds': total_rounds
+        })
+    
+    store_round(session_id, next_round_num, rounds[0])
+    
+    schedule_prefetch(session_id, question, next_round_num, total_rounds)
+    
+    return {
+        'success': True,
+        'round': next_round_num,
+        'total_rounds': total_rounds,
+        'responses': rounds[0],
+        'debate_complete': next_round_num >= total_rounds,
+        'batched_rounds': len(rounds),
+        'session_id': session_id
+    }
+
+def submit_job(fn, *args):
+    """Run fn(*args) as a background job and answer 202 with the job id to poll"""
+    try:
+        job_id = job_queue.submit(fn, *args)
+    except JobQueueFull as e:
+        return jsonify({'success': False, 'error': str(e)}), 503, {'Retry-After': '5'}
+    
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': f'/jobs/{job_id}'
+    }), 202
 
 @app.route('/debate/start', methods=['POST'])
 def start_debate():
     """
     Start a new debate - generates all Round 1 responses at once
+    With "async": true, returns 202 and a job id to poll at /jobs/<job_id>
     """
     try:
         data = request.get_json()
         question = data.get('question', '').strip()
         session_id = data.get('session_id', 'default')
         total_rounds = data.get('rounds', 3)
+        bypass_cache = bool(data.get('bypass_cache', False))
+        mode = data.get('mode')
         
         if not question:
             return jsonify({'error': 'Question cannot be empty'}), 400
         
-        # Clear previous session
-        session_store.clear_session(session_id)
-        session_store.add_message(session_id, 'user', question)
+        if mode and mode not in GENERATION_MODES:
+            return jsonify({'error': f"mode must be one of {', '.join(GENERATION_MODES)}"}), 400
         
-        print(f"\n{'-'*60}")
-        print(f" NEW DEBATE STARTED")
-        print(f"Question: {question}")
-        print(f"Total Rounds: {total_rounds}")
-        print(f"{'-'*60}\n")
+        if data.get('async'):
+            # The session is reset by the job, so a rejected job leaves the current debate intact
+            return submit_job(run_new_debate, session_id, question, total_rounds, bypass_cache, mode)
         
-        # Generate all Round 1 responses in one call
-        responses = generate_all_responses(question, 1, [])
-        
-        # Store all responses
-        session_store.add_message(session_id, 'pro', responses['pro'])
-        session_store.add_message(session_id, 'con', responses['con'])
-        session_store.add_message(session_id, 'moderator', responses['moderator'])
-        
-        return jsonify({
-            'success': True,
-            'round': 1,
-            'total_rounds': total_rounds,
-            'responses': responses,
-            'session_id': session_id
-        })
+        return jsonify(run_new_debate(session_id, question, total_rounds, bypass_cache, mode))
     
     except Exception as e:
         print(f"\n Error: {str(e)}\n")
@@ -242,12 +900,17 @@ def start_debate():
 def next_round():
     """
     Generate next round - all three responses at once
+    With "async": true, returns 202 and a job id to poll at /jobs/<job_id>
     """
     try:
         data = request.get_json()
         session_id = data.get('session_id', 'default')
         current_round = data.get('current_round', 1)
         total_rounds = data.get('total_rounds', 3)
+        mode = data.get('mode')
+        
+        if mode and mode not in GENERATION_MODES:
+            return jsonify({'error': f"mode must be one of {', '.join(GENERATION_MODES)}"}), 400
         
         next_round_num = current_round + 1
         
@@ -258,34 +921,273 @@ def next_round():
                 'message': 'Debate completed'
             })
         
-        history = session_store.get_history(session_id)
-        question = history[0]['content'] if history else "No question"
+        if data.get('async'):
+            return submit_job(run_next_round, session_id, next_round_num, total_rounds, mode)
         
-        print(f"\n{'-'*60}")
-        print(f" Generating Round {next_round_num}")
-        print(f"{'-'*60}\n")
+        return jsonify(run_next_round(session_id, next_round_num, total_rounds, mode))
+    
+    except Exception as e:
+        print(f"\n Error: {str(e)}\n")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/debate/rounds', methods=['POST'])
+def batch_rounds():
+    """
+    Generate the next rounds, up to "through_round", in one API call
+    Returns the first of them; the rest are served one at a time by /debate/next-round
+    (or its stream) unless a comment is added first, which falls back to single rounds
+    With "async": true, returns 202 and a job id to poll at /jobs/<job_id>
+    """
+    try:
+        data = request.get_json()
+        session_id = data.get('session_id', 'default')
+        current_round = data.get('current_round', 1)
+        total_rounds = data.get('total_rounds', 3)
+        through_round = data.get('through_round', total_rounds)
+        mode = data.get('mode')
         
-        # Generate all responses for this round
-        responses = generate_all_responses(question, next_round_num, history)
+        if mode and mode not in GENERATION_MODES:
+            return jsonify({'error': f"mode must be one of {', '.join(GENERATION_MODES)}"}), 400
         
-        # Store all responses
-        session_store.add_message(session_id, 'pro', responses['pro'])
-        session_store.add_message(session_id, 'con', responses['con'])
-        session_store.add_message(session_id, 'moderator', responses['moderator'])
+        next_round_num = current_round + 1
         
-        return jsonify({
-            'success': True,
-            'round': next_round_num,
-            'total_rounds': total_rounds,
-            'responses': responses,
-            'debate_complete': next_round_num >= total_rounds,
-            'session_id': session_id
-        })
+        if next_round_num > total_rounds:
+            return jsonify({
+                'success': True,
+                'debate_complete': True,
+                'message': 'Debate completed'
+            })
+        
+        last_round = max(next_round_num, min(through_round, total_rounds, current_round + ROUNDS_BATCH_MAX))
+        
+        if data.get('async'):
+            return submit_job(run_round_batch, session_id, next_round_num, last_round, total_rounds, mode)
+        
+        return jsonify(run_round_batch(session_id, next_round_num, last_round, total_rounds, mode))
     
     except Exception as e:
         print(f"\n Error: {str(e)}\n")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Poll a round generation job
+    ?wait=N long-polls up to N seconds (capped at JOB_MAX_WAIT_SECONDS) for the job to finish
+    """
+    try:
+        wait = min(max(float(request.args.get('wait', 0)), 0), JOB_MAX_WAIT_SECONDS)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'wait must be a number of seconds'}), 400
+    
+    job = job_queue.get(job_id, wait=wait)
+    if job is None:
+        return jsonify({'success': False, 'error': f'Job {job_id} not found or expired'}), 404
+    
+    return jsonify(dict(job, success=job['status'] != 'error'))
+
+def sse_event(event, data):
+    """Format a single Server-Sent Event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def stream_round(session_id, question, round_num, history, payload, bypass_cache=False, mode=None):
+    """
+    Stream one round as Server-Sent Events while the combined completion is generated
+    In parallel mode each agent's section is sent whole as soon as that agent finishes,
+    in JSON format all sections are sent whole once the round is validated
+    Events: meta, delta {agent, text}, agent_done {agent}, done {responses, ...}, error
+    """
+    yield sse_event('meta', payload)
+    
+    # A reused, batched or prefetched round is sent as one delta per agent
+    responses = None
+    if round_num == 1:
+        reused = find_similar_topic(question, bypass_cache)
+        if reused:
+            responses = reused['value']
+            payload = dict(payload, reused_topic={'question': reused['question'], 'similarity': reused['similarity']})
+    else:
+        responses = take_ready_round(session_id, round_num, len(history))
+    
+    if responses is None:
+        priority = PRIORITY_INTERACTIVE if round_num == 1 else PRIORITY_CONTINUATION
+        try:
+            if choose_generation_mode(mode) == 'parallel':
+                responses = {}
+                for agent, text in generate_parallel_round(
+                    question, round_num, history, bypass_cache, session_id, priority
+                ):
+                    responses[agent] = text
+                    yield sse_event('delta', {'agent': agent, 'text': text})
+                    yield sse_event('agent_done', {'agent': agent})
+            elif RESPONSE_FORMAT == 'json':
+                # A JSON object can't be split into sections mid-stream; send each section whole
+                responses = generate_all_responses(
+                    question, round_num, history, bypass_cache, session_id, priority, mode='combined'
+                )
+                for agent in ('pro', 'con', 'moderator'):
+                    yield sse_event('delta', {'agent': agent, 'text': responses[agent]})
+                    yield sse_event('agent_done', {'agent': agent})
+            else:
+                responses = yield from stream_generated_round(
+                    session_id, question, round_num, history, priority, bypass_cache
+                )
+        except Exception as e:
+            print(f"\n Error: {str(e)}\n")
+            yield sse_event('error', {'success': False, 'error': str(e)})
+            return
+        
+        if round_num == 1:
+            remember_topic(question, responses)
+    else:
+        for agent in ('pro', 'con', 'moderator'):
+            yield sse_event('delta', {'agent': agent, 'text': responses[agent]})
+            yield sse_event('agent_done', {'agent': agent})
+    
+    # Store all responses once the round is complete
+    store_round(session_id, round_num, responses)
+    
+    schedule_prefetch(session_id, question, round_num, payload['total_rounds'])
+    
+    yield sse_event('done', dict(payload, success=True, responses=responses))
+
+def stream_generated_round(session_id, question, round_num, history, priority, bypass_cache=False):
+    """
+    Yield SSE events for a freshly streamed completion
+    The scheduler slot is held until the stream ends or the client disconnects
+    Sections the streaming parser missed are recovered from the full text or
+    regenerated by their agent, and sent whole before the function returns
+    Returns: parsed responses dict
+    """
+    with metrics.stage('prompt_build'):
+        prompt = build_debate_prompt(question, round_num, history, session_id)
+    parser = StreamingSectionParser()
+    chunks = []
+    
+    print(f"\n{'-'*60}")
+    print(f" Streaming all agents for Round {round_num}...")
+    print(f"{'-'*60}\n")
+    
+    with llm_scheduler.slot(session_id, priority), metrics.stage('llm_call'):
+        for chunk in gemini_client.generate_stream(
+            prompt=prompt,
+            max_tokens=3000,
+            temperature=0.8,
+            bypass_cache=bypass_cache
+        ):
+            chunks.append(chunk)
+            for event, data in parser.feed(chunk):
+                yield _parser_event_to_sse(event, data)
+    
+    for event, data in parser.finish():
+        yield _parser_event_to_sse(event, data)
+    
+    # The final text comes from the tolerant parser (the done event carries it)
+    with metrics.stage('parse'):
+        responses, missing = section_parser.parse(''.join(chunks))
+    if missing:
+        repair_sections(question, history, responses, missing, bypass_cache, session_id, priority)
+    
+    for agent in ('pro', 'con', 'moderator'):
+        if agent not in parser.completed:
+            yield sse_event('delta', {'agent': agent, 'text': responses[agent]})
+            yield sse_event('agent_done', {'agent': agent})
+    
+    print(f" Streamed responses:")
+    print(f"   Pro: {len(responses['pro'])} chars")
+    print(f"   Con: {len(responses['con'])} chars")
+    print(f"   Mod: {len(responses['moderator'])} chars\n")
+    
+    return responses
+
+def _parser_event_to_sse(event, data):
+    if event == 'delta':
+        agent, text = data
+        return sse_event('delta', {'agent': agent, 'text': text})
+    return sse_event('agent_done', {'agent': data})
+
+def sse_response(generator):
+    """Wrap an event generator in a streaming text/event-stream response"""
+    return Response(
+        stream_with_context(generator),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/debate/start/stream', methods=['POST'])
+def start_debate_stream():
+    """
+    Start a new debate - streams Round 1 agent sections as they are generated
+    """
+    data = request.get_json()
+    question = data.get('question', '').strip()
+    session_id = data.get('session_id', 'default')
+    total_rounds = data.get('rounds', 3)
+    bypass_cache = bool(data.get('bypass_cache', False))
+    mode = data.get('mode')
+    
+    if not question:
+        return jsonify({'error': 'Question cannot be empty'}), 400
+    
+    if mode and mode not in GENERATION_MODES:
+        return jsonify({'error': f"mode must be one of {', '.join(GENERATION_MODES)}"}), 400
+    
+    # Clear previous session
+    session_store.clear_session(session_id)
+    session_store.add_message(session_id, 'user', question)
+    if round_prefetcher:
+        round_prefetcher.invalidate(session_id)
+    
+    print(f"\n{'-'*60}")
+    print(f" NEW DEBATE STARTED (streaming)")
+    print(f"Question: {question}")
+    print(f"Total Rounds: {total_rounds}")
+    print(f"{'-'*60}\n")
+    
+    payload = {
+        'round': 1,
+        'total_rounds': total_rounds,
+        'session_id': session_id
+    }
+    
+    return sse_response(stream_round(session_id, question, 1, [], payload, bypass_cache, mode))
+
+@app.route('/debate/next-round/stream', methods=['POST'])
+def next_round_stream():
+    """
+    Generate next round - streams agent sections as they are generated
+    """
+    data = request.get_json()
+    session_id = data.get('session_id', 'default')
+    current_round = data.get('current_round', 1)
+    total_rounds = data.get('total_rounds', 3)
+    mode = data.get('mode')
+    
+    if mode and mode not in GENERATION_MODES:
+        return jsonify({'error': f"mode must be one of {', '.join(GENERATION_MODES)}"}), 400
+    
+    next_round_num = current_round + 1
+    
+    if next_round_num > total_rounds:
+        return sse_response(iter([sse_event('done', {
+            'success': True,
+            'debate_complete': True,
+            'message': 'Debate completed'
+        })]))
+    
+    with metrics.stage('history_scan'):
+        history = session_store.get_history(session_id)
+    question = history[0]['content'] if history else "No question"
+    
+    payload = {
+        'round': next_round_num,
+        'total_rounds': total_rounds,
+        'debate_complete': next_round_num >= total_rounds,
+        'session_id': session_id
+    }
+    
+    return sse_response(stream_round(session_id, question, next_round_num, history, payload, mode=mode))
+
 @app.route('/debate/add-comment', methods=['POST'])
 def add_comment():
     """User adds a comment during the debate"""
@@ -296,6 +1198,17 @@ def add_comment():
         
         if comment:
             session_store.add_message(session_id, 'user', comment)
+            
+            # Batched rounds were generated without the comment - continue with single rounds
+            batch = session_store.get_pending_rounds(session_id)
+            if batch is not None:
+                session_store.set_pending_rounds(session_id, None)
+            
+            # The prefetched round no longer reflects the history - regenerate it
+            if round_prefetcher:
+                refreshed = round_prefetcher.refresh(session_id, session_store.get_history(session_id))
+                if not refreshed and batch is not None:
+                    schedule_prefetch(session_id, batch['question'], batch['first_round'] - 1, batch['total_rounds'])
         
         return jsonify({
             'success': True,
@@ -305,6 +1218,63 @@ def add_comment():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/stats', methods=['GET'])
+def get_stats():
+    """Scheduler queue depth and wait times, plus model routing, rate limiter, prefetch, cache and store counters"""
+    stats = {
+        'scheduler': llm_scheduler.get_stats(),
+        'jobs': job_queue.get_stats(),
+        'parser': section_parser.get_stats(),
+        'context': context_builder.get_stats(),
+        'provider': gemini_client.provider.get_stats(),
+        'models': gemini_client.router.get_stats(),
+        'rate_limiter': gemini_client.rate_limiter.get_stats(),
+        'token_estimator': gemini_client.token_estimator.get_stats(),
+        'session_store': session_store.get_stats()
+    }
+    if round_prefetcher:
+        stats['prefetch'] = round_prefetcher.get_stats()
+    if gemini_client.cache is not None:
+        stats['cache'] = gemini_client.cache.get_stats()
+    if topic_index is not None:
+        stats['topic_index'] = topic_index.get_stats()
+    if gemini_client.hedger is not None:
+        stats['hedging'] = gemini_client.hedger.get_stats()
+    if gemini_client.key_pool is not None:
+        stats['api_keys'] = gemini_client.key_pool.get_stats()
+    if request_profiler:
+        stats['profiler'] = request_profiler.get_stats()
+    return jsonify({'success': True, 'stats': stats})
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics_text():
+    """Prometheus text exposition of request, stage, LLM call and store metrics"""
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
+@app.route('/admin/profiles', methods=['GET'])
+def list_profiles():
+    """Stored request profiles, newest first"""
+    if not request_profiler:
+        return jsonify({'success': False, 'error': 'Profiling is disabled (set PROFILING_ENABLED=true)'}), 404
+    if not is_profile_admin():
+        return jsonify({'success': False, 'error': 'Invalid admin token'}), 403
+    return jsonify({'success': True, 'profiles': request_profiler.list_profiles(), 'stats': request_profiler.get_stats()})
+
+@app.route('/admin/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """Collapsed stacks of a stored profile ("latest" for the most recent), ready for flamegraph tools"""
+    if not request_profiler:
+        return jsonify({'success': False, 'error': 'Profiling is disabled (set PROFILING_ENABLED=true)'}), 404
+    if not is_profile_admin():
+        return jsonify({'success': False, 'error': 'Invalid admin token'}), 403
+    if profile_id != 'latest' and not profile_id.isdigit():
+        return jsonify({'success': False, 'error': 'profile_id must be a number or "latest"'}), 400
+    
+    collapsed = request_profiler.collapsed(None if profile_id == 'latest' else int(profile_id))
+    if collapsed is None:
+        return jsonify({'success': False, 'error': f'Profile {profile_id} not found'}), 404
+    return Response(collapsed, mimetype='text/plain')
+
 @app.route('/history/<session_id>', methods=['GET'])
 def get_history(session_id):
     history = session_store.get_history(session_id)
@@ -313,13 +1283,17 @@ def get_history(session_id):
 @app.route('/clear/<session_id>', methods=['DELETE'])
 def clear_history(session_id):
     session_store.clear_session(session_id)
+    if round_prefetcher:
+        round_prefetcher.invalidate(session_id)
     return jsonify({'success': True, 'message': f'Session {session_id} cleared'})
 
 if __name__ == '__main__':
     print("\n" + "-"*60)
     print(" Gemini Multi-Agent Debate Console v3.1")
     print("-"*60)
-    print(f"API Key: {' Loaded' if GEMINI_API_KEY else ' Missing'}")
+    print(f"API Key: {' Loaded' if GEMINI_API_KEY else ' Missing'}"
+          + (f" ({len(gemini_client.key_pool)} keys)" if gemini_client.key_pool is not None else ""))
+    print(f"Provider: {gemini_client.provider.name}")
     print("\n NEW FEATURES:")
     print("   . Single API call per round (3x fewer requests!)")
     print("   . Smart formatting: bullets for long responses")
@@ -1,122 +1,356 @@
 """
 Session Store - Manages conversation history for debate sessions
 Stores messages in memory for multi-turn conversations
+Bounded by a max session count and idle TTL with LRU eviction
 """
 
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Tuple
 
 
 class SessionStore:
-    def __init__(self):
-        """Initialize the session store with an empty storage dictionary"""
-        self.sessions = {}
-        print(" Session Store initialized")
-    
+    def __init__(self, max_sessions: int = 1000, ttl_seconds: Optional[float] = 3600):
+        """
+        Initialize the session store with an empty storage dictionary
+
+        Args:
+            max_sessions (int): Maximum number of sessions kept before the least
+                                recently used one is evicted
+            ttl_seconds (float): Idle time after which a session expires (None disables)
+        """
+        # Ordered by last access - least recently used first
+        self.sessions = OrderedDict()
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.RLock()
+        # Messages across all stored sessions, kept up to date so get_stats doesn't walk every session
+        self.message_count = 0
+        # Called with the id of each session dropped by TTL or LRU (under self.lock),
+        # so per-session state kept elsewhere can be dropped with it
+        self.on_evict: Optional[Callable[[str], None]] = None
+        self.stats = {
+            'created': 0,
+            'lru_evictions': 0,
+            'ttl_evictions': 0,
+            'hits': 0,
+            'misses': 0
+        }
+        print(f" Session Store initialized (max_sessions={max_sessions}, ttl={ttl_seconds}s)")
+
+    def _is_expired(self, session: Dict, now: float) -> bool:
+        return bool(self.ttl_seconds) and now - session['last_access'] > self.ttl_seconds
+
+    def _get_session(self, session_id: str) -> Optional[Dict]:
+        """Look up a live session and mark it as recently used (caller holds self.lock)"""
+        session = self.sessions.get(session_id)
+        if session is None:
+            self.stats['misses'] += 1
+            return None
+
+        now = time.monotonic()
+        if self._is_expired(session, now):
+            self._remove(session_id, evicted=True)
+            self.stats['ttl_evictions'] += 1
+            self.stats['misses'] += 1
+            return None
+
+        session['last_access'] = now
+        self.sessions.move_to_end(session_id)
+        self.stats['hits'] += 1
+        return session
+
+    def _remove(self, session_id: str, evicted: bool = False) -> None:
+        """Delete a session and its messages from the running count (caller holds self.lock)"""
+        session = self.sessions.pop(session_id)
+        self.message_count -= len(session['messages'])
+        if evicted and self.on_evict:
+            self.on_evict(session_id)
+
+    def _evict(self) -> None:
+        """Drop expired sessions, then least recently used ones over the limit (caller holds self.lock)"""
+        now = time.monotonic()
+
+        # Expired sessions are always at the front since the dict is ordered by access
+        while self.sessions:
+            oldest_id = next(iter(self.sessions))
+            if not self._is_expired(self.sessions[oldest_id], now):
+                break
+            self._remove(oldest_id, evicted=True)
+            self.stats['ttl_evictions'] += 1
+
+        while self.max_sessions and len(self.sessions) >= self.max_sessions:
+            self._remove(next(iter(self.sessions)), evicted=True)
+            self.stats['lru_evictions'] += 1
+
+    def _get_or_create_session(self, session_id: str) -> Dict:
+        with self.lock:
+            session = self._get_session(session_id)
+            if session is None:
+                self._evict()
+                session = {
+                    'created_at': datetime.now().isoformat(),
+                    'last_access': time.monotonic(),
+                    'messages': [],
+                    'summary': None,
+                    'pending_rounds': None,
+                    'lock': threading.Lock()
+                }
+                self.sessions[session_id] = session
+                self.stats['created'] += 1
+            return session
+
     def get_history(self, session_id: str) -> List[Dict]:
         """
         Get conversation history for a specific session
-        
+
         Args:
             session_id (str): Unique session identifier
-        
+
         Returns:
-            list: List of message dictionaries with role and content
+            list: Copy of the message dictionaries with role and content
+                  (empty for unknown sessions, which are not created)
         """
-        if session_id not in self.sessions:
-            self.sessions[session_id] = {
-                'created_at': datetime.now().isoformat(),
-                'messages': []
-            }
-        
-        return self.sessions[session_id]['messages']
-    
+        with self.lock:
+            session = self._get_session(session_id)
+
+        if session is None:
+            return []
+
+        with session['lock']:
+            return list(session['messages'])
+
     def add_message(self, session_id: str, role: str, content: str) -> None:
         """
         Add a message to the session history
-        
+
         Args:
             session_id (str): Unique session identifier
             role (str): Message role (user, pro, con, moderator)
             content (str): Message content
         """
-        if session_id not in self.sessions:
-            self.sessions[session_id] = {
-                'created_at': datetime.now().isoformat(),
-                'messages': []
-            }
-        
         message = {
             'role': role,
             'content': content,
             'timestamp': datetime.now().isoformat()
         }
-        
-        self.sessions[session_id]['messages'].append(message)
-    
+
+        # Appending under self.lock keeps the session from being removed in between,
+        # so the running count always matches the stored messages
+        with self.lock:
+            session = self._get_or_create_session(session_id)
+            with session['lock']:
+                session['messages'].append(message)
+            self.message_count += 1
+
+    def add_messages(self, session_id: str, messages: List[Tuple[str, str]]) -> None:
+        """
+        Add several messages to the session history at once
+
+        Args:
+            session_id (str): Unique session identifier
+            messages (list): (role, content) tuples in order
+        """
+        timestamp = datetime.now().isoformat()
+        new_messages = [
+            {'role': role, 'content': content, 'timestamp': timestamp}
+            for role, content in messages
+        ]
+
+        with self.lock:
+            session = self._get_or_create_session(session_id)
+            with session['lock']:
+                session['messages'].extend(new_messages)
+            self.message_count += len(new_messages)
+
+    def get_summary(self, session_id: str) -> Optional[Dict]:
+        """
+        Get the rolling summary of a session's earlier rounds
+
+        Args:
+            session_id (str): Unique session identifier
+
+        Returns:
+            dict: Summary as last stored by set_summary(), or None if there is none
+        """
+        with self.lock:
+            session = self._get_session(session_id)
+
+        if session is None:
+            return None
+
+        with session['lock']:
+            return session['summary']
+
+    def set_summary(self, session_id: str, summary: Dict) -> None:
+        """
+        Replace the rolling summary of a session
+
+        Args:
+            session_id (str): Unique session identifier
+            summary (dict): JSON-serializable summary
+        """
+        session = self._get_or_create_session(session_id)
+
+        with session['lock']:
+            session['summary'] = summary
+
+    def get_pending_rounds(self, session_id: str) -> Optional[Dict]:
+        """
+        Get the batch of generated rounds a session has not been served yet
+
+        Args:
+            session_id (str): Unique session identifier
+
+        Returns:
+            dict: Batch as last stored by set_pending_rounds(), or None if there is none
+        """
+        with self.lock:
+            session = self._get_session(session_id)
+
+        if session is None:
+            return None
+
+        with session['lock']:
+            return session['pending_rounds']
+
+    def set_pending_rounds(self, session_id: str, batch: Optional[Dict]) -> None:
+        """
+        Replace (or with None, drop) the batch of generated rounds of a session
+
+        Args:
+            session_id (str): Unique session identifier
+            batch (dict): JSON-serializable batch, or None
+        """
+        if batch is None:
+            with self.lock:
+                session = self._get_session(session_id)
+            if session is None:
+                return
+        else:
+            session = self._get_or_create_session(session_id)
+
+        with session['lock']:
+            session['pending_rounds'] = batch
+
     def clear_session(self, session_id: str) -> bool:
         """
         Clear all messages for a specific session
-        
+
         Args:
             session_id (str): Unique session identifier
-        
+
         Returns:
             bool: True if session was found and cleared, False otherwise
         """
-        if session_id in self.sessions:
-            del self.sessions[session_id]
-            return True
-        return False
-    
+        with self.lock:
+            if session_id in self.sessions:
+                self._remove(session_id)
+                return True
+            return False
+
     def list_sessions(self) -> List[str]:
         """
         Get a list of all active session IDs
-        
+
         Returns:
             list: List of session ID strings
         """
-        return list(self.sessions.keys())
-    
+        with self.lock:
+            now = time.monotonic()
+            return [
+                session_id for session_id, session in self.sessions.items()
+                if not self._is_expired(session, now)
+            ]
+
     def get_session_info(self, session_id: str) -> Optional[Dict]:
         """
         Get metadata about a specific session
-        
+
         Args:
             session_id (str): Unique session identifier
-        
+
         Returns:
             dict: Session metadata or None if not found
         """
-        if session_id not in self.sessions:
+        with self.lock:
+            session = self._get_session(session_id)
+
+        if session is None:
             return None
-        
-        session = self.sessions[session_id]
-        return {
-            'session_id': session_id,
-            'created_at': session['created_at'],
-            'message_count': len(session['messages']),
-            'last_activity': session['messages'][-1]['timestamp'] if session['messages'] else session['created_at']
-        }
-    
+
+        with session['lock']:
+            messages = session['messages']
+            return {
+                'session_id': session_id,
+                'created_at': session['created_at'],
+                'message_count': len(messages),
+                'last_activity': messages[-1]['timestamp'] if messages else session['created_at']
+            }
+
     def get_message_count(self, session_id: str) -> int:
         """
         Get the number of messages in a session
-        
+
         Args:
             session_id (str): Unique session identifier
-        
+
         Returns:
             int: Number of messages in the session
         """
-        if session_id not in self.sessions:
+        with self.lock:
+            session = self._get_session(session_id)
+
+        if session is None:
             return 0
-        return len(self.sessions[session_id]['messages'])
-    
+        return len(session['messages'])
+
+    def get_stats(self) -> Dict:
+        """
+        Get occupancy and eviction statistics
+
+        Returns:
+            dict: Session count, limits, message count and eviction/lookup counters
+        """
+        with self.lock:
+            stats = dict(self.stats)
+            stats['sessions'] = len(self.sessions)
+            stats['max_sessions'] = self.max_sessions
+            stats['ttl_seconds'] = self.ttl_seconds
+            stats['messages'] = self.message_count
+        return stats
+
+    def export_sessions(self) -> List[Dict]:
+        """
+        Export all live sessions, e.g. to migrate them to another backend
+
+        Returns:
+            list: Dicts with session_id, created_at, a copy of the messages and the summary
+        """
+        with self.lock:
+            now = time.monotonic()
+            sessions = [
+                (session_id, session) for session_id, session in self.sessions.items()
+                if not self._is_expired(session, now)
+            ]
+
+        exported = []
+        for session_id, session in sessions:
+            with session['lock']:
+                exported.append({
+                    'session_id': session_id,
+                    'created_at': session['created_at'],
+                    'messages': list(session['messages']),
+                    'summary': session['summary']
+                })
+        return exported
+
     def __len__(self):
         """Return the number of active sessions"""
         return len(self.sessions)
-    
+
     def __str__(self):
         """String representation of the session store"""
-        return f"SessionStore(sessions={len(self.sessions)})"
\ No newline at end of file
+        return f"SessionStore(sessions={len(self.sessions)}, max_sessions={self.max_sessions})"
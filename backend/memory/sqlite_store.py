@@ -0,0 +1,528 @@
+"""
+SQLite Session Store - Persistent conversation history for debate sessions
+Same interface as SessionStore, backed by SQLite in WAL mode so sessions
+survive restarts and can be shared by several worker processes on one host
+"""
+
+import atexit
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, Dict, Optional, Tuple
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    last_activity TEXT NOT NULL,
+    rounds_completed INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    round INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS summaries (
+    session_id TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS pending_rounds (
+    session_id TEXT PRIMARY KEY,
+    batch TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+-- Row counts kept by triggers in the writing transaction, so stats don't scan the tables
+-- (shared by every process on the database; seeded from the tables on first use)
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+
+INSERT OR IGNORE INTO counters (name, value) SELECT 'sessions', COUNT(*) FROM sessions;
+INSERT OR IGNORE INTO counters (name, value) SELECT 'messages', COUNT(*) FROM messages;
+
+CREATE TRIGGER IF NOT EXISTS count_session_insert AFTER INSERT ON sessions BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'sessions';
+END;
+CREATE TRIGGER IF NOT EXISTS count_session_delete AFTER DELETE ON sessions BEGIN
+    UPDATE counters SET value = value - 1 WHERE name = 'sessions';
+END;
+CREATE TRIGGER IF NOT EXISTS count_message_insert AFTER INSERT ON messages BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'messages';
+END;
+CREATE TRIGGER IF NOT EXISTS count_message_delete AFTER DELETE ON messages BEGIN
+    UPDATE counters SET value = value - 1 WHERE name = 'messages';
+END;
+
+CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, id);
+CREATE INDEX IF NOT EXISTS idx_messages_session_round ON messages (session_id, round);
+CREATE INDEX IF NOT EXISTS idx_sessions_last_activity ON sessions (last_activity);
+"""
+
+
+class SQLiteSessionStore:
+    def __init__(
+        self,
+        db_path: str = 'sessions.db',
+        batch_size: int = 16,
+        flush_interval: float = 0.05,
+        ttl_seconds: Optional[float] = None
+    ):
+        """
+        Initialize the SQLite session store
+
+        Single add_message calls are buffered and committed in batches, either
+        when batch_size messages are pending or after flush_interval seconds;
+        user messages are committed right away so other workers see a new
+        question or comment. Reads flush pending writes first so a process
+        always sees its own writes.
+
+        Args:
+            db_path (str): Path to the SQLite database file
+            batch_size (int): Pending messages that trigger a commit
+            flush_interval (float): Maximum seconds a message stays uncommitted
+            ttl_seconds (float): Idle time after which sessions are purged (None disables)
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.ttl_seconds = ttl_seconds
+
+        self._local = threading.local()
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.stats = {
+            'flushes': 0,
+            'messages_written': 0,
+            'ttl_evictions': 0
+        }
+        # Called with the id of each session purged by TTL, so per-session state
+        # kept elsewhere can be dropped with it
+        self.on_evict: Optional[Callable[[str], None]] = None
+
+        conn = self._get_connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        # One transaction, so no other process writes between seeding the counters and creating their triggers
+        conn.executescript(f'BEGIN IMMEDIATE;\n{SCHEMA}\nCOMMIT;')
+
+        # Commit buffered writes even when no further requests arrive
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name='sqlite-store-flush', daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+
+        print(f" SQLite Session Store initialized ({db_path})")
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """Get this thread's connection (sqlite3 connections are not shared across threads)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            self._local.conn = conn
+        return conn
+
+    def _flush_loop(self) -> None:
+        last_purge = time.monotonic()
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+                if self.ttl_seconds and time.monotonic() - last_purge > min(self.ttl_seconds, 60):
+                    self.purge_expired()
+                    last_purge = time.monotonic()
+            except sqlite3.Error as e:
+                print(f" SQLite Session Store flush failed: {e}")
+
+    def _write_messages(self, conn: sqlite3.Connection, rows: List[Tuple[str, str, str, str]]) -> None:
+        """Insert (session_id, role, content, timestamp) rows inside an open transaction"""
+        for session_id, role, content, timestamp in rows:
+            conn.execute(
+                'INSERT INTO sessions (session_id, created_at, last_activity) VALUES (?, ?, ?) '
+                'ON CONFLICT (session_id) DO UPDATE SET last_activity = excluded.last_activity',
+                (session_id, timestamp, timestamp)
+            )
+            rounds_completed = conn.execute(
+                'SELECT rounds_completed FROM sessions WHERE session_id = ?', (session_id,)
+            ).fetchone()[0]
+
+            # Messages belong to the round they lead into or are part of
+            conn.execute(
+                'INSERT INTO messages (session_id, round, role, content, timestamp) VALUES (?, ?, ?, ?, ?)',
+                (session_id, rounds_completed + 1, role, content, timestamp)
+            )
+
+            if role == 'moderator':
+                conn.execute(
+                    'UPDATE sessions SET rounds_completed = rounds_completed + 1 WHERE session_id = ?',
+                    (session_id,)
+                )
+
+    def _commit(self, rows: List[Tuple[str, str, str, str]]) -> None:
+        conn = self._get_connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            self._write_messages(conn, rows)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        self.stats['flushes'] += 1
+        self.stats['messages_written'] += len(rows)
+
+    def flush(self) -> None:
+        """Commit all buffered messages in one transaction"""
+        with self._flush_lock:
+            with self._pending_lock:
+                rows, self._pending = self._pending, []
+            if rows:
+                self._commit(rows)
+
+    def get_history(self, session_id: str) -> List[Dict]:
+        """
+        Get conversation history for a specific session
+
+        Args:
+            session_id (str): Unique session identifier
+
+        Returns:
+            list: List of message dictionaries with role and content
+        """
+        self.flush()
+        rows = self._get_connection().execute(
+            'SELECT role, content, timestamp FROM messages WHERE session_id = ? ORDER BY id',
+            (session_id,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_round_messages(self, session_id: str, round_num: int) -> List[Dict]:
+        """
+        Get the messages belonging to one round of a session
+
+        Args:
+            session_id (str): Unique session identifier
+            round_num (int): Round number (user comments count towards the next round)
+
+        Returns:
+            list: List of message dictionaries with role and content
+        """
+        self.flush()
+        rows = self._get_connection().execute(
+            'SELECT role, content, timestamp FROM messages WHERE session_id = ? AND round = ? ORDER BY id',
+            (session_id, round_num)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def add_message(self, session_id: str, role: str, content: str) -> None:
+        """
+        Add a message to the session history (committed in the next batch,
+        or right away for user messages)
+
+        Args:
+            session_id (str): Unique session identifier
+            role (str): Message role (user, pro, con, moderator)
+            content (str): Message content
+        """
+        row = (session_id, role, content, datetime.now().isoformat())
+
+        with self._pending_lock:
+            self._pending.append(row)
+            pending_count = len(self._pending)
+
+        # Another worker may serve the session's next request, which must see a user's input
+        if role == 'user' or pending_count >= self.batch_size:
+            self.flush()
+
+    def add_messages(self, session_id: str, messages: List[Tuple[str, str]]) -> None:
+        """
+        Add several messages to the session history in a single commit
+
+        Args:
+            session_id (str): Unique session identifier
+            messages (list): (role, content) tuples in order
+        """
+        timestamp = datetime.now().isoformat()
+
+        with self._pending_lock:
+            self._pending.extend((session_id, role, content, timestamp) for role, content in messages)
+
+        self.flush()
+
+    def get_summary(self, session_id: str) -> Optional[Dict]:
+        """
+        Get the rolling summary of a session's earlier rounds
+
+        Args:
+            session_id (str): Unique session identifier
+
+        Returns:
+            dict: Summary as last stored by set_summary(), or None if there is none
+        """
+        row = self._get_connection().execute(
+            'SELECT summary FROM summaries WHERE session_id = ?', (session_id,)
+        ).fetchone()
+        return json.loads(row['summary']) if row else None
+
+    def set_summary(self, session_id: str, summary: Dict) -> None:
+        """
+        Replace the rolling summary of a session
+
+        Args:
+            session_id (str): Unique session identifier
+            summary (dict): JSON-serializable summary
+        """
+        self._get_connection().execute(
+            'INSERT INTO summaries (session_id, summary, updated_at) VALUES (?, ?, ?) '
+            'ON CONFLICT (session_id) DO UPDATE SET summary = excluded.summary, updated_at = excluded.updated_at',
+            (session_id, json.dumps(summary), datetime.now().isoformat())
+        )
+
+    def get_pending_rounds(self, session_id: str) -> Optional[Dict]:
+        """
+        Get the batch of generated rounds a session has not been served yet
+
+        Args:
+            session_id (str): Unique session identifier
+
+        Returns:
+            dict: Batch as last stored by set_pending_rounds(), or None if there is none
+        """
+        row = self._get_connection().execute(
+            'SELECT batch FROM pending_rounds WHERE session_id = ?', (session_id,)
+        ).fetchone()
+        return json.loads(row['batch']) if row else None
+
+    def set_pending_rounds(self, session_id: str, batch: Optional[Dict]) -> None:
+        """
+        Replace (or with None, drop) the batch of generated rounds of a session
+
+        Args:
+            session_id (str): Unique session identifier
+            batch (dict): JSON-serializable batch, or None
+        """
+        conn = self._get_connection()
+        if batch is None:
+            conn.execute('DELETE FROM pending_rounds WHERE session_id = ?', (session_id,))
+            return
+
+        conn.execute(
+            'INSERT INTO pending_rounds (session_id, batch, updated_at) VALUES (?, ?, ?) '
+            'ON CONFLICT (session_id) DO UPDATE SET batch = excluded.batch, updated_at = excluded.updated_at',
+            (session_id, json.dumps(batch), datetime.now().isoformat())
+        )
+
+    def clear_session(self, session_id: str) -> bool:
+        """
+        Clear all messages for a specific session
+
+        Args:
+            session_id (str): Unique session identifier
+
+        Returns:
+            bool: True if session was found and cleared, False otherwise
+        """
+        self.flush()
+        conn = self._get_connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('DELETE FROM messages WHERE session_id = ?', (session_id,))
+            conn.execute('DELETE FROM summaries WHERE session_id = ?', (session_id,))
+            conn.execute('DELETE FROM pending_rounds WHERE session_id = ?', (session_id,))
+            deleted = conn.execute('DELETE FROM sessions WHERE session_id = ?', (session_id,)).rowcount
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return deleted > 0
+
+    def purge_expired(self) -> int:
+        """
+        Delete sessions idle for longer than ttl_seconds
+
+        Returns:
+            int: Number of sessions deleted
+        """
+        if not self.ttl_seconds:
+            return 0
+
+        cutoff = (datetime.now() - timedelta(seconds=self.ttl_seconds)).isoformat()
+        conn = self._get_connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            expired = [
+                row['session_id'] for row in
+                conn.execute('SELECT session_id FROM sessions WHERE last_activity < ?', (cutoff,))
+            ]
+            conn.execute(
+                'DELETE FROM messages WHERE session_id IN '
+                '(SELECT session_id FROM sessions WHERE last_activity < ?)',
+                (cutoff,)
+            )
+            for table in ('summaries', 'pending_rounds'):
+                conn.execute(
+                    f'DELETE FROM {table} WHERE session_id IN '
+                    '(SELECT session_id FROM sessions WHERE last_activity < ?)',
+                    (cutoff,)
+                )
+            deleted = conn.execute('DELETE FROM sessions WHERE last_activity < ?', (cutoff,)).rowcount
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        self.stats['ttl_evictions'] += deleted
+        if self.on_evict:
+            for session_id in expired:
+                self.on_evict(session_id)
+        return deleted
+
+    def list_sessions(self) -> List[str]:
+        """
+        Get a list of all active session IDs
+
+        Returns:
+            list: List of session ID strings
+        """
+        self.flush()
+        rows = self._get_connection().execute('SELECT session_id FROM sessions ORDER BY last_activity').fetchall()
+        return [row['session_id'] for row in rows]
+
+    def get_session_info(self, session_id: str) -> Optional[Dict]:
+        """
+        Get metadata about a specific session
+
+        Args:
+            session_id (str): Unique session identifier
+
+        Returns:
+            dict: Session metadata or None if not found
+        """
+        self.flush()
+        conn = self._get_connection()
+        session = conn.execute(
+            'SELECT created_at, last_activity FROM sessions WHERE session_id = ?', (session_id,)
+        ).fetchone()
+
+        if session is None:
+            return None
+
+        return {
+            'session_id': session_id,
+            'created_at': session['created_at'],
+            'message_count': self.get_message_count(session_id),
+            'last_activity': session['last_activity']
+        }
+
+    def get_message_count(self, session_id: str) -> int:
+        """
+        Get the number of messages in a session
+
+        Args:
+            session_id (str): Unique session identifier
+
+        Returns:
+            int: Number of messages in the session
+        """
+        self.flush()
+        return self._get_connection().execute(
+            'SELECT COUNT(*) FROM messages WHERE session_id = ?', (session_id,)
+        ).fetchone()[0]
+
+    def migrate_from(self, store) -> int:
+        """
+        Copy every session from another store (e.g. the in-memory SessionStore)
+
+        Existing sessions with the same id are replaced. Original timestamps are kept.
+
+        Args:
+            store: Store providing export_sessions()
+
+        Returns:
+            int: Number of sessions migrated
+        """
+        exported = store.export_sessions()
+
+        for session in exported:
+            self.clear_session(session['session_id'])
+            rows = [
+                (session['session_id'], message['role'], message['content'], message['timestamp'])
+                for message in session['messages']
+            ]
+            if rows:
+                self._commit(rows)
+                conn = self._get_connection()
+                conn.execute(
+                    'UPDATE sessions SET created_at = ? WHERE session_id = ?',
+                    (session['created_at'], session['session_id'])
+                )
+            if session.get('summary') is not None:
+                self.set_summary(session['session_id'], session['summary'])
+
+        print(f" Migrated {len(exported)} sessions to {self.db_path}")
+        return len(exported)
+
+    def export_sessions(self) -> List[Dict]:
+        """
+        Export all sessions
+
+        Returns:
+            list: Dicts with session_id, created_at, messages and summary
+        """
+        self.flush()
+        conn = self._get_connection()
+        sessions = conn.execute('SELECT session_id, created_at FROM sessions ORDER BY last_activity').fetchall()
+        return [
+            {
+                'session_id': session['session_id'],
+                'created_at': session['created_at'],
+                'messages': self.get_history(session['session_id']),
+                'summary': self.get_summary(session['session_id'])
+            }
+            for session in sessions
+        ]
+
+    def get_stats(self) -> Dict:
+        """
+        Get occupancy and write statistics
+
+        Returns:
+            dict: Session and message counts, pending writes and flush counters
+        """
+        self.flush()
+        conn = self._get_connection()
+        stats = dict(self.stats)
+        counters = dict(conn.execute("SELECT name, value FROM counters WHERE name IN ('sessions', 'messages')").fetchall())
+        stats['sessions'] = counters.get('sessions', 0)
+        stats['messages'] = counters.get('messages', 0)
+        stats['ttl_seconds'] = self.ttl_seconds
+        with self._pending_lock:
+            stats['pending_writes'] = len(self._pending)
+        return stats
+
+    def close(self) -> None:
+        """Flush pending writes and stop the background flusher"""
+        self._stop.set()
+        self.flush()
+
+    def __len__(self):
+        """Return the number of stored sessions"""
+        self.flush()
+        return self._get_connection().execute("SELECT value FROM counters WHERE name = 'sessions'").fetchone()[0]
+
+    def __str__(self):
+        """String representation of the session store"""
+        return f"SQLiteSessionStore(db_path={self.db_path})"
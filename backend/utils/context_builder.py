@@ -0,0 +1,216 @@
+"""
+Context Builder - Bounded debate context for continuation rounds
+Keeps a compact rolling summary per session (one entry per round, updated
+when the round is stored) and assembles the summary, recent user comments
+and the last exchange into a context block that stays under a token budget
+"""
+
+import re
+import threading
+from typing import Dict, List
+
+from utils.gemini_client import estimate_tokens
+
+
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def _clip(text: str, max_chars: int) -> str:
+    """Collapse whitespace and cut text to max_chars on a word boundary"""
+    text = _WHITESPACE_RE.sub(' ', text).strip()
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(' ', 1)[0] + '...'
+
+
+def lead_sentence(text: str, max_chars: int = 160) -> str:
+    """
+    First sentence of an agent response, without bullets and markdown emphasis
+
+    Args:
+        text (str): Agent response
+        max_chars (int): Maximum length of the returned sentence
+
+    Returns:
+        str: Clipped first sentence (empty for empty text)
+    """
+    text = text.replace('•', ' ').replace('**', '').strip()
+    return _clip(_SENTENCE_END_RE.split(text, 1)[0], max_chars)
+
+
+def summarize_round(round_num: int, responses: Dict, max_chars: int = 160) -> str:
+    """
+    One-line summary of a round: each agent's key points if the round has
+    them (JSON output mode), otherwise each agent's lead sentence
+
+    Args:
+        round_num (int): Round number
+        responses (dict): Agent responses, optionally with 'key_points'
+        max_chars (int): Maximum length per agent
+
+    Returns:
+        str: Summary line
+    """
+    key_points = responses.get('key_points', {})
+    parts = []
+    for agent, label in (('pro', 'Pro'), ('con', 'Con'), ('moderator', 'Moderator')):
+        if key_points.get(agent):
+            point = _clip('; '.join(key_points[agent]), max_chars)
+        else:
+            point = lead_sentence(responses[agent], max_chars)
+        parts.append(f"{label}: {point}")
+    return f"Round {round_num} - " + ' | '.join(parts)
+
+
+class RollingContextBuilder:
+    def __init__(
+        self,
+        session_store,
+        token_budget: int = 800,
+        summary_budget: int = 400,
+        max_comments: int = 3,
+        argument_chars: int = 400
+    ):
+        """
+        Initialize the context builder
+
+        Args:
+            session_store: Store providing get_summary() / set_summary()
+            token_budget (int): Estimated tokens the whole context block may use
+            summary_budget (int): Estimated tokens kept in the stored summary;
+                                  the oldest rounds are dropped beyond it
+            max_comments (int): Most recent user comments included
+            argument_chars (int): Characters kept of the last Pro and Con arguments
+        """
+        self.session_store = session_store
+        self.token_budget = token_budget
+        self.summary_budget = summary_budget
+        self.max_comments = max_comments
+        self.argument_chars = argument_chars
+
+        self.lock = threading.Lock()
+        self.stats = {
+            'updates': 0,
+            'builds': 0,
+            'rounds_omitted': 0,
+            'trimmed': 0,
+            'max_context_tokens': 0
+        }
+        print(f" Rolling Context Builder initialized (token_budget={token_budget})")
+
+    def update(self, session_id: str, round_num: int, responses: Dict) -> None:
+        """
+        Add a stored round to the session's rolling summary
+
+        Args:
+            session_id (str): Unique session identifier
+            round_num (int): Round that was just stored
+            responses (dict): The round's agent responses
+        """
+        summary = self.session_store.get_summary(session_id) or {'round': 0, 'entries': [], 'omitted': 0}
+        if round_num <= summary['round']:
+            return
+
+        entries = summary['entries'] + [{'round': round_num, 'text': summarize_round(round_num, responses)}]
+        omitted = summary['omitted']
+        while len(entries) > 1 and sum(estimate_tokens(entry['text']) for entry in entries) > self.summary_budget:
+            entries.pop(0)
+            omitted += 1
+
+        self.session_store.set_summary(session_id, {'round': round_num, 'entries': entries, 'omitted': omitted})
+
+        with self.lock:
+            self.stats['updates'] += 1
+            self.stats['rounds_omitted'] += omitted - summary['omitted']
+
+    def build(self, session_id: str, round_num: int, history: List[Dict]) -> str:
+        """
+        Build the context block for a continuation round
+
+        The last exchange is always included; summary lines of earlier rounds
+        and user comments are dropped oldest first until the block fits the
+        token budget.
+
+        Args:
+            session_id (str): Unique session identifier
+            round_num (int): Round being generated
+            history (list): Session history the round is based on
+
+        Returns:
+            str: Context block for the debate prompt
+        """
+        last_pro_arg, last_con_arg = None, None
+        for msg in reversed(history):
+            if msg.get('role') == 'con' and last_con_arg is None:
+                last_con_arg = msg.get('content', '')
+            if msg.get('role') == 'pro' and last_pro_arg is None:
+                last_pro_arg = msg.get('content', '')
+            if last_pro_arg is not None and last_con_arg is not None:
+                break
+
+        # The first user message is the debate question, later ones are comments
+        comments = [msg['content'] for msg in history[1:] if msg.get('role') == 'user']
+        comments = [_clip(comment, 300) for comment in comments[-self.max_comments:]] if self.max_comments else []
+
+        # The previous round is shown in full below, so summarize only the ones before it
+        summary = self.session_store.get_summary(session_id) or {'entries': [], 'omitted': 0}
+        summary_lines = [entry['text'] for entry in summary['entries'] if entry['round'] < round_num - 1]
+        omitted = summary['omitted']
+
+        exchange = f"""PREVIOUS EXCHANGE:
+
+PRO previously argued:
+{_clip(last_pro_arg, self.argument_chars) if last_pro_arg else 'N/A'}
+
+CON previously argued:
+{_clip(last_con_arg, self.argument_chars) if last_con_arg else 'N/A'}
+"""
+
+        trimmed = False
+        while True:
+            context = self._render(summary_lines, omitted, comments, exchange)
+            tokens = estimate_tokens(context)
+            if tokens <= self.token_budget or not (summary_lines or comments):
+                break
+            trimmed = True
+            if summary_lines:
+                summary_lines.pop(0)
+                omitted += 1
+            else:
+                comments.pop(0)
+
+        with self.lock:
+            self.stats['builds'] += 1
+            self.stats['trimmed'] += trimmed
+            self.stats['max_context_tokens'] = max(self.stats['max_context_tokens'], tokens)
+
+        return context
+
+    def _render(self, summary_lines: List[str], omitted: int, comments: List[str], exchange: str) -> str:
+        sections = []
+        if summary_lines or omitted:
+            lines = list(summary_lines)
+            if omitted:
+                lines.insert(0, f"({omitted} earlier round{'s' if omitted != 1 else ''} omitted)")
+            sections.append("EARLIER ROUNDS (summary):\n" + '\n'.join(lines))
+        if comments:
+            sections.append("AUDIENCE COMMENTS (respond where relevant):\n" + '\n'.join(f"- {c}" for c in comments))
+        sections.append(exchange)
+        return '\n' + '\n\n'.join(sections)
+
+    def get_stats(self) -> Dict:
+        """
+        Get context builder statistics
+
+        Returns:
+            dict: Counters, largest context built and the configured budgets
+        """
+        with self.lock:
+            stats = dict(self.stats)
+        stats['token_budget'] = self.token_budget
+        stats['summary_budget'] = self.summary_budget
+        return stats
+
+    def __str__(self):
+        return f"RollingContextBuilder(token_budget={self.token_budget})"
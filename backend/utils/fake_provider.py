@@ -0,0 +1,294 @@
+"""
+Fake Provider - Offline, deterministic stand-in for the Gemini API
+Produces correctly formatted debate responses (markers, multi-round, JSON or
+single agent) with configurable latency, token throughput and injected
+429 "retry in Xs" errors, so the backend runs and can be load tested
+without an API key
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterator, List, Optional
+
+
+LATENCY_DISTRIBUTIONS = ('fixed', 'uniform', 'lognormal')
+
+_QUESTION_RE = re.compile(r'"([^"\n]{3,300})"')
+_ROUND_RANGE_RE = re.compile(r'Rounds (\d+) to (\d+)')
+
+_OPENERS = {
+    'pro': ['The evidence favors a yes on', 'There is a strong case for yes on', 'We should answer yes on',
+            'History supports a yes on', 'Consider the upside of a yes on'],
+    'con': ['The evidence favors a no on', 'There is a strong case for no on', 'We should answer no on',
+            'History supports a no on', 'Consider the hidden costs of a yes on'],
+    'moderator': ['Both sides agree on the stakes of', 'The key clash this round concerns',
+                  'The debate has sharpened around', 'The strongest points so far involve',
+                  'Reasonable people can disagree about']
+}
+_CLAIMS = [
+    'because it changes incentives for everyone involved',
+    'since the long-term effects compound over time',
+    'as the costs fall unevenly on different groups',
+    'given what pilot programs have already shown',
+    'because enforcement is harder than it looks',
+    'since public trust depends on getting this right',
+    'as smaller communities feel the impact first',
+    'given the trade-off between freedom and safety'
+]
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeTokenCount:
+    def __init__(self, total_tokens: int):
+        self.total_tokens = total_tokens
+
+
+class FakeModel:
+    def __init__(self, model_name: str, provider: 'FakeProvider', api_key: Optional[str] = None):
+        """
+        Fake model with the generation methods of genai.GenerativeModel
+
+        Args:
+            model_name (str): Reported model name
+            provider (FakeProvider): Shared latency / error settings and server-side quota
+            api_key (str): Key the calls are made with (each key has its own fake quota)
+        """
+        self.model_name = model_name
+        self.provider = provider
+        self.api_key = api_key
+
+    async def generate_content_async(self, prompt: str, generation_config=None, **kwargs) -> FakeResponse:
+        self.provider.check_rate_limit(self.api_key)
+        text = self.provider.respond(prompt)
+        await asyncio.sleep(self.provider.latency(text))
+        return FakeResponse(text)
+
+    def generate_content(self, prompt: str, generation_config=None, stream: bool = False, **kwargs):
+        self.provider.check_rate_limit(self.api_key)
+        text = self.provider.respond(prompt)
+        if stream:
+            return self._stream(text)
+        time.sleep(self.provider.latency(text))
+        return FakeResponse(text)
+
+    def _stream(self, text: str) -> Iterator[FakeResponse]:
+        time.sleep(self.provider.time_to_first_token())
+        chunk_chars = 4 * self.provider.chunk_tokens
+        for start in range(0, len(text), chunk_chars):
+            chunk = text[start:start + chunk_chars]
+            time.sleep(self.provider.generation_seconds(chunk))
+            yield FakeResponse(chunk)
+
+    def count_tokens(self, text: str) -> FakeTokenCount:
+        return FakeTokenCount(len(text) // 4 + 1)
+
+
+class FakeProvider:
+    """LLM provider interface (see gemini_client.GeminiProvider) serving FakeModel instances"""
+
+    name = 'fake'
+    requires_api_key = False
+
+    def __init__(
+        self,
+        latency: str = 'lognormal',
+        ttft_ms: float = 400,
+        ttft_sigma: float = 0.5,
+        tokens_per_second: float = 200,
+        rate_limit_probability: float = 0.0,
+        retry_seconds: float = 2.0,
+        requests_per_minute: Optional[float] = None,
+        chunk_tokens: int = 8,
+        seed: int = 0
+    ):
+        """
+        Initialize the fake provider
+
+        Args:
+            latency (str): Time-to-first-token distribution: 'fixed', 'uniform'
+                           (0.5x-1.5x) or 'lognormal' (median ttft_ms)
+            ttft_ms (float): Typical time to first token in milliseconds
+            ttft_sigma (float): Shape of the lognormal distribution (tail heaviness)
+            tokens_per_second (float): Output throughput after the first token
+            rate_limit_probability (float): Chance that a request fails with a 429
+            retry_seconds (float): "retry in Xs" hint carried by injected 429s
+            requests_per_minute (float): Server-side quota per API key; requests beyond it
+                                         get a 429 with the time until a slot frees (None disables)
+            chunk_tokens (int): Tokens per streamed chunk
+            seed (int): Seed for response text and latency samples
+        """
+        if latency not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"latency must be one of {', '.join(LATENCY_DISTRIBUTIONS)}")
+
+        self.latency_distribution = latency
+        self.ttft_ms = ttft_ms
+        self.ttft_sigma = ttft_sigma
+        self.tokens_per_second = tokens_per_second
+        self.rate_limit_probability = rate_limit_probability
+        self.retry_seconds = retry_seconds
+        self.requests_per_minute = requests_per_minute
+        self.chunk_tokens = chunk_tokens
+        self.seed = seed
+
+        self.rng = random.Random(seed)
+        # api key -> times of the requests in the last minute
+        self.request_times: Dict[Optional[str], deque] = {}
+        self.lock = threading.Lock()
+        self.stats = {
+            'requests': 0,
+            'injected_429s': 0,
+            'quota_429s': 0
+        }
+        print(f" Fake LLM provider initialized ({latency} ttft={ttft_ms}ms, {tokens_per_second} tok/s)")
+
+    @classmethod
+    def from_env(cls) -> 'FakeProvider':
+        """Create a provider configured from FAKE_LLM_* environment variables"""
+        rpm = float(os.getenv('FAKE_LLM_RPM', '0'))
+        return cls(
+            latency=os.getenv('FAKE_LLM_LATENCY', 'lognormal').lower(),
+            ttft_ms=float(os.getenv('FAKE_LLM_TTFT_MS', '400')),
+            ttft_sigma=float(os.getenv('FAKE_LLM_TTFT_SIGMA', '0.5')),
+            tokens_per_second=float(os.getenv('FAKE_LLM_TOKENS_PER_SECOND', '200')),
+            rate_limit_probability=float(os.getenv('FAKE_LLM_429_RATE', '0')),
+            retry_seconds=float(os.getenv('FAKE_LLM_RETRY_SECONDS', '2')),
+            requests_per_minute=rpm or None,
+            seed=int(os.getenv('FAKE_LLM_SEED', '0'))
+        )
+
+    def configure(self, api_key: Optional[str]) -> None:
+        """Nothing to authenticate"""
+
+    def create_model(self, model_name: str, api_key: Optional[str] = None) -> FakeModel:
+        return FakeModel(model_name, self, api_key)
+
+    def check_rate_limit(self, api_key: Optional[str] = None) -> None:
+        """
+        Count a request and raise a 429 if it is injected or over the fake quota of its key
+
+        Args:
+            api_key (str): Key the request is made with
+
+        Raises:
+            Exception: Gemini-style 429 message with a "retry in Xs" hint
+        """
+        with self.lock:
+            self.stats['requests'] += 1
+
+            if self.rate_limit_probability and self.rng.random() < self.rate_limit_probability:
+                self.stats['injected_429s'] += 1
+                raise Exception(
+                    f"429 Resource has been exhausted (e.g. check quota). Please retry in {self.retry_seconds:.1f}s"
+                )
+
+            if self.requests_per_minute:
+                now = time.monotonic()
+                request_times = self.request_times.setdefault(api_key, deque())
+                while request_times and now - request_times[0] >= 60:
+                    request_times.popleft()
+                if len(request_times) >= self.requests_per_minute:
+                    self.stats['quota_429s'] += 1
+                    retry = 60 - (now - request_times[0])
+                    raise Exception(
+                        f"429 Quota exceeded for requests per minute. Please retry in {retry:.1f}s"
+                    )
+                request_times.append(now)
+
+    def time_to_first_token(self) -> float:
+        """Sample a time to first token in seconds"""
+        with self.lock:
+            if self.latency_distribution == 'fixed':
+                ms = self.ttft_ms
+            elif self.latency_distribution == 'uniform':
+                ms = self.ttft_ms * self.rng.uniform(0.5, 1.5)
+            else:
+                ms = self.rng.lognormvariate(0, self.ttft_sigma) * self.ttft_ms
+        return ms / 1000
+
+    def generation_seconds(self, text: str) -> float:
+        """Time to generate text at the configured throughput"""
+        return (len(text) / 4) / self.tokens_per_second
+
+    def latency(self, text: str) -> float:
+        """Total latency of a non-streamed response"""
+        return self.time_to_first_token() + self.generation_seconds(text)
+
+    def respond(self, prompt: str) -> str:
+        """
+        Deterministic response in the format the prompt asks for
+
+        The same prompt (and seed) always gives the same text.
+        """
+        rng = random.Random(hashlib.sha256(f"{self.seed}:{prompt}".encode('utf-8')).digest())
+        match = _QUESTION_RE.search(prompt)
+        topic = match.group(1) if match else 'the proposition'
+
+        if 'You are the PRO side' in prompt:
+            return self._argument(rng, 'pro', topic)
+        if 'You are the CON side' in prompt:
+            return self._argument(rng, 'con', topic)
+        if 'neutral moderator' in prompt:
+            return self._argument(rng, 'moderator', topic)
+
+        if 'OUTPUT FORMAT OVERRIDE' in prompt:
+            return json.dumps(self._json_round(rng, topic))
+
+        round_range = _ROUND_RANGE_RE.search(prompt)
+        if round_range:
+            first, last = int(round_range.group(1)), int(round_range.group(2))
+            return '\n\n'.join(
+                f"[ROUND {round_num}]\n{self._marker_round(rng, topic)}"
+                for round_num in range(first, last + 1)
+            )
+
+        return self._marker_round(rng, topic)
+
+    def _sentences(self, rng: random.Random, agent: str, topic: str, count: int) -> List[str]:
+        return [
+            f"{rng.choice(_OPENERS[agent])} '{topic}', {rng.choice(_CLAIMS)}."
+            for _ in range(count)
+        ]
+
+    def _argument(self, rng: random.Random, agent: str, topic: str) -> str:
+        paragraphs = [' '.join(self._sentences(rng, agent, topic, rng.randint(3, 4))) for _ in range(2)]
+        return '\n\n'.join(paragraphs)
+
+    def _marker_round(self, rng: random.Random, topic: str) -> str:
+        return (
+            f"[PRO_AGENT]\n{self._argument(rng, 'pro', topic)}\n\n"
+            f"[CON_AGENT]\n{self._argument(rng, 'con', topic)}\n\n"
+            f"[MODERATOR]\n{self._argument(rng, 'moderator', topic)}"
+        )
+
+    def _json_round(self, rng: random.Random, topic: str) -> Dict:
+        response = {}
+        for agent in ('pro', 'con', 'moderator'):
+            response[agent] = self._argument(rng, agent, topic)
+            response[f'{agent}_key_points'] = [claim.capitalize() for claim in rng.sample(_CLAIMS, 2)]
+        return response
+
+    def get_stats(self) -> Dict:
+        """
+        Get fake server statistics
+
+        Returns:
+            dict: Provider name, requests served and 429s injected or caused by the fake quota
+        """
+        with self.lock:
+            stats = dict(self.stats)
+        stats['name'] = self.name
+        return stats
+
+    def __str__(self):
+        return f"FakeProvider(latency={self.latency_distribution}, ttft={self.ttft_ms}ms)"
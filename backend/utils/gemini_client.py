@@ -3,26 +3,263 @@ Gemini Client - Wrapper for Google Gemini API calls
 Handles authentication and request formatting
 """
 
+import asyncio
+import dataclasses
 import os
+import random
+import threading
+import time
+from collections import OrderedDict
 import google.generativeai as genai
-from typing import Optional
+from google.ai import generativelanguage as glm
+from typing import Callable, Dict, Iterator, Optional
 
+from utils.fake_provider import FakeProvider
+from utils.hedging import RequestHedger
+from utils.key_pool import ApiKeyPool, PooledModel, load_api_keys
+from utils.metrics import get_metrics
+from utils.model_router import ModelRouter
+from utils.profiler import attach_thread
+from utils.rate_limiter import TokenBucketRateLimiter, get_rate_limiter, is_rate_limit_error, parse_retry_hint
+from utils.response_cache import ResponseCache
+from utils.token_estimator import TokenEstimator, get_token_estimator
+
+
+# JSON output options only exist in newer SDK releases; older ones rely on the prompt alone
+_GENERATION_CONFIG_FIELDS = {field.name for field in dataclasses.fields(genai.GenerationConfig)}
+JSON_MIME_TYPE_SUPPORTED = 'response_mime_type' in _GENERATION_CONFIG_FIELDS
+JSON_SCHEMA_SUPPORTED = 'response_schema' in _GENERATION_CONFIG_FIELDS
+
+# Backoff for rate limit errors that carry no retry hint
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 60
+
+request_seconds = get_metrics().histogram(
+    'gemini_request_duration_seconds',
+    'Latency of LLM API calls (whole stream for streamed calls), by model and outcome',
+    ('model', 'outcome')
+)
+retries_total = get_metrics().counter(
+    'gemini_retries_total', 'LLM calls retried after a rate limit error, by model', ('model',)
+)
+backoff_seconds_total = get_metrics().counter(
+    'gemini_backoff_seconds_total', 'Time slept backing off from rate limit errors without a retry hint'
+)
+tokens_total = get_metrics().counter(
+    'gemini_tokens_total',
+    'Prompt and output tokens, from response usage metadata or estimated when the response has none',
+    ('model', 'kind', 'source')
+)
+
+RATE_LIMIT_EXHAUSTED_MESSAGE = (
+    "Rate limit exceeded. Please wait a minute and try again. "
+    "Set GEMINI_RPM to your quota, or add API keys to GEMINI_API_KEYS for more throughput."
+)
+
+
+def backoff_seconds(attempt: int) -> float:
+    """Exponential backoff with jitter, so callers that failed together don't retry together"""
+    return min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+def estimate_tokens(text: str) -> int:
+    """Offline token estimate used to reserve quota and budget prompts (see TokenEstimator)"""
+    return get_token_estimator().estimate(text)
+
+
+def record_usage_metadata(prompt: str, response) -> None:
+    """Calibrate the token estimator with the prompt token count reported in a response, if any"""
+    # Usage metadata is only returned by newer SDK releases
+    usage = getattr(response, 'usage_metadata', None)
+    prompt_tokens = getattr(usage, 'prompt_token_count', 0) if usage is not None else 0
+    if prompt_tokens:
+        get_token_estimator().calibrate(prompt, prompt_tokens)
+
+
+def record_token_usage(model_name: str, prompt: str, text: str, response=None) -> None:
+    """Count the prompt and output tokens of a completed call in gemini_tokens_total"""
+    usage = getattr(response, 'usage_metadata', None)
+    for kind, field, content in (('prompt', 'prompt_token_count', prompt),
+                                 ('output', 'candidates_token_count', text)):
+        reported = getattr(usage, field, 0) if usage is not None else 0
+        if reported:
+            tokens_total.inc(model_name, kind, 'usage_metadata', amount=reported)
+        else:
+            tokens_total.inc(model_name, kind, 'estimate', amount=estimate_tokens(content))
+
+
+_configured_api_key: Optional[str] = None
+_configure_lock = threading.Lock()
+
+
+def configure_api(api_key: str) -> None:
+    """Configure the Gemini SDK once per process (again only if the key changes)"""
+    global _configured_api_key
+    with _configure_lock:
+        if _configured_api_key != api_key:
+            genai.configure(api_key=api_key)
+            _configured_api_key = api_key
+
+
+class _KeyedGenerativeModel(genai.GenerativeModel):
+    """GenerativeModel calling with its own API key instead of the process-wide one"""
+
+    def __init__(self, model_name: str, api_key: str):
+        super().__init__(model_name)
+        self._api_key = api_key
+        # The SDK otherwise fills these lazily with clients for the configured key
+        self._client = glm.GenerativeServiceClient(client_options={'api_key': api_key})
+
+    async def generate_content_async(self, *args, **kwargs):
+        if self._async_client is None:
+            # Created on first use, so it binds to the event loop making the calls
+            self._async_client = glm.GenerativeServiceAsyncClient(client_options={'api_key': self._api_key})
+        return await super().generate_content_async(*args, **kwargs)
+
+
+class GeminiProvider:
+    """
+    LLM provider backed by the Gemini API
+
+    Providers are the pluggable backend of AsyncGeminiClient. A provider has a
+    `requires_api_key` flag, `configure(api_key)`, `create_model(model_name, api_key=None)` and
+    `get_stats()`; the models it creates implement generate_content_async(),
+    generate_content() (optionally streamed) and count_tokens() like
+    genai.GenerativeModel.
+    """
+
+    name = 'gemini'
+    requires_api_key = True
+
+    def configure(self, api_key: Optional[str]) -> None:
+        configure_api(api_key)
+
+    def create_model(self, model_name: str, api_key: Optional[str] = None):
+        # Without a key, the model uses the key passed to configure()
+        if api_key is None:
+            return genai.GenerativeModel(model_name)
+        return _KeyedGenerativeModel(model_name, api_key)
+
+    def get_stats(self) -> Dict:
+        return {'name': self.name}
+
+    def __str__(self):
+        return "GeminiProvider()"
+
+
+# Provider name (LLM_PROVIDER) -> factory
+PROVIDERS: Dict[str, Callable] = {
+    'gemini': GeminiProvider,
+    'fake': FakeProvider.from_env
+}
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def register_provider(name: str, factory: Callable) -> None:
+    """
+    Make a provider selectable with LLM_PROVIDER=<name>
+
+    Args:
+        name (str): Provider name
+        factory (callable): Returns a new provider instance
+    """
+    PROVIDERS[name] = factory
+
+
+def get_provider():
+    """
+    Get the process-wide LLM provider selected by LLM_PROVIDER (default 'gemini')
+
+    Returns:
+        Shared provider instance
+
+    Raises:
+        ValueError: If LLM_PROVIDER names an unknown provider
+    """
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            name = os.getenv('LLM_PROVIDER', 'gemini').lower()
+            if name not in PROVIDERS:
+                raise ValueError(f"Unknown LLM_PROVIDER '{name}' (available: {', '.join(PROVIDERS)})")
+            _provider = PROVIDERS[name]()
+        return _provider
+
+
+class _EventLoopThread:
+    """Event loop running in a daemon thread, used by the sync GeminiClient facade"""
 
-class GeminiClient:
     def __init__(self):
-        """Initialize Gemini client with API key from environment"""
-        self.api_key = os.getenv('GEMINI_API_KEY')
-        
-        if not self.api_key:
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name='gemini-event-loop', daemon=True)
+        self.thread.start()
+
+    def run(self, coro):
+        """Run a coroutine on the loop and block until it finishes"""
+        return asyncio.run_coroutine_threadsafe(self._attached(coro), self.loop).result()
+
+    @staticmethod
+    async def _attached(coro):
+        # The task runs in a copy of the caller's context, so this finds the caller's profile;
+        # the loop is shared, so its samples can include other requests' calls made meanwhile
+        with attach_thread():
+            return await coro
+
+
+_event_loop_thread: Optional[_EventLoopThread] = None
+_event_loop_lock = threading.Lock()
+
+
+def _get_event_loop_thread() -> _EventLoopThread:
+    global _event_loop_thread
+    with _event_loop_lock:
+        if _event_loop_thread is None:
+            _event_loop_thread = _EventLoopThread()
+        return _event_loop_thread
+
+
+class AsyncGeminiClient:
+    def __init__(
+        self,
+        cache: Optional[ResponseCache] = None,
+        rate_limiter: Optional[TokenBucketRateLimiter] = None,
+        model_name: Optional[str] = None,
+        provider=None
+    ):
+        """
+        Initialize Gemini client with API key from environment
+
+        Args:
+            cache (ResponseCache): Optional response cache; when omitted, one is
+                                   created if GEMINI_CACHE_ENABLED=true
+            rate_limiter (TokenBucketRateLimiter): Limiter to coordinate with; defaults
+                                                   to the process-wide limiter
+            model_name (str): Model to use; when omitted, requests are routed across
+                              GEMINI_MODELS (or the default model options)
+            provider: LLM provider creating the model (see GeminiProvider); defaults
+                      to the process-wide provider selected by LLM_PROVIDER
+        """
+        api_keys = load_api_keys()
+        self.api_key = api_keys[0] if api_keys else None
+        self.cache = cache if cache is not None else ResponseCache.from_env()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else get_rate_limiter()
+        self.provider = provider if provider is not None else get_provider()
+
+        if not self.api_key and self.provider.requires_api_key:
             raise ValueError(
                 "GEMINI_API_KEY not found in environment variables. "
-                "Please add it to your .env file"
+                "Please add it (or GEMINI_API_KEYS) to your .env file (or set LLM_PROVIDER=fake to run offline)"
             )
-        
-        # Configure the Gemini API
-        genai.configure(api_key=self.api_key)
-        
-        # Try different model names to find one that works
+
+        # Configure the provider (the Gemini API key)
+        self.provider.configure(self.api_key)
+
+        # With several keys, every call picks the key with the most quota left
+        self.key_pool = ApiKeyPool.from_env()
+
+        # Models requests are routed across, in order of preference
         # Updated for Gemini 2.x/3.x models (as of 2025)
         model_options = [
             'models/gemini-2.5-flash',      # Fast and stable (recommended)
@@ -31,45 +268,85 @@ class GeminiClient:
             'models/gemini-pro-latest',     # Latest pro model
             'models/gemini-2.5-pro',        # More powerful if needed
         ]
-        
-        self.model = None
-        self.model_name = None
-        
-        # Try to initialize a model without testing (to avoid rate limits on startup)
+        if model_name:
+            model_options = [model_name]
+        elif os.getenv('GEMINI_MODELS'):
+            model_options = [name.strip() for name in os.getenv('GEMINI_MODELS').split(',') if name.strip()]
+
+        models = OrderedDict()
+
+        # Create the models without testing them (to avoid rate limits on startup)
         for model_name in model_options:
             try:
-                self.model = genai.GenerativeModel(model_name)
-                self.model_name = model_name
-                print(f"Gemini Client initialized with model: {self.model_name}")
-                break
+                models[model_name] = self.create_model(model_name)
             except Exception as e:
                 print(f"Trying {model_name}... failed: {str(e)[:80]}")
                 continue
-        
-        if not self.model:
+
+        if not models:
             # Fallback to most common model
             try:
-                self.model_name = 'models/gemini-2.5-flash'
-                self.model = genai.GenerativeModel(self.model_name)
-                print(f"Gemini Client initialized with model: {self.model_name} (fallback)")
+                models['models/gemini-2.5-flash'] = self.create_model('models/gemini-2.5-flash')
+                print("Gemini Client falling back to models/gemini-2.5-flash")
             except Exception as e:
                 raise ValueError(
                     "Could not initialize Gemini model. "
                     "Please check your API key and internet connection."
                 )
-    
-    def generate(
-        self, 
-        prompt: str, 
+
+        # The first model names the client (and its cache keys); requests go to
+        # the fastest healthy model (see ModelRouter)
+        self.model_name = next(iter(models))
+        self.router = ModelRouter(
+            models,
+            failure_threshold=int(os.getenv('MODEL_FAILURE_THRESHOLD', '3')),
+            cooldown_seconds=float(os.getenv('MODEL_COOLDOWN_SECONDS', '30')),
+            max_cooldown_seconds=float(os.getenv('MODEL_MAX_COOLDOWN_SECONDS', '300')),
+            explore_rate=float(os.getenv('MODEL_EXPLORE_RATE', '0.02'))
+        )
+        # Optional duplicate calls for slow requests (HEDGE_ENABLED)
+        self.hedger = RequestHedger.from_env() if len(models) > 1 else None
+        print(f"Gemini Client initialized with model: {self.model_name}"
+              + (f" (+{len(models) - 1} failover models)" if len(models) > 1 else ""))
+
+    def create_model(self, model_name: str):
+        """Model object for a model name, sending calls through the key pool if there is one"""
+        if self.key_pool is None:
+            return self.provider.create_model(model_name)
+        return PooledModel(model_name, self.key_pool, {
+            key.label: self.provider.create_model(model_name, api_key=key.api_key) for key in self.key_pool.keys
+        })
+
+    @property
+    def model(self):
+        """Model new requests are routed to"""
+        return self.router.model(self.router.preferred)
+
+    @model.setter
+    def model(self, model):
+        # Replacing the model (e.g. with a stand-in in benchmarks) disables routing
+        self.router.pin(self.model_name, model)
+
+    async def generate(
+        self,
+        prompt: str,
         max_tokens: int = 1500,
         temperature: float = 0.7,
         top_p: float = 0.95,
         top_k: int = 40,
-        max_retries: int = 3
+        max_retries: int = 3,
+        bypass_cache: bool = False,
+        json_schema: Optional[Dict] = None
     ) -> str:
         """
-        Generate a response using Gemini API with retry logic
-        
+        Generate a response using Gemini API, waiting on the shared rate limiter
+
+        Each attempt goes to the fastest healthy model; a failed attempt fails
+        over to another model (see handle_error). When no other model is
+        available, a 429 with a "retry in Xs" hint pauses the whole limiter, so
+        every caller waits instead of re-triggering the limit; without a hint the
+        request backs off with jitter.
+
         Args:
             prompt (str): The input prompt for generation
             max_tokens (int): Maximum number of tokens to generate
@@ -77,66 +354,474 @@ class GeminiClient:
             top_p (float): Nucleus sampling parameter
             top_k (int): Top-k sampling parameter
             max_retries (int): Maximum number of retry attempts
-        
+            bypass_cache (bool): Skip the cache lookup (the fresh result is still cached)
+            json_schema (dict): Request JSON output matching this schema (where the SDK supports it)
+
         Returns:
             str: Generated text response
         """
-        import time
-        import re
-        
+        cache_key = self._cache_lookup_key(prompt, max_tokens, temperature, top_p, top_k, bypass_cache)
+        if cache_key and not bypass_cache:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                print(f" Cache hit ({len(cached)} chars)")
+                return cached
+
+        failed = set()
+        # Reported as is if max_retries allows no attempt
+        rate_limited = False
+        error_str = f"no attempt made (max_retries={max_retries})"
         for attempt in range(max_retries):
+            wait_time = self.cooldown_wait()
+            if wait_time:
+                await asyncio.sleep(wait_time)
+            await self.rate_limiter.acquire_async(estimate_tokens(prompt))
+            model_name, model = self.router.choose(exclude=failed, force=True)
+            if attempt:
+                retries_total.inc(model_name)
+
+            start = time.perf_counter()
             try:
-                # Configure generation parameters
-                generation_config = genai.GenerationConfig(
-                    max_output_tokens=max_tokens,
-                    temperature=temperature,
-                    top_p=top_p,
-                    top_k=top_k,
-                )
-                
-                # Generate response
-                response = self.model.generate_content(
+                model_name, response, latency = await self.call_model(
+                    model_name,
+                    model,
                     prompt,
-                    generation_config=generation_config
+                    self.generation_config(max_tokens, temperature, top_p, top_k, json_schema),
+                    attempt,
+                    failed
                 )
-                
+
+                record_usage_metadata(prompt, response)
+                self.router.record_success(model_name, latency)
+
                 # Extract text from response
                 if response and response.text:
-                    return response.text.strip()
+                    text = response.text.strip()
+                    request_seconds.observe(latency, model_name, 'ok')
+                    record_token_usage(model_name, prompt, text, response)
+                    self.rate_limiter.record_usage(estimate_tokens(text))
+                    if cache_key:
+                        self.cache.set(cache_key, text)
+                    return text
                 else:
+                    request_seconds.observe(latency, model_name, 'empty')
                     return "Error: No response generated"
-            
+
             except Exception as e:
                 error_str = str(e)
-                
-                # Check if it's a rate limit error (429)
-                if "429" in error_str or "quota" in error_str.lower():
-                    # Extract retry delay from error message
-                    retry_match = re.search(r'retry in (\d+\.?\d*)', error_str)
-                    if retry_match:
-                        retry_seconds = float(retry_match.group(1))
-                        print(f"Rate limit hit. Waiting {retry_seconds:.1f}s before retry {attempt + 1}/{max_retries}...")
-                        time.sleep(retry_seconds + 1)  # Add 1 second buffer
-                        continue
-                    else:
-                        # Default wait time for rate limits
-                        wait_time = 20 * (attempt + 1)  # Exponential backoff
-                        print(f"Rate limit hit. Waiting {wait_time}s before retry {attempt + 1}/{max_retries}...")
-                        time.sleep(wait_time)
-                        continue
-                else:
-                    # Not a rate limit error, raise immediately
-                    error_msg = f"Gemini API Error: {error_str}"
-                    print(f"{error_msg}")
-                    raise Exception(error_msg)
-        
+                rate_limited = is_rate_limit_error(error_str)
+                wait_time = self.handle_error(model_name, error_str, time.perf_counter() - start,
+                                              attempt, max_retries, failed)
+                if wait_time:
+                    backoff_seconds_total.inc(amount=wait_time)
+                    await asyncio.sleep(wait_time)
+
         # If we exhausted all retries
-        raise Exception(
-            "Rate limit exceeded. Please wait a minute and try again. "
-            "Free tier limit: 5 requests per minute. "
-            "Consider upgrading your API plan for higher limits."
+        raise Exception(RATE_LIMIT_EXHAUSTED_MESSAGE if rate_limited else f"Gemini API Error: {error_str}")
+
+    def cooldown_wait(self) -> float:
+        """Seconds to wait before a request because every model is cooling down (usually 0)"""
+        wait_time = self.router.seconds_until_available()
+        if wait_time:
+            print(f"All models cooling down. Waiting {wait_time:.1f}s...")
+        return wait_time
+
+    def handle_error(
+        self,
+        model_name: str,
+        error_str: str,
+        latency: float,
+        attempt: int,
+        max_retries: int,
+        failed: set
+    ) -> float:
+        """
+        Record a failed call and decide how the request continues
+
+        The model's breaker counts the failure (a 429 opens it for the server's
+        retry hint, or a backoff without one). The next attempt then fails over
+        to another healthy model when there is one. With no other model, errors
+        are raised and rate limits are retried as before: a hint pauses the whole
+        limiter, otherwise the request backs off with jitter.
+
+        Args:
+            model_name (str): Model the call went to
+            error_str (str): Error message of the call
+            latency (float): Seconds until the call failed
+            attempt (int): Zero-based attempt number
+            max_retries (int): Maximum number of attempts
+            failed (set): Models that failed this request; model_name is added
+
+        Returns:
+            float: Seconds to back off before the next attempt (0 for none)
+
+        Raises:
+            Exception: If the error is not a rate limit and no other model is available
+        """
+        rate_limited, retry_seconds, wait_time = self.record_failure(model_name, error_str, latency, attempt, failed)
+
+        if not rate_limited:
+            if not self.router.has_alternative(failed):
+                error_msg = f"Gemini API Error: {error_str}"
+                print(f"{error_msg}")
+                raise Exception(error_msg)
+            print(f"Gemini API Error on {model_name}: {error_str[:80]}. Failing over (retry {attempt + 1}/{max_retries})...")
+            return 0
+
+        if self.router.has_alternative(failed):
+            print(f"Rate limit hit on {model_name}. Failing over (retry {attempt + 1}/{max_retries})...")
+            return 0
+        if retry_seconds is not None:
+            # Pause everyone; the next acquire waits out the pause
+            print(f"Rate limit hit. Pausing all requests for {wait_time:.1f}s (retry {attempt + 1}/{max_retries})...")
+            self.rate_limiter.pause(wait_time)
+            return 0
+        print(f"Rate limit hit. Waiting {wait_time:.1f}s before retry {attempt + 1}/{max_retries}...")
+        return wait_time
+
+    def record_failure(self, model_name: str, error_str: str, latency: float, attempt: int, failed: set):
+        """
+        Count a failed call in the metrics and the model's circuit breaker
+
+        Returns:
+            tuple: (rate limited, server retry hint or None, cooldown in seconds)
+        """
+        rate_limited = is_rate_limit_error(error_str)
+        request_seconds.observe(latency, model_name, 'rate_limited' if rate_limited else 'error')
+        failed.add(model_name)
+
+        if not rate_limited:
+            self.router.record_failure(model_name)
+            return False, None, 0
+
+        retry_seconds = parse_retry_hint(error_str)
+        wait_time = retry_seconds + 1 if retry_seconds is not None else backoff_seconds(attempt)  # 1 second buffer
+        self.router.record_failure(model_name, rate_limited=True, cooldown=wait_time)
+        return True, retry_seconds, wait_time
+
+    async def call_model(self, model_name: str, model, prompt: str, generation_config, attempt: int, failed: set):
+        """
+        Call a model, hedging with a second model if the call is slow
+
+        With hedging enabled, a call still running after the model's recent
+        latency percentile gets a duplicate sent to the fastest other healthy
+        model, if the hedge budget and the rate limiter allow it. The first
+        successful answer is returned and the other call is cancelled.
+
+        Returns:
+            tuple: (model that answered, response, seconds the answering call took)
+
+        Raises:
+            Exception: The primary call's error, if no call succeeded
+        """
+        start = time.perf_counter()
+        primary = asyncio.ensure_future(model.generate_content_async(prompt, generation_config=generation_config))
+        try:
+            delay = self.hedger.delay(self.router, model_name) if self.hedger is not None else None
+            if delay is not None:
+                done, _ = await asyncio.wait({primary}, timeout=delay)
+                if not done:
+                    hedge = self.start_hedge(model_name, prompt, generation_config, failed)
+                    if hedge is not None:
+                        return await self.race(model_name, primary, start, *hedge, attempt, failed)
+            response = await primary
+            return model_name, response, time.perf_counter() - start
+        finally:
+            if not primary.done():
+                primary.cancel()
+
+    def start_hedge(self, model_name: str, prompt: str, generation_config, failed: set):
+        """
+        Send a duplicate of a slow call to another model
+
+        Returns:
+            tuple: (model name, task, start time), or None if no hedge was sent
+        """
+        exclude = failed | {model_name}
+        if not self.router.has_alternative(exclude):
+            self.hedger.record_skipped()
+            return None
+        if not self.hedger.allow():
+            return None
+        # Hedges never wait for quota; they are only worth it right away
+        if not self.rate_limiter.try_acquire(estimate_tokens(prompt)):
+            self.hedger.record_skipped()
+            return None
+
+        hedge_name, hedge_model = self.router.choose(exclude=exclude, force=True)
+        self.hedger.record_hedge()
+        print(f" Hedging slow call to {model_name} with {hedge_name}")
+        task = asyncio.ensure_future(hedge_model.generate_content_async(prompt, generation_config=generation_config))
+        return hedge_name, task, time.perf_counter()
+
+    async def race(self, model_name: str, primary, start: float, hedge_name: str, hedge, hedge_start: float,
+                   attempt: int, failed: set):
+        """First successful answer of a primary call and its hedge; the other call is cancelled"""
+        calls = {primary: (model_name, start), hedge: (hedge_name, hedge_start)}
+        pending = set(calls)
+        primary_error, primary_latency = None, 0.0
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # Prefer the primary if both finished together
+                for task in sorted(done, key=lambda task: task is not primary):
+                    name, began = calls[task]
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedger.record_win()
+                            if primary_error is not None:
+                                # The caller only sees the hedge's answer
+                                self.record_failure(model_name, str(primary_error), primary_latency, attempt, failed)
+                        for other in pending:
+                            other.cancel()
+                            other_name, other_began = calls[other]
+                            elapsed = time.perf_counter() - other_began
+                            self.router.record_cancelled(other_name, elapsed)
+                            request_seconds.observe(elapsed, other_name, 'cancelled')
+                        return name, task.result(), time.perf_counter() - began
+                    if task is primary:
+                        primary_error = task.exception()
+                        primary_latency = time.perf_counter() - start
+                    else:
+                        self.record_failure(name, str(task.exception()), time.perf_counter() - began, attempt, failed)
+            raise primary_error
+        finally:
+            for task in calls:
+                if not task.done():
+                    task.cancel()
+
+    def generation_config(
+        self,
+        max_tokens: int,
+        temperature: float,
+        top_p: float,
+        top_k: int,
+        json_schema: Optional[Dict] = None
+    ):
+        """Build the generation parameters for a request"""
+        options = {}
+        if json_schema is not None:
+            if JSON_MIME_TYPE_SUPPORTED:
+                options['response_mime_type'] = 'application/json'
+            if JSON_SCHEMA_SUPPORTED:
+                options['response_schema'] = json_schema
+
+        return genai.GenerationConfig(
+            max_output_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            top_k=top_k,
+            **options
         )
-    
+
+    def _cache_lookup_key(self, prompt, max_tokens, temperature, top_p, top_k, bypass_cache) -> Optional[str]:
+        """Cache key for a request, or None when caching is disabled"""
+        if self.cache is None:
+            return None
+        if bypass_cache:
+            self.cache.record_bypass()
+        # Gemini keys stay unprefixed so existing on-disk entries remain valid
+        model_key = self.model_name if self.provider.name == 'gemini' else f"{self.provider.name}:{self.model_name}"
+        return ResponseCache.make_key(model_key, prompt, temperature, top_p, top_k, max_tokens)
+
+    def __str__(self):
+        return f"AsyncGeminiClient(model={self.model_name})"
+
+
+class GeminiClient:
+    def __init__(self, cache: Optional[ResponseCache] = None, model_name: Optional[str] = None, provider=None):
+        """
+        Initialize the synchronous client, a facade over AsyncGeminiClient
+
+        Requests run on a shared background event loop, so callers waiting on
+        the rate limiter are cheap coroutines rather than sleeping API calls.
+        Prefer get_gemini_client() to share one client per model.
+
+        Args:
+            cache (ResponseCache): Optional response cache; when omitted, one is
+                                   created if GEMINI_CACHE_ENABLED=true
+            model_name (str): Model to use; when omitted, the default model is picked
+            provider: LLM provider (see GeminiProvider); defaults to LLM_PROVIDER's
+        """
+        self.async_client = AsyncGeminiClient(cache=cache, model_name=model_name, provider=provider)
+
+    @property
+    def model(self):
+        return self.async_client.model
+
+    @model.setter
+    def model(self, model):
+        self.async_client.model = model
+
+    @property
+    def model_name(self) -> str:
+        return self.async_client.model_name
+
+    @property
+    def router(self) -> ModelRouter:
+        return self.async_client.router
+
+    @property
+    def hedger(self) -> Optional[RequestHedger]:
+        return self.async_client.hedger
+
+    @property
+    def key_pool(self) -> Optional[ApiKeyPool]:
+        return self.async_client.key_pool
+
+    @property
+    def cache(self) -> Optional[ResponseCache]:
+        return self.async_client.cache
+
+    @property
+    def provider(self):
+        return self.async_client.provider
+
+    @property
+    def rate_limiter(self) -> TokenBucketRateLimiter:
+        return self.async_client.rate_limiter
+
+    @property
+    def token_estimator(self) -> TokenEstimator:
+        return get_token_estimator()
+
+    def generate(
+        self,
+        prompt: str,
+        max_tokens: int = 1500,
+        temperature: float = 0.7,
+        top_p: float = 0.95,
+        top_k: int = 40,
+        max_retries: int = 3,
+        bypass_cache: bool = False,
+        json_schema: Optional[Dict] = None
+    ) -> str:
+        """
+        Generate a response using Gemini API with retry logic
+
+        Args:
+            prompt (str): The input prompt for generation
+            max_tokens (int): Maximum number of tokens to generate
+            temperature (float): Controls randomness (0.0-1.0)
+            top_p (float): Nucleus sampling parameter
+            top_k (int): Top-k sampling parameter
+            max_retries (int): Maximum number of retry attempts
+            bypass_cache (bool): Skip the cache lookup (the fresh result is still cached)
+            json_schema (dict): Request JSON output matching this schema (where the SDK supports it)
+
+        Returns:
+            str: Generated text response
+        """
+        return _get_event_loop_thread().run(self.async_client.generate(
+            prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            top_k=top_k,
+            max_retries=max_retries,
+            bypass_cache=bypass_cache,
+            json_schema=json_schema
+        ))
+
+    def generate_stream(
+        self,
+        prompt: str,
+        max_tokens: int = 1500,
+        temperature: float = 0.7,
+        top_p: float = 0.95,
+        top_k: int = 40,
+        max_retries: int = 3,
+        bypass_cache: bool = False
+    ) -> Iterator[str]:
+        """
+        Generate a response using Gemini streaming, yielding text chunks as they arrive
+
+        Retries and failover to another model only happen before the first
+        chunk is received; once text has been yielded, errors are raised to the caller.
+
+        Args:
+            prompt (str): The input prompt for generation
+            max_tokens (int): Maximum number of tokens to generate
+            temperature (float): Controls randomness (0.0-1.0)
+            top_p (float): Nucleus sampling parameter
+            top_k (int): Top-k sampling parameter
+            max_retries (int): Maximum number of retry attempts
+            bypass_cache (bool): Skip the cache lookup (the fresh result is still cached)
+
+        Yields:
+            str: Generated text chunks
+        """
+        # A cached response is yielded as a single chunk
+        cache_key = self.async_client._cache_lookup_key(prompt, max_tokens, temperature, top_p, top_k, bypass_cache)
+        if cache_key and not bypass_cache:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                print(f" Cache hit ({len(cached)} chars)")
+                yield cached
+                return
+
+        failed = set()
+        # Reported as is if max_retries allows no attempt
+        rate_limited = False
+        error_str = f"no attempt made (max_retries={max_retries})"
+        for attempt in range(max_retries):
+            received_any = False
+            chunks = []
+            wait_time = self.async_client.cooldown_wait()
+            if wait_time:
+                time.sleep(wait_time)
+            self.rate_limiter.acquire(estimate_tokens(prompt))
+            model_name, model = self.router.choose(exclude=failed, force=True)
+            if attempt:
+                retries_total.inc(model_name)
+
+            start = time.perf_counter()
+            try:
+                response = model.generate_content(
+                    prompt,
+                    generation_config=self.async_client.generation_config(max_tokens, temperature, top_p, top_k),
+                    stream=True
+                )
+
+                for chunk in response:
+                    # Chunks without text (e.g. safety-only) are skipped
+                    try:
+                        text = chunk.text
+                    except ValueError:
+                        continue
+                    if text:
+                        received_any = True
+                        chunks.append(text)
+                        yield text
+
+                full_text = ''.join(chunks).strip()
+                latency = time.perf_counter() - start
+                self.router.record_success(model_name, latency)
+                request_seconds.observe(latency, model_name, 'ok')
+                record_token_usage(model_name, prompt, full_text, response)
+                self.rate_limiter.record_usage(estimate_tokens(full_text))
+                if cache_key and chunks:
+                    self.cache.set(cache_key, full_text)
+                return
+
+            except Exception as e:
+                error_str = str(e)
+
+                if received_any:
+                    # Part of the answer was already yielded; no failover mid-stream
+                    request_seconds.observe(time.perf_counter() - start, model_name, 'error')
+                    self.router.record_failure(model_name)
+                    raise Exception(f"Gemini API Error: {error_str}")
+
+                rate_limited = is_rate_limit_error(error_str)
+                wait_time = self.async_client.handle_error(model_name, error_str, time.perf_counter() - start,
+                                                           attempt, max_retries, failed)
+                if wait_time:
+                    backoff_seconds_total.inc(amount=wait_time)
+                    time.sleep(wait_time)
+
+        raise Exception(RATE_LIMIT_EXHAUSTED_MESSAGE if rate_limited else f"Gemini API Error: {error_str}")
+
     def generate_with_safety(
         self,
         prompt: str,
@@ -145,12 +830,12 @@ class GeminiClient:
     ) -> dict:
         """
         Generate response with safety ratings included
-        
+
         Args:
             prompt (str): The input prompt
             max_tokens (int): Maximum tokens to generate
             temperature (float): Temperature setting
-        
+
         Returns:
             dict: Response with text and safety ratings
         """
@@ -159,18 +844,19 @@ class GeminiClient:
                 max_output_tokens=max_tokens,
                 temperature=temperature
             )
-            
+
+            self.rate_limiter.acquire(estimate_tokens(prompt))
             response = self.model.generate_content(
                 prompt,
                 generation_config=generation_config
             )
-            
+
             return {
                 'text': response.text.strip() if response.text else '',
                 'safety_ratings': response.safety_ratings if hasattr(response, 'safety_ratings') else [],
                 'finish_reason': response.candidates[0].finish_reason if response.candidates else None
             }
-        
+
         except Exception as e:
             return {
                 'text': '',
@@ -178,24 +864,76 @@ class GeminiClient:
                 'safety_ratings': [],
                 'finish_reason': None
             }
-    
-    def count_tokens(self, text: str) -> int:
+
+    def estimate_tokens(self, text: str) -> int:
+        """
+        Estimate the number of tokens in a text string offline (memoized, no API call)
+
+        Args:
+            text (str): Input text
+
+        Returns:
+            int: Estimated token count
+        """
+        return estimate_tokens(text)
+
+    def count_tokens(self, text: str, remote: bool = False) -> int:
         """
         Count the number of tokens in a text string
-        
+
         Args:
             text (str): Input text
-        
+            remote (bool): Ask the API for the exact count (one network round trip);
+                           the result also calibrates the offline estimator
+
         Returns:
-            int: Approximate token count
+            int: Token count (estimated unless remote is set and the call succeeds)
         """
+        if not remote:
+            return estimate_tokens(text)
+
         try:
             result = self.model.count_tokens(text)
+            get_token_estimator().calibrate(text, result.total_tokens)
             return result.total_tokens
         except Exception as e:
             print(f"Warning: Could not count tokens: {e}")
-            # Rough approximation: 1 token ≈ 4 characters
-            return len(text) // 4
-    
+            return estimate_tokens(text)
+
     def __str__(self):
-        return f"GeminiClient(model={self.model_name})"
\ No newline at end of file
+        return f"GeminiClient(model={self.model_name})"
+
+
+# Registry key of the default client, which routes across the configured models
+DEFAULT_CLIENT_KEY = 'default'
+
+_clients: Dict[str, GeminiClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_gemini_client(model_name: Optional[str] = None) -> GeminiClient:
+    """
+    Get the process-wide GeminiClient for a model, creating it on first use
+
+    All agents and routes share these clients (and with them the SDK
+    configuration, model objects, connections and response cache).
+
+    Args:
+        model_name (str): Model to pin the client to; None for the default
+                          client, which routes across the configured models
+
+    Returns:
+        GeminiClient: Shared client instance
+    """
+    # Kept apart from per-model clients, so an explicit model is never routed elsewhere
+    key = model_name or DEFAULT_CLIENT_KEY
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = GeminiClient(model_name=model_name)
+            _clients[key] = client
+        return client
@@ -0,0 +1,126 @@
+"""
+Request Hedger - Policy and accounting for hedged LLM calls
+A call that has not returned by a percentile of its model's recent latency
+gets a duplicate sent to another model; the first answer wins and the other
+call is cancelled. Hedges are paid for from a budget that grows by a fixed
+fraction of every request, so they stay a bounded share of quota use
+"""
+
+import os
+import threading
+from typing import Dict, Optional
+
+
+class RequestHedger:
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        budget: float = 0.05,
+        min_delay: float = 0.5,
+        min_samples: int = 20,
+        max_burst: float = 5
+    ):
+        """
+        Initialize the hedging policy with an empty budget
+
+        Args:
+            percentile (float): Latency percentile (0-1) of the primary model after
+                                which a hedge is sent
+            budget (float): Hedges allowed per request on average (0.05 = 5%)
+            min_delay (float): Lower bound of the hedge delay in seconds
+            min_samples (int): Latency samples the primary model needs before
+                               its calls are hedged
+            max_burst (float): Unused budget kept for bursts of slow calls
+        """
+        self.percentile = percentile
+        self.budget = budget
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.max_burst = max_burst
+
+        self.tokens = 0.0
+        self.lock = threading.Lock()
+        self.stats = {
+            'requests': 0,
+            'hedged': 0,
+            'hedge_wins': 0,
+            'budget_denied': 0,
+            'skipped': 0
+        }
+        print(f" Request Hedger initialized (p{percentile * 100:g}, budget={budget:.0%})")
+
+    @classmethod
+    def from_env(cls) -> Optional['RequestHedger']:
+        """Create a hedger from HEDGE_* environment variables, or None unless HEDGE_ENABLED=true"""
+        if os.getenv('HEDGE_ENABLED', 'false').lower() != 'true':
+            return None
+        return cls(
+            percentile=float(os.getenv('HEDGE_PERCENTILE', '0.95')),
+            budget=float(os.getenv('HEDGE_BUDGET', '0.05')),
+            min_delay=float(os.getenv('HEDGE_MIN_DELAY_MS', '500')) / 1000,
+            min_samples=int(os.getenv('HEDGE_MIN_SAMPLES', '20'))
+        )
+
+    def delay(self, router, model_name: str) -> Optional[float]:
+        """
+        Count a request and get how long to wait for it before hedging
+
+        Args:
+            router (ModelRouter): Router holding the models' recent latencies
+            model_name (str): Model the primary call goes to
+
+        Returns:
+            float: Seconds, or None if the call is not hedged (too few samples)
+        """
+        with self.lock:
+            self.stats['requests'] += 1
+            self.tokens = min(self.max_burst, self.tokens + self.budget)
+
+        latency = router.latency_percentile(model_name, self.percentile, self.min_samples)
+        if latency is None:
+            return None
+        return max(self.min_delay, latency)
+
+    def allow(self) -> bool:
+        """Whether the budget has room for a hedge (counted as denied if not)"""
+        with self.lock:
+            if self.tokens >= 1:
+                return True
+            self.stats['budget_denied'] += 1
+            return False
+
+    def record_hedge(self) -> None:
+        """Spend budget on a hedge that was sent"""
+        with self.lock:
+            self.tokens -= 1
+            self.stats['hedged'] += 1
+
+    def record_skipped(self) -> None:
+        """Count a hedge skipped because no other model or no quota was available"""
+        with self.lock:
+            self.stats['skipped'] += 1
+
+    def record_win(self) -> None:
+        """Count a hedge that answered before the primary call"""
+        with self.lock:
+            self.stats['hedge_wins'] += 1
+
+    def get_stats(self) -> Dict:
+        """
+        Get hedging statistics
+
+        Returns:
+            dict: Counters, hedge rate (hedges per request) and win rate (share
+                  of hedges that answered first)
+        """
+        with self.lock:
+            stats = dict(self.stats)
+            stats['budget_available'] = self.tokens
+        stats['hedge_rate'] = stats['hedged'] / stats['requests'] if stats['requests'] else 0.0
+        stats['win_rate'] = stats['hedge_wins'] / stats['hedged'] if stats['hedged'] else 0.0
+        stats['percentile'] = self.percentile
+        stats['budget'] = self.budget
+        return stats
+
+    def __str__(self):
+        return f"RequestHedger(p{self.percentile * 100:g}, budget={self.budget:.0%})"
@@ -0,0 +1,182 @@
+"""
+Job Queue - Runs round generation as background jobs that clients poll
+A bounded worker pool executes submitted jobs; finished results are kept
+for a retention period so clients can poll or long-poll for them
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are queued or running"""
+
+
+class JobQueue:
+    def __init__(self, max_workers: int = 4, max_pending: int = 100, retention_seconds: float = 600):
+        """
+        Initialize the job queue
+
+        Args:
+            max_workers (int): Jobs executed concurrently
+            max_pending (int): Queued plus running jobs before submissions are rejected
+            retention_seconds (float): How long finished jobs stay available for polling
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        # job_id -> job, in submission order
+        self.jobs = OrderedDict()
+        self.pending = 0
+        self.lock = threading.Lock()
+        self.stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'rejected': 0,
+            'expired': 0
+        }
+        print(f" Job Queue initialized (workers={max_workers}, max_pending={max_pending})")
+
+    def submit(self, fn: Callable, *args, **kwargs) -> str:
+        """
+        Queue fn(*args, **kwargs) for execution
+
+        Args:
+            fn (callable): Function whose return value becomes the job result
+
+        Returns:
+            str: Job id
+
+        Raises:
+            JobQueueFull: If max_pending jobs are already queued or running
+        """
+        with self.lock:
+            self._purge_expired()
+
+            if self.pending >= self.max_pending:
+                self.stats['rejected'] += 1
+                raise JobQueueFull(f"Too many pending jobs ({self.pending}). Please try again shortly.")
+
+            job_id = uuid.uuid4().hex
+            job = {
+                'job_id': job_id,
+                'status': 'queued',
+                'created_at': datetime.now().isoformat(),
+                'submitted': time.monotonic(),
+                'started': None,
+                'finished': None,
+                'result': None,
+                'error': None,
+                'done': threading.Event()
+            }
+            self.jobs[job_id] = job
+            self.pending += 1
+            self.stats['submitted'] += 1
+
+        self.executor.submit(self._run, job, fn, args, kwargs)
+        return job_id
+
+    def _run(self, job: Dict, fn: Callable, args: tuple, kwargs: Dict) -> None:
+        with self.lock:
+            job['status'] = 'running'
+            job['started'] = time.monotonic()
+
+        try:
+            result = fn(*args, **kwargs)
+            error = None
+        except Exception as e:
+            print(f" Job {job['job_id']} failed: {e}")
+            result, error = None, str(e)
+
+        with self.lock:
+            job['result'] = result
+            job['error'] = error
+            job['status'] = 'error' if error else 'done'
+            job['finished'] = time.monotonic()
+            self.pending -= 1
+            self.stats['failed' if error else 'completed'] += 1
+
+        job['done'].set()
+
+    def get(self, job_id: str, wait: float = 0) -> Optional[Dict]:
+        """
+        Get a job's status and result, optionally waiting for it to finish
+
+        Args:
+            job_id (str): Id returned by submit()
+            wait (float): Seconds to wait for an unfinished job (long-poll)
+
+        Returns:
+            dict: Job status (and result or error once finished), or None if unknown or expired
+        """
+        with self.lock:
+            self._purge_expired()
+            job = self.jobs.get(job_id)
+
+        if job is None:
+            return None
+
+        if wait > 0:
+            job['done'].wait(wait)
+
+        with self.lock:
+            return self._snapshot(job)
+
+    def _snapshot(self, job: Dict) -> Dict:
+        """Public view of a job (caller holds self.lock)"""
+        now = time.monotonic()
+        started = job['started'] or now
+        snapshot = {
+            'job_id': job['job_id'],
+            'status': job['status'],
+            'created_at': job['created_at'],
+            'queued_ms': (started - job['submitted']) * 1000
+        }
+        if job['started'] is not None:
+            snapshot['run_ms'] = ((job['finished'] or now) - job['started']) * 1000
+        if job['status'] == 'done':
+            snapshot['result'] = job['result']
+        elif job['status'] == 'error':
+            snapshot['error'] = job['error']
+        return snapshot
+
+    def _purge_expired(self) -> None:
+        """Drop finished jobs older than the retention period (caller holds self.lock)"""
+        cutoff = time.monotonic() - self.retention_seconds
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job['finished'] is not None and job['finished'] < cutoff
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+        self.stats['expired'] += len(expired)
+
+    def get_stats(self) -> Dict:
+        """
+        Get job counters and occupancy
+
+        Returns:
+            dict: Job statistics
+        """
+        with self.lock:
+            self._purge_expired()
+            stats = dict(self.stats)
+            stats['pending'] = self.pending
+            stats['retained'] = len(self.jobs)
+            stats['max_workers'] = self.max_workers
+            stats['max_pending'] = self.max_pending
+        return stats
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def __str__(self):
+        return f"JobQueue(jobs={len(self.jobs)}, pending={self.pending})"
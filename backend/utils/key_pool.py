@@ -0,0 +1,246 @@
+"""
+API Key Pool - Spreads LLM calls over several API keys (projects)
+Every key has its own quota, tracked by its own token bucket. Each call
+goes to the key with the most request / token headroom, and a key that gets
+a 429 cools down for the server's retry hint while its calls move to the
+other keys, so throughput grows with the number of keys
+"""
+
+import os
+import threading
+from typing import Dict, Iterator, List, Optional
+
+from utils.rate_limiter import TokenBucketRateLimiter, is_rate_limit_error, parse_retry_hint
+from utils.token_estimator import get_token_estimator
+
+
+# Cooldown of a key after a 429 without a retry hint
+DEFAULT_COOLDOWN_SECONDS = 30
+
+
+def load_api_keys() -> List[str]:
+    """
+    API keys from GEMINI_API_KEYS (comma-separated), or the single GEMINI_API_KEY
+
+    Returns:
+        list: Keys in configured order (empty if none are set)
+    """
+    keys = [key.strip() for key in os.getenv('GEMINI_API_KEYS', '').split(',') if key.strip()]
+    if not keys and os.getenv('GEMINI_API_KEY'):
+        keys = [os.getenv('GEMINI_API_KEY')]
+    # A key listed twice would double-count its quota
+    return list(dict.fromkeys(keys))
+
+
+class _PooledKey:
+    def __init__(self, index: int, api_key: str, requests_per_minute: float, tokens_per_minute: float):
+        # Stats and logs name keys by position and last characters, never the full key
+        self.label = f"key-{index + 1} (...{api_key[-4:]})"
+        self.api_key = api_key
+        self.limiter = TokenBucketRateLimiter(requests_per_minute, tokens_per_minute)
+        self.stats = {'requests': 0, 'rate_limited': 0, 'overcommitted': 0}
+
+
+class ApiKeyPool:
+    def __init__(
+        self,
+        api_keys: List[str],
+        requests_per_minute: float = 15,
+        tokens_per_minute: float = 1000000
+    ):
+        """
+        Initialize the pool with full quota on every key
+
+        Args:
+            api_keys (list): API keys, each with its own quota
+            requests_per_minute (float): Request quota (RPM) of each key
+            tokens_per_minute (float): Token quota (TPM) of each key
+        """
+        self.keys = [
+            _PooledKey(index, api_key, requests_per_minute, tokens_per_minute)
+            for index, api_key in enumerate(api_keys)
+        ]
+        self.lock = threading.Lock()
+        print(f" API Key Pool initialized ({len(self.keys)} keys, {requests_per_minute:g} RPM each)")
+
+    @classmethod
+    def from_env(cls) -> Optional['ApiKeyPool']:
+        """Create a pool from GEMINI_API_KEYS (quota per key from GEMINI_RPM / GEMINI_TPM), or None for fewer than 2 keys"""
+        keys = load_api_keys()
+        if len(keys) < 2:
+            return None
+        return cls(
+            keys,
+            requests_per_minute=float(os.getenv('GEMINI_RPM', '15')),
+            tokens_per_minute=float(os.getenv('GEMINI_TPM', '1000000'))
+        )
+
+    def choose(self, tokens: int = 0, exclude=()) -> _PooledKey:
+        """
+        Reserve quota for a call on the key with the most headroom
+
+        Keys cooling down after a 429 and keys in `exclude` are only used when
+        no other key is left. If no key has quota right now, the call still goes
+        to the roomiest key (the process-wide limiter already admitted it).
+
+        Args:
+            tokens (int): Estimated prompt tokens of the call
+            exclude (iterable): Keys (labels) already rejected during this call
+
+        Returns:
+            Key to send the call with
+        """
+        with self.lock:
+            ranked = sorted(
+                self.keys,
+                key=lambda key: (key.label in exclude, self._headroom_rank(key)),
+            )
+            for key in ranked:
+                if key.label not in exclude and key.limiter.try_acquire(tokens):
+                    key.stats['requests'] += 1
+                    return key
+
+            key = ranked[0]
+            key.stats['requests'] += 1
+            key.stats['overcommitted'] += 1
+            return key
+
+    @staticmethod
+    def _headroom_rank(key: _PooledKey):
+        headroom = key.limiter.headroom()
+        # Cooling keys last, then most requests left, then most tokens left
+        return (headroom['paused_for'], -headroom['requests'], -headroom['tokens'])
+
+    def has_available(self, exclude=()) -> bool:
+        """Whether a key outside `exclude` is not cooling down"""
+        return any(
+            key.label not in exclude and key.limiter.headroom()['paused_for'] == 0 for key in self.keys
+        )
+
+    def record_usage(self, key: _PooledKey, tokens: int) -> None:
+        """Debit output tokens of a completed call from the key's quota"""
+        key.limiter.record_usage(tokens)
+
+    def record_rate_limit(self, key: _PooledKey, retry_seconds: Optional[float]) -> None:
+        """
+        Cool a key down after a 429
+
+        Args:
+            key: Key that got the 429
+            retry_seconds (float): Server's retry hint, or None
+        """
+        with self.lock:
+            key.stats['rate_limited'] += 1
+        key.limiter.pause(retry_seconds + 1 if retry_seconds is not None else DEFAULT_COOLDOWN_SECONDS)
+
+    def get_stats(self) -> Dict:
+        """
+        Get per-key statistics
+
+        Returns:
+            dict: For each key (by label): calls, 429s, calls sent without quota,
+                  tokens used, remaining headroom and cooldown left
+        """
+        stats = {}
+        for key in self.keys:
+            limiter_stats = key.limiter.get_stats()
+            with self.lock:
+                key_stats = dict(key.stats)
+            key_stats['tokens_used'] = limiter_stats['tokens_used']
+            key_stats['requests_available'] = limiter_stats['requests']
+            key_stats['tokens_available'] = limiter_stats['tokens']
+            key_stats['cooldown_for'] = limiter_stats['paused_for']
+            stats[key.label] = key_stats
+        return stats
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __str__(self):
+        return f"ApiKeyPool(keys={len(self.keys)})"
+
+
+class PooledModel:
+    def __init__(self, model_name: str, pool: ApiKeyPool, models: Dict[str, object]):
+        """
+        Model that sends each call with a key from the pool
+
+        A 429 cools the key down and the call is retried on another key right
+        away; the 429 only reaches the caller once every key has been tried.
+
+        Args:
+            model_name (str): Model name
+            pool (ApiKeyPool): Pool choosing the key of each call
+            models (dict): Key label -> model object bound to that key
+        """
+        self.model_name = model_name
+        self.pool = pool
+        self.models = models
+
+    def _keys(self, prompt):
+        """Keys to try for one call (best first, each reserved as it is handed out) and the keys tried so far"""
+        tokens = get_token_estimator().estimate(prompt) if isinstance(prompt, str) else 0
+        tried = set()
+        for _ in range(len(self.pool)):
+            key = self.pool.choose(tokens, exclude=tried)
+            tried.add(key.label)
+            yield key, tried
+
+    def _record_output(self, key, text: str) -> None:
+        self.pool.record_usage(key, get_token_estimator().estimate(text))
+
+    async def generate_content_async(self, prompt, **kwargs):
+        for key, tried in self._keys(prompt):
+            try:
+                response = await self.models[key.label].generate_content_async(prompt, **kwargs)
+            except Exception as e:
+                if not (is_rate_limit_error(str(e)) and self._on_rate_limit(key, str(e), tried)):
+                    raise
+                continue
+            self._record_output(key, getattr(response, 'text', '') or '')
+            return response
+
+    def generate_content(self, prompt, stream: bool = False, **kwargs):
+        if stream:
+            return self._stream(prompt, **kwargs)
+        for key, tried in self._keys(prompt):
+            try:
+                response = self.models[key.label].generate_content(prompt, **kwargs)
+            except Exception as e:
+                if not (is_rate_limit_error(str(e)) and self._on_rate_limit(key, str(e), tried)):
+                    raise
+                continue
+            self._record_output(key, getattr(response, 'text', '') or '')
+            return response
+
+    def _stream(self, prompt, **kwargs) -> Iterator:
+        for key, tried in self._keys(prompt):
+            chunks = []
+            try:
+                for chunk in self.models[key.label].generate_content(prompt, stream=True, **kwargs):
+                    try:
+                        chunks.append(chunk.text)
+                    except ValueError:
+                        pass
+                    yield chunk
+            except Exception as e:
+                # Only switch keys before anything was yielded
+                if chunks or not (is_rate_limit_error(str(e)) and self._on_rate_limit(key, str(e), tried)):
+                    raise
+                continue
+            self._record_output(key, ''.join(text for text in chunks if text))
+            return
+
+    def _on_rate_limit(self, key, error_str: str, tried: set) -> bool:
+        """Cool the key down; True if the call should move to another key"""
+        self.pool.record_rate_limit(key, parse_retry_hint(error_str))
+        if self.pool.has_available(tried):
+            print(f"Rate limit hit on {key.label}. Switching keys...")
+            return True
+        return False
+
+    def count_tokens(self, text: str):
+        return self.models[self.pool.keys[0].label].count_tokens(text)
+
+    def __str__(self):
+        return f"PooledModel({self.model_name}, keys={len(self.models)})"
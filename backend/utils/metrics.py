@@ -0,0 +1,248 @@
+"""
+Metrics - Prometheus-style counters and histograms for /metrics
+Recording is a lock, a dict lookup and a bisect, so metrics can sit on the
+request path; values owned by other components (session store size, parser
+and rate limiter counters) are read by collectors only when /metrics is
+scraped. The route of the current request is kept in a context variable so
+stage timings are attributed to it
+"""
+
+import bisect
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+# Seconds; spans in-process stages (sub-millisecond) up to slow LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Route label of work done outside a request (background jobs, prefetches)
+BACKGROUND_ROUTE = 'background'
+
+current_route = contextvars.ContextVar('metrics_route', default=BACKGROUND_ROUTE)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        """
+        Monotonic counter, one value per label combination
+
+        Args:
+            name (str): Metric name
+            help_text (str): HELP line
+            labelnames (tuple): Label names; inc() takes the values in this order
+        """
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Tuple, float] = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount: float = 1) -> None:
+        with self.lock:
+            self.values[labelvalues] = self.values.get(labelvalues, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            items = list(self.values.items())
+        for labelvalues, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        """
+        Histogram with fixed buckets, one series per label combination
+
+        Args:
+            name (str): Metric name
+            help_text (str): HELP line
+            labelnames (tuple): Label names; observe() takes the values in this order
+            buckets (tuple): Upper bounds in increasing order (+Inf is added)
+        """
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self.series: Dict[Tuple, list] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labelvalues)
+            if series is None:
+                series = self.series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, *labelvalues):
+        """Observe the duration of a with-block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labelvalues)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            items = [(labelvalues, list(counts), total) for labelvalues, (counts, total) in self.series.items()]
+
+        for labelvalues, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labelvalues, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """
+        Initialize an empty registry with the per-stage timing histogram
+        """
+        self.metrics: Dict[str, object] = {}
+        # name -> (type, help, callback returning [(labels dict, value)])
+        self.collectors: Dict[str, Tuple[str, str, Callable]] = {}
+        self.lock = threading.Lock()
+
+        self.stage_seconds = self.histogram(
+            'debate_stage_seconds',
+            'Time spent in each stage of round generation, by request route',
+            ('route', 'stage')
+        )
+        print(" Metrics Registry initialized")
+
+    def _register(self, name: str, factory: Callable):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = factory()
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Get or create a counter"""
+        return self._register(name, lambda: Counter(name, help_text, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Get or create a histogram"""
+        return self._register(name, lambda: Histogram(name, help_text, labelnames, buckets))
+
+    def register_collector(self, name: str, metric_type: str, help_text: str, callback: Callable) -> None:
+        """
+        Add a metric whose samples are read from another component at scrape time
+
+        Args:
+            name (str): Metric name
+            metric_type (str): 'gauge' or 'counter'
+            help_text (str): HELP line
+            callback (callable): Returns a list of (labels dict, value) samples
+        """
+        with self.lock:
+            self.collectors[name] = (metric_type, help_text, callback)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a stage of round generation, labelled with the current request route"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_seconds.observe(time.perf_counter() - start, current_route.get(), name)
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format
+
+        Returns:
+            str: Exposition text
+        """
+        with self.lock:
+            metrics = list(self.metrics.values())
+            collectors = list(self.collectors.items())
+
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+
+        for name, (metric_type, help_text, callback) in collectors:
+            try:
+                samples = callback()
+            except Exception as e:
+                print(f" Metrics collector {name} failed: {e}")
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                if value is None:
+                    continue
+                label_text = _format_labels(list(labels), list(labels.values()))
+                lines.append(f"{name}{label_text} {_format_value(float(value))}")
+
+        return '\n'.join(lines) + '\n'
+
+    def __str__(self):
+        return f"MetricsRegistry(metrics={len(self.metrics)}, collectors={len(self.collectors)})"
+
+
+_metrics: Optional[MetricsRegistry] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """
+    Get the process-wide metrics registry
+
+    Returns:
+        MetricsRegistry: Shared registry instance
+    """
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = MetricsRegistry()
+        return _metrics
@@ -0,0 +1,290 @@
+"""
+Model Router - Runtime routing across the configured Gemini models
+Keeps a circuit breaker and rolling latency per model. A model that keeps
+failing, or answers with a 429, is taken out of rotation for a cooldown (the
+server's retry hint when there is one) and then gets a single probe request
+before it is trusted again. Requests go to the fastest healthy model; models
+without latency samples rank in configured order, and a small share of
+traffic explores the others so their latency stays known
+"""
+
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, Optional, Tuple
+
+
+STATE_CLOSED = 'closed'        # healthy, in rotation
+STATE_OPEN = 'open'            # cooling down, not used
+STATE_HALF_OPEN = 'half_open'  # cooldown over, one probe request allowed
+
+# A probe that never reported back (e.g. a cancelled request) stops blocking new probes
+PROBE_TIMEOUT_SECONDS = 120
+
+
+class ModelRouter:
+    def __init__(
+        self,
+        models: Dict[str, object],
+        failure_threshold: int = 3,
+        cooldown_seconds: float = 30,
+        max_cooldown_seconds: float = 300,
+        explore_rate: float = 0.02,
+        ewma_alpha: float = 0.2,
+        latency_window: int = 50
+    ):
+        """
+        Initialize the router with every model closed (healthy)
+
+        Args:
+            models (dict): Model name -> model object, in order of preference
+            failure_threshold (int): Consecutive errors that open a model's breaker
+            cooldown_seconds (float): First cooldown of an opened breaker; doubled
+                                      each time a probe fails
+            max_cooldown_seconds (float): Upper bound of the cooldown
+            explore_rate (float): Share of requests sent to a random healthy model
+            ewma_alpha (float): Weight of the newest latency in the moving average
+            latency_window (int): Latencies kept per model for percentiles
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.max_cooldown_seconds = max_cooldown_seconds
+        self.explore_rate = explore_rate
+        self.ewma_alpha = ewma_alpha
+        self.latency_window = latency_window
+
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self._set_models(models)
+        print(f" Model Router initialized ({len(models)} models, failure_threshold={failure_threshold})")
+
+    def _set_models(self, models: Dict[str, object]) -> None:
+        self.entries = OrderedDict(
+            (name, {
+                'model': model,
+                'state': STATE_CLOSED,
+                'consecutive_failures': 0,
+                'open_until': 0.0,
+                'cooldown': self.cooldown_seconds,
+                'probe_started': None,
+                'latency_ewma': None,
+                'latencies': deque(maxlen=self.latency_window),
+                'stats': {'requests': 0, 'successes': 0, 'errors': 0, 'rate_limited': 0, 'opened': 0}
+            })
+            for name, model in models.items()
+        )
+
+    def pin(self, name: str, model) -> None:
+        """Route every request to one model object (e.g. a stand-in model in benchmarks)"""
+        with self.lock:
+            self._set_models({name: model})
+
+    def _available(self, entry: Dict, now: float) -> bool:
+        """Whether a model can take a request now (moves expired breakers to half-open)"""
+        if entry['state'] == STATE_OPEN and now >= entry['open_until']:
+            entry['state'] = STATE_HALF_OPEN
+            entry['probe_started'] = None
+        if entry['state'] == STATE_HALF_OPEN:
+            probe_started = entry['probe_started']
+            return probe_started is None or now - probe_started > PROBE_TIMEOUT_SECONDS
+        return entry['state'] == STATE_CLOSED
+
+    def _rank(self, names):
+        """Fastest first; models without latency samples after, in configured order"""
+        order = list(self.entries)
+        return sorted(names, key=lambda name: (
+            self.entries[name]['latency_ewma'] is None,
+            self.entries[name]['latency_ewma'] or 0.0,
+            order.index(name)
+        ))
+
+    def choose(self, exclude: Iterable[str] = (), force: bool = False) -> Optional[Tuple[str, object]]:
+        """
+        Pick the model for the next request
+
+        Args:
+            exclude (iterable): Models to avoid (e.g. ones that already failed this
+                                request); used anyway if no other model is available
+            force (bool): If every model is cooling down, return the one whose
+                          cooldown ends first instead of None
+
+        Returns:
+            tuple: (model name, model object), or None if no model is available
+        """
+        exclude = set(exclude)
+        now = time.monotonic()
+        with self.lock:
+            available = [name for name, entry in self.entries.items() if self._available(entry, now)]
+            candidates = [name for name in available if name not in exclude] or available
+
+            if candidates:
+                if len(candidates) > 1 and self.explore_rate and random.random() < self.explore_rate:
+                    name = random.choice(candidates)
+                else:
+                    name = self._rank(candidates)[0]
+            elif force:
+                name = min(self.entries, key=lambda name: self.entries[name]['open_until'])
+            else:
+                return None
+
+            entry = self.entries[name]
+            if entry['state'] != STATE_CLOSED:
+                entry['probe_started'] = now
+            entry['stats']['requests'] += 1
+            return name, entry['model']
+
+    def has_alternative(self, exclude: Iterable[str]) -> bool:
+        """Whether a model outside `exclude` can take a request now"""
+        exclude = set(exclude)
+        now = time.monotonic()
+        with self.lock:
+            return any(
+                self._available(entry, now) for name, entry in self.entries.items() if name not in exclude
+            )
+
+    def seconds_until_available(self) -> float:
+        """Seconds until the first cooling-down model can be probed (0 if one is available)"""
+        now = time.monotonic()
+        with self.lock:
+            if any(self._available(entry, now) for entry in self.entries.values()):
+                return 0.0
+            return max(0.0, min(entry['open_until'] for entry in self.entries.values()) - now)
+
+    def record_success(self, name: str, latency: float) -> None:
+        """
+        Close the model's breaker and add a latency sample
+
+        Args:
+            name (str): Model that answered
+            latency (float): Seconds the call took
+        """
+        with self.lock:
+            entry = self.entries.get(name)
+            if entry is None:
+                return
+            entry['state'] = STATE_CLOSED
+            entry['consecutive_failures'] = 0
+            entry['cooldown'] = self.cooldown_seconds
+            entry['probe_started'] = None
+            entry['stats']['successes'] += 1
+            self._add_latency(entry, latency)
+
+    def _add_latency(self, entry: Dict, latency: float) -> None:
+        entry['latencies'].append(latency)
+        previous = entry['latency_ewma']
+        entry['latency_ewma'] = latency if previous is None else (
+            self.ewma_alpha * latency + (1 - self.ewma_alpha) * previous
+        )
+
+    def record_failure(self, name: str, rate_limited: bool = False, cooldown: Optional[float] = None) -> None:
+        """
+        Count a failed call and open the model's breaker when warranted
+
+        A 429 or a failed probe opens the breaker right away; other errors
+        open it after failure_threshold in a row.
+
+        Args:
+            name (str): Model that failed
+            rate_limited (bool): The call failed with a rate limit / quota error
+            cooldown (float): Cooldown to use instead of the model's current one
+                              (e.g. the server's retry hint)
+        """
+        with self.lock:
+            entry = self.entries.get(name)
+            if entry is None:
+                return
+            entry['consecutive_failures'] += 1
+            entry['stats']['rate_limited' if rate_limited else 'errors'] += 1
+
+            probe_failed = entry['state'] == STATE_HALF_OPEN
+            if not (rate_limited or probe_failed or entry['consecutive_failures'] >= self.failure_threshold):
+                return
+
+            if probe_failed:
+                # Back off harder from a model that is still failing
+                entry['cooldown'] = min(self.max_cooldown_seconds, entry['cooldown'] * 2)
+            duration = cooldown if cooldown is not None else entry['cooldown']
+            entry['state'] = STATE_OPEN
+            entry['open_until'] = time.monotonic() + duration
+            entry['probe_started'] = None
+            entry['stats']['opened'] += 1
+
+    def record_cancelled(self, name: str, elapsed: Optional[float] = None) -> None:
+        """
+        Forget a call that was abandoned without a result (e.g. the slower of a hedged pair)
+
+        Args:
+            name (str): Model the call went to
+            elapsed (float): Seconds the call had run; kept as a latency sample since
+                             the call was at least this slow
+        """
+        with self.lock:
+            entry = self.entries.get(name)
+            if entry is None:
+                return
+            entry['probe_started'] = None
+            if elapsed is not None:
+                self._add_latency(entry, elapsed)
+
+    def latency_percentile(self, name: str, percentile: float, min_samples: int = 1) -> Optional[float]:
+        """
+        Recent latency percentile of a model
+
+        Args:
+            name (str): Model name
+            percentile (float): Percentile between 0 and 1 (e.g. 0.95)
+            min_samples (int): Samples needed for a result
+
+        Returns:
+            float: Seconds, or None with fewer than min_samples latencies
+        """
+        with self.lock:
+            entry = self.entries.get(name)
+            latencies = sorted(entry['latencies']) if entry is not None else []
+        if not latencies or len(latencies) < min_samples:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * percentile))]
+
+    @property
+    def preferred(self) -> str:
+        """Model new requests go to (ignoring exploration)"""
+        now = time.monotonic()
+        with self.lock:
+            available = [name for name, entry in self.entries.items() if self._available(entry, now)]
+            return self._rank(available)[0] if available else next(iter(self.entries))
+
+    def model(self, name: str):
+        """Model object of a configured model name"""
+        return self.entries[name]['model']
+
+    def get_stats(self) -> Dict:
+        """
+        Get per-model routing statistics
+
+        Returns:
+            dict: Preferred model, plus each model's breaker state, seconds until
+                  it can be probed again, latency average / p50 / p95 and counters
+        """
+        preferred = self.preferred
+        now = time.monotonic()
+        models = {}
+        with self.lock:
+            for name, entry in self.entries.items():
+                latencies = sorted(entry['latencies'])
+                stats = dict(entry['stats'])
+                stats['state'] = entry['state']
+                stats['open_for'] = max(0.0, entry['open_until'] - now) if entry['state'] == STATE_OPEN else 0.0
+                stats['latency_ewma_ms'] = entry['latency_ewma'] * 1000 if entry['latency_ewma'] is not None else None
+                stats['latency_p50_ms'] = latencies[len(latencies) // 2] * 1000 if latencies else None
+                stats['latency_p95_ms'] = (
+                    latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000 if latencies else None
+                )
+                models[name] = stats
+        return {'preferred': preferred, 'models': models}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __str__(self):
+        return f"ModelRouter(models={list(self.entries)}, preferred={self.preferred})"
@@ -0,0 +1,210 @@
+"""
+Round Prefetcher - Speculatively generates the next debate round in the background
+Serves the pending result instantly when the client asks for that round
+Pending rounds are bounded like sessions: dropped after the session TTL and,
+least recently scheduled first, beyond a maximum count
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from utils.profiler import attach_thread
+
+
+class RoundPrefetcher:
+    def __init__(
+        self,
+        generate_fn: Callable,
+        max_workers: int = 2,
+        max_pending: int = 1000,
+        ttl_seconds: Optional[float] = 3600
+    ):
+        """
+        Initialize the prefetcher
+
+        Args:
+            generate_fn (callable): generate_fn(session_id, question, round_num, history) -> responses dict
+            max_workers (int): Number of background generation threads
+            max_pending (int): Maximum pending rounds; the least recently scheduled is dropped
+            ttl_seconds (float): Seconds a pending round is kept unclaimed (None disables)
+        """
+        self.generate_fn = generate_fn
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='prefetch')
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        # Ordered by schedule time - oldest first
+        self.pending = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {
+            'scheduled': 0,
+            'hits': 0,
+            'misses': 0,
+            'invalidated': 0,
+            'expired': 0,
+            'evicted': 0,
+            'errors': 0
+        }
+        print(f" Round Prefetcher initialized (max_pending={max_pending}, ttl={ttl_seconds}s)")
+
+    def _is_expired(self, entry: Dict, now: float) -> bool:
+        return bool(self.ttl_seconds) and now - entry['scheduled_at'] > self.ttl_seconds
+
+    def _evict(self) -> List[Dict]:
+        """Drop expired rounds, then the oldest ones over the limit (caller holds self.lock)"""
+        now = time.monotonic()
+        dropped = []
+
+        while self.pending and self._is_expired(next(iter(self.pending.values())), now):
+            dropped.append(self.pending.popitem(last=False)[1])
+            self.stats['expired'] += 1
+
+        while self.max_pending and len(self.pending) > self.max_pending:
+            dropped.append(self.pending.popitem(last=False)[1])
+            self.stats['evicted'] += 1
+
+        return dropped
+
+    def schedule(self, session_id: str, question: str, round_num: int, history: List[Dict], total_rounds: int) -> None:
+        """
+        Start generating a round in the background, replacing any pending round for the session
+
+        Args:
+            session_id (str): Unique session identifier
+            question (str): Debate question
+            round_num (int): Round number to generate
+            history (list): Session history the round should be based on
+            total_rounds (int): Total rounds of the debate
+        """
+        # Snapshot the history so later appends don't change what was generated
+        snapshot = list(history)
+        worker = {}
+        future = self.executor.submit(self._generate, worker, session_id, question, round_num, snapshot)
+
+        with self.lock:
+            old_entry = self.pending.pop(session_id, None)
+            self.pending[session_id] = {
+                'question': question,
+                'round': round_num,
+                'total_rounds': total_rounds,
+                'history_len': len(snapshot),
+                'future': future,
+                'worker': worker,
+                'scheduled_at': time.monotonic()
+            }
+            self.stats['scheduled'] += 1
+            dropped = self._evict()
+
+        for entry in ([old_entry] if old_entry else []) + dropped:
+            entry['future'].cancel()
+
+        print(f" Prefetching Round {round_num} for session {session_id}")
+
+    def _generate(self, worker: Dict, *args):
+        # Record the worker thread so a profiled request waiting in take() samples it
+        worker['thread_id'] = threading.get_ident()
+        return self.generate_fn(*args)
+
+    def take(self, session_id: str, round_num: int, history_len: int, timeout: Optional[float] = None) -> Optional[Dict]:
+        """
+        Take the prefetched round for a session if it matches the requested round and history
+
+        Waits for the background generation if it is still running.
+
+        Args:
+            session_id (str): Unique session identifier
+            round_num (int): Round number being requested
+            history_len (int): Current number of messages in the session history
+            timeout (float): Maximum seconds to wait for a running generation
+
+        Returns:
+            dict: Prefetched responses, or None if there is no usable prefetch
+        """
+        with self.lock:
+            dropped = self._evict()
+            entry = self.pending.get(session_id)
+            if entry and entry['round'] == round_num and entry['history_len'] == history_len:
+                del self.pending[session_id]
+            else:
+                entry = None
+                self.stats['misses'] += 1
+
+        for dropped_entry in dropped:
+            dropped_entry['future'].cancel()
+        if entry is None:
+            return None
+
+        try:
+            with attach_thread(thread_id=entry['worker'].get('thread_id')):
+                responses = entry['future'].result(timeout=timeout)
+        except Exception as e:
+            print(f" Prefetch for session {session_id} failed: {e}")
+            with self.lock:
+                self.stats['errors'] += 1
+            return None
+
+        with self.lock:
+            self.stats['hits'] += 1
+        print(f" Serving prefetched Round {round_num} for session {session_id}")
+        return responses
+
+    def invalidate(self, session_id: str) -> Optional[Dict]:
+        """
+        Drop the pending round for a session
+
+        Args:
+            session_id (str): Unique session identifier
+
+        Returns:
+            dict: The dropped entry's round info, or None if nothing was pending
+        """
+        with self.lock:
+            entry = self.pending.pop(session_id, None)
+            if entry:
+                self.stats['invalidated'] += 1
+
+        if not entry:
+            return None
+
+        entry['future'].cancel()
+        return {
+            'question': entry['question'],
+            'round': entry['round'],
+            'total_rounds': entry['total_rounds']
+        }
+
+    def refresh(self, session_id: str, history: List[Dict]) -> bool:
+        """
+        Regenerate the pending round for a session after its history changed
+
+        Args:
+            session_id (str): Unique session identifier
+            history (list): Updated session history
+
+        Returns:
+            bool: True if a pending round was invalidated and rescheduled
+        """
+        entry = self.invalidate(session_id)
+        if not entry:
+            return False
+
+        self.schedule(session_id, entry['question'], entry['round'], history, entry['total_rounds'])
+        return True
+
+    def get_stats(self) -> Dict:
+        """
+        Get prefetch statistics
+
+        Returns:
+            dict: Counters and number of pending rounds
+        """
+        with self.lock:
+            stats = dict(self.stats)
+            stats['pending'] = len(self.pending)
+        stats['max_pending'] = self.max_pending
+        return stats
+
+    def __str__(self):
+        return f"RoundPrefetcher(pending={len(self.pending)})"
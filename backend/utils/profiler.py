@@ -0,0 +1,263 @@
+"""
+Request Profiler - Opt-in sampling profiler for live requests
+A single background thread samples the stacks of the threads serving
+profiled requests at a fixed interval (sys._current_frames, no tracing
+hooks), so unprofiled requests pay nothing and profiled ones only pay for
+the samples. Work a request hands to other threads (agent workers, the
+Gemini event loop, prefetches) is sampled too while it runs inside
+attach_thread(); those stacks start with the thread's name. Finished
+profiles are kept in a ring buffer and rendered as collapsed stacks
+("frame;frame;frame count"), the input format of flamegraph.pl, speedscope
+and similar tools
+"""
+
+import contextvars
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+
+class _ActiveProfile:
+    def __init__(self, profile_id: int, label: str, thread_id: int, lock: threading.Lock):
+        self.id = profile_id
+        self.label = label
+        self.thread_id = thread_id
+        self.lock = lock
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.stacks = Counter()
+        self.samples = 0
+        # Worker thread id -> blocks of this profile's work running on it
+        self.threads = Counter()
+        self.finished = False
+
+
+# Profile of the request whose work runs in the current context; propagates to
+# agent workers (copied contexts) and to coroutines on the Gemini event loop
+current_profile = contextvars.ContextVar('request_profile', default=None)
+
+
+@contextmanager
+def attach_thread(profile: Optional[_ActiveProfile] = None, thread_id: Optional[int] = None):
+    """
+    Sample a thread as part of a profile while inside the block
+
+    Args:
+        profile: Profile to attach to (default: the current context's profile);
+                 nothing is sampled without one
+        thread_id (int): Thread to sample (default: the calling thread), e.g. a
+                         worker whose result the caller is waiting for
+    """
+    profile = profile or current_profile.get()
+    if profile is None or profile.finished:
+        yield
+        return
+
+    thread_id = thread_id or threading.get_ident()
+    with profile.lock:
+        profile.threads[thread_id] += 1
+    try:
+        yield
+    finally:
+        with profile.lock:
+            profile.threads[thread_id] -= 1
+            if profile.threads[thread_id] <= 0:
+                del profile.threads[thread_id]
+
+
+class RequestProfiler:
+    def __init__(
+        self,
+        interval: float = 0.005,
+        max_profiles: int = 20,
+        sample_rate: float = 0.0,
+        max_seconds: float = 300,
+        max_depth: int = 128
+    ):
+        """
+        Initialize the profiler (the sampling thread starts with the first profile)
+
+        Args:
+            interval (float): Seconds between stack samples
+            max_profiles (int): Finished profiles kept; the oldest are dropped
+            sample_rate (float): Fraction of eligible requests profiled without being asked
+            max_seconds (float): Sampling of a profile stops after this long
+                                 (e.g. a stream the client never finished reading)
+            max_depth (int): Innermost frames kept per sample
+        """
+        self.interval = interval
+        self.max_profiles = max_profiles
+        self.sample_rate = sample_rate
+        self.max_seconds = max_seconds
+        self.max_depth = max_depth
+
+        self.ids = itertools.count(1)
+        # thread id -> profile being sampled
+        self.active: Dict[int, _ActiveProfile] = {}
+        self.profiles = deque(maxlen=max_profiles)
+        self.sampler = None
+        self.lock = threading.Lock()
+        self.stats = {
+            'started': 0,
+            'finished': 0,
+            'samples': 0,
+            'sampler_seconds': 0.0
+        }
+        print(f" Request Profiler initialized (interval={interval * 1000:.0f}ms, sample_rate={sample_rate})")
+
+    def should_profile(self, requested: bool = False) -> bool:
+        """Whether a request is profiled: explicitly requested or picked by the sample rate"""
+        return requested or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def start(self, label: str) -> int:
+        """
+        Start sampling the calling thread (and the threads its work is handed to)
+
+        Args:
+            label (str): Description of the profiled work (e.g. "POST /debate/start")
+
+        Returns:
+            int: Profile id
+        """
+        thread_id = threading.get_ident()
+        profile = _ActiveProfile(next(self.ids), label, thread_id, self.lock)
+        current_profile.set(profile)
+        with self.lock:
+            self.active[thread_id] = profile
+            self.stats['started'] += 1
+            if self.sampler is None:
+                self.sampler = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+                self.sampler.start()
+        return profile.id
+
+    def stop(self, profile_id: int, status: Optional[int] = None) -> None:
+        """
+        Stop sampling and store the profile
+
+        Args:
+            profile_id (int): Id returned by start()
+            status (int): HTTP status of the profiled request, if known
+        """
+        with self.lock:
+            thread_id = next(
+                (tid for tid, profile in self.active.items() if profile.id == profile_id), None
+            )
+            if thread_id is None:
+                return
+            profile = self.active.pop(thread_id)
+            profile.finished = True
+            profile.threads.clear()
+            self.profiles.append({
+                'id': profile.id,
+                'label': profile.label,
+                'started': profile.started,
+                'duration_ms': (time.perf_counter() - profile.start) * 1000,
+                'samples': profile.samples,
+                'interval_ms': self.interval * 1000,
+                'status': status,
+                'stacks': profile.stacks
+            })
+            self.stats['finished'] += 1
+        if current_profile.get() is profile:
+            current_profile.set(None)
+
+    def _collapse(self, frame) -> str:
+        names = []
+        while frame is not None and len(names) < self.max_depth:
+            code = frame.f_code
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            began = time.perf_counter()
+            with self.lock:
+                if not self.active:
+                    # Nothing to sample - exit so an idle profiler costs nothing
+                    self.sampler = None
+                    return
+                active = [(profile, list(profile.threads)) for profile in self.active.values()]
+
+            frames = sys._current_frames()
+            now = time.perf_counter()
+            names = {thread.ident: thread.name for thread in threading.enumerate()} if any(
+                workers for _, workers in active
+            ) else {}
+            samples = []
+            for profile, workers in active:
+                if now - profile.start >= self.max_seconds:
+                    continue
+                frame = frames.get(profile.thread_id)
+                if frame is not None:
+                    samples.append((profile, self._collapse(frame)))
+                for thread_id in workers:
+                    frame = frames.get(thread_id)
+                    if frame is not None and thread_id != profile.thread_id:
+                        samples.append((profile, f"{names.get(thread_id, thread_id)};{self._collapse(frame)}"))
+            del frames
+
+            with self.lock:
+                for profile, stack in samples:
+                    profile.stacks[stack] += 1
+                    profile.samples += 1
+                self.stats['samples'] += len(samples)
+                self.stats['sampler_seconds'] += time.perf_counter() - began
+
+    def list_profiles(self) -> List[Dict]:
+        """
+        Summaries of the stored profiles, newest first
+
+        Returns:
+            list: id, label, start time, duration, sample count and status of each profile
+        """
+        with self.lock:
+            return [
+                {key: value for key, value in profile.items() if key != 'stacks'}
+                for profile in reversed(self.profiles)
+            ]
+
+    def collapsed(self, profile_id: Optional[int] = None) -> Optional[str]:
+        """
+        Collapsed-stack text of a stored profile
+
+        Args:
+            profile_id (int): Profile id, or None for the most recent profile
+
+        Returns:
+            str: One "frame;frame;frame count" line per distinct stack, or None if not stored
+        """
+        with self.lock:
+            for profile in reversed(self.profiles):
+                if profile_id is None or profile['id'] == profile_id:
+                    stacks = dict(profile['stacks'])
+                    break
+            else:
+                return None
+
+        return ''.join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+    def get_stats(self) -> Dict:
+        """
+        Get profiler statistics
+
+        Returns:
+            dict: Profiles started / finished / active / stored, samples taken and
+                  time spent sampling
+        """
+        with self.lock:
+            stats = dict(self.stats)
+            stats['active'] = len(self.active)
+            stats['stored'] = len(self.profiles)
+        stats['sample_rate'] = self.sample_rate
+        return stats
+
+    def __str__(self):
+        return f"RequestProfiler(interval={self.interval * 1000:.0f}ms, stored={len(self.profiles)})"
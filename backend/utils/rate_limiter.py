@@ -0,0 +1,246 @@
+"""
+Rate Limiter - Process-wide token bucket shared by every Gemini caller
+Tracks requests-per-minute and tokens-per-minute, and can pause all callers
+when the server says how long to back off
+"""
+
+import asyncio
+import os
+import random
+import re
+import threading
+import time
+from typing import Dict, Optional
+
+
+def is_rate_limit_error(error_str: str) -> bool:
+    """Check whether an API error is a rate limit / quota error (429)"""
+    return "429" in error_str or "quota" in error_str.lower()
+
+
+def parse_retry_hint(error_str: str) -> Optional[float]:
+    """
+    Extract the server's "retry in Xs" hint from an error message
+
+    Returns:
+        float: Seconds to wait, or None if the error has no hint
+    """
+    retry_match = re.search(r'retry in (\d+\.?\d*)', error_str)
+    return float(retry_match.group(1)) if retry_match else None
+
+
+class TokenBucketRateLimiter:
+    def __init__(self, requests_per_minute: float = 15, tokens_per_minute: float = 1000000):
+        """
+        Initialize the rate limiter with full buckets
+
+        Args:
+            requests_per_minute (float): Request quota (RPM)
+            tokens_per_minute (float): Token quota (TPM), input plus output
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.request_tokens = float(requests_per_minute)
+        self.token_tokens = float(tokens_per_minute)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+        self.stats = {
+            'acquired': 0,
+            'tokens_used': 0,
+            'waits': 0,
+            'total_wait_seconds': 0.0,
+            'pauses': 0,
+            'total_pause_seconds': 0.0
+        }
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated
+        self.updated = now
+        self.request_tokens = min(
+            self.requests_per_minute,
+            self.request_tokens + elapsed * self.requests_per_minute / 60
+        )
+        self.token_tokens = min(
+            self.tokens_per_minute,
+            self.token_tokens + elapsed * self.tokens_per_minute / 60
+        )
+
+    def _reserve(self, tokens: int) -> float:
+        """
+        Take one request and `tokens` tokens if available
+
+        Returns:
+            float: 0 if reserved, otherwise seconds to wait before trying again
+        """
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+
+            if now < self.paused_until:
+                return self.paused_until - now
+
+            # A single request larger than the whole bucket only waits for a full bucket
+            needed = min(tokens, self.tokens_per_minute)
+
+            if self.request_tokens >= 1 and self.token_tokens >= needed:
+                self.request_tokens -= 1
+                self.token_tokens -= needed
+                self.stats['acquired'] += 1
+                self.stats['tokens_used'] += tokens
+                return 0.0
+
+            request_wait = max(0.0, (1 - self.request_tokens) * 60 / self.requests_per_minute)
+            token_wait = max(0.0, (needed - self.token_tokens) * 60 / self.tokens_per_minute)
+            return max(request_wait, token_wait, 0.01)
+
+    def _record_wait(self, waited: float) -> None:
+        if waited > 0:
+            with self.lock:
+                self.stats['waits'] += 1
+                self.stats['total_wait_seconds'] += waited
+
+    def acquire(self, tokens: int = 0) -> float:
+        """
+        Block the calling thread until a request slot and `tokens` tokens are available
+
+        Args:
+            tokens (int): Estimated tokens the request will consume
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        start = time.monotonic()
+        slept = False
+        while True:
+            wait = self._reserve(tokens)
+            if wait == 0:
+                break
+            # Jitter so waiting callers don't all retry at the same instant
+            time.sleep(wait * random.uniform(1.0, 1.1))
+            slept = True
+
+        waited = time.monotonic() - start if slept else 0.0
+        self._record_wait(waited)
+        return waited
+
+    async def acquire_async(self, tokens: int = 0) -> float:
+        """
+        Wait (without blocking a thread) until a request slot and `tokens` tokens are available
+
+        Args:
+            tokens (int): Estimated tokens the request will consume
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        start = time.monotonic()
+        slept = False
+        while True:
+            wait = self._reserve(tokens)
+            if wait == 0:
+                break
+            await asyncio.sleep(wait * random.uniform(1.0, 1.1))
+            slept = True
+
+        waited = time.monotonic() - start if slept else 0.0
+        self._record_wait(waited)
+        return waited
+
+    def try_acquire(self, tokens: int = 0) -> bool:
+        """
+        Take a request slot and `tokens` tokens only if available right now
+
+        Args:
+            tokens (int): Estimated tokens the request will consume
+
+        Returns:
+            bool: Whether the request may be sent
+        """
+        return self._reserve(tokens) == 0
+
+    def pause(self, seconds: float) -> None:
+        """
+        Stop handing out requests for `seconds`, e.g. after a 429 with a retry hint
+
+        Args:
+            seconds (float): Pause duration
+        """
+        with self.lock:
+            now = time.monotonic()
+            new_until = now + seconds
+            if new_until > self.paused_until:
+                self.stats['total_pause_seconds'] += new_until - max(now, self.paused_until)
+                self.paused_until = new_until
+                self.stats['pauses'] += 1
+                # The server rejected us, so don't allow a burst right after the pause
+                self.request_tokens = min(self.request_tokens, 1.0)
+
+    def record_usage(self, tokens: int) -> None:
+        """
+        Debit tokens that were not known when the request was acquired (e.g. output tokens)
+
+        Args:
+            tokens (int): Additional tokens consumed
+        """
+        with self.lock:
+            self.token_tokens -= tokens
+            self.stats['tokens_used'] += tokens
+
+    def headroom(self) -> Dict:
+        """
+        Get the currently available quota
+
+        Returns:
+            dict: Available requests and tokens, and seconds left in any pause
+        """
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                'requests': self.request_tokens,
+                'tokens': self.token_tokens,
+                'paused_for': max(0.0, self.paused_until - now)
+            }
+
+    def get_stats(self) -> Dict:
+        """
+        Get limiter statistics
+
+        Returns:
+            dict: Counters, configured quota and current headroom
+        """
+        stats = self.headroom()
+        with self.lock:
+            stats.update(self.stats)
+        stats['requests_per_minute'] = self.requests_per_minute
+        stats['tokens_per_minute'] = self.tokens_per_minute
+        return stats
+
+    def __str__(self):
+        return f"TokenBucketRateLimiter(rpm={self.requests_per_minute}, tpm={self.tokens_per_minute})"
+
+
+_rate_limiter: Optional[TokenBucketRateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> TokenBucketRateLimiter:
+    """
+    Get the process-wide rate limiter, sized from GEMINI_RPM / GEMINI_TPM per API key
+
+    Returns:
+        TokenBucketRateLimiter: Shared limiter instance
+    """
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            # Every key in GEMINI_API_KEYS brings its own quota
+            from utils.key_pool import load_api_keys
+            keys = max(1, len(load_api_keys()))
+            _rate_limiter = TokenBucketRateLimiter(
+                requests_per_minute=float(os.getenv('GEMINI_RPM', '15')) * keys,
+                tokens_per_minute=float(os.getenv('GEMINI_TPM', '1000000')) * keys
+            )
+            print(f" Rate limiter initialized: {_rate_limiter}")
+        return _rate_limiter
@@ -0,0 +1,266 @@
+"""
+Response Cache - Content-addressed cache for LLM completions
+In-memory LRU tier in front of a size-bounded on-disk tier, both with TTLs
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl_seconds: Optional[float] = 86400,
+        disk_dir: Optional[str] = None,
+        max_disk_bytes: int = 50 * 1024 * 1024,
+        disk_ttl_seconds: Optional[float] = 7 * 86400
+    ):
+        """
+        Initialize the response cache
+
+        Args:
+            max_entries (int): Maximum entries in the in-memory LRU tier
+            ttl_seconds (float): Lifetime of in-memory entries (None disables)
+            disk_dir (str): Directory for the on-disk tier (None disables it)
+            max_disk_bytes (int): Size limit of the on-disk tier
+            disk_ttl_seconds (float): Lifetime of on-disk entries (None disables)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.disk_ttl_seconds = disk_ttl_seconds
+
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.disk_lock = threading.Lock()
+        self.disk_bytes = 0
+        self.stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'bypassed': 0,
+            'sets': 0,
+            'memory_evictions': 0,
+            'disk_evictions': 0,
+            'expired': 0
+        }
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self.disk_bytes = sum(entry.stat().st_size for entry in self._disk_entries())
+
+        print(f" Response Cache initialized (memory={max_entries} entries, disk={disk_dir or 'off'})")
+
+    @classmethod
+    def from_env(cls) -> Optional['ResponseCache']:
+        """
+        Create a cache from GEMINI_CACHE_* environment variables
+
+        Returns:
+            ResponseCache: Configured cache, or None unless GEMINI_CACHE_ENABLED=true
+        """
+        if os.getenv('GEMINI_CACHE_ENABLED', 'false').lower() != 'true':
+            return None
+
+        return cls(
+            max_entries=int(os.getenv('GEMINI_CACHE_MAX_ENTRIES', '256')),
+            ttl_seconds=float(os.getenv('GEMINI_CACHE_TTL_SECONDS', '86400')),
+            disk_dir=os.getenv('GEMINI_CACHE_DIR') or None,
+            max_disk_bytes=int(os.getenv('GEMINI_CACHE_MAX_DISK_MB', '50')) * 1024 * 1024,
+            disk_ttl_seconds=float(os.getenv('GEMINI_CACHE_DISK_TTL_SECONDS', str(7 * 86400)))
+        )
+
+    @staticmethod
+    def make_key(model_name: str, prompt: str, temperature: float, top_p: float, top_k: int, max_tokens: int) -> str:
+        """
+        Build the cache key for a generation request
+
+        Args:
+            model_name (str): Model used for generation
+            prompt (str): The input prompt
+            temperature (float): Sampling temperature
+            top_p (float): Nucleus sampling parameter
+            top_k (int): Top-k sampling parameter
+            max_tokens (int): Maximum output tokens
+
+        Returns:
+            str: Hex digest identifying the request
+        """
+        prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        material = json.dumps([model_name, prompt_hash, temperature, top_p, top_k, max_tokens])
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response, checking memory first and then disk
+
+        Args:
+            key (str): Key from make_key()
+
+        Returns:
+            str: Cached response, or None on a miss
+        """
+        now = time.time()
+
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                if self.ttl_seconds and now - entry['created'] > self.ttl_seconds:
+                    del self.memory[key]
+                    self.stats['expired'] += 1
+                else:
+                    self.memory.move_to_end(key)
+                    self.stats['memory_hits'] += 1
+                    return entry['value']
+
+        entry = self._disk_get(key, now)
+        if entry is not None:
+            self._memory_set(key, entry)
+            with self.lock:
+                self.stats['disk_hits'] += 1
+            return entry['value']
+
+        with self.lock:
+            self.stats['misses'] += 1
+        return None
+
+    def set(self, key: str, value: str) -> None:
+        """
+        Store a response in both tiers
+
+        Args:
+            key (str): Key from make_key()
+            value (str): Response text
+        """
+        entry = {'created': time.time(), 'value': value}
+        self._memory_set(key, entry)
+        self._disk_set(key, entry)
+        with self.lock:
+            self.stats['sets'] += 1
+
+    def record_bypass(self) -> None:
+        """Count a request that skipped the cache"""
+        with self.lock:
+            self.stats['bypassed'] += 1
+
+    def clear(self) -> None:
+        """Remove all entries from both tiers"""
+        with self.lock:
+            self.memory.clear()
+
+        if self.disk_dir:
+            with self.disk_lock:
+                for entry in self._disk_entries():
+                    self._remove_file(entry.path)
+                self.disk_bytes = 0
+
+    def get_stats(self) -> Dict:
+        """
+        Get hit/miss counters and tier occupancy
+
+        Returns:
+            dict: Cache statistics
+        """
+        with self.lock:
+            stats = dict(self.stats)
+            stats['memory_entries'] = len(self.memory)
+        stats['disk_bytes'] = self.disk_bytes
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
+
+    def _memory_set(self, key: str, entry: Dict) -> None:
+        with self.lock:
+            self.memory[key] = entry
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.max_entries:
+                self.memory.popitem(last=False)
+                self.stats['memory_evictions'] += 1
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _disk_entries(self):
+        return [entry for entry in os.scandir(self.disk_dir) if entry.name.endswith('.json')]
+
+    def _disk_get(self, key: str, now: float) -> Optional[Dict]:
+        if not self.disk_dir:
+            return None
+
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if self.disk_ttl_seconds and now - entry.get('created', 0) > self.disk_ttl_seconds:
+            with self.disk_lock:
+                self.disk_bytes -= self._remove_file(path)
+            with self.lock:
+                self.stats['expired'] += 1
+            return None
+
+        # Touch the file so size-based eviction removes least recently used entries first
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return entry
+
+    def _disk_set(self, key: str, entry: Dict) -> None:
+        if not self.disk_dir:
+            return
+
+        path = self._disk_path(key)
+        data = json.dumps(entry).encode('utf-8')
+        if len(data) > self.max_disk_bytes:
+            return
+
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with self.disk_lock:
+            try:
+                old_size = os.path.getsize(path) if os.path.exists(path) else 0
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"Warning: Could not write cache entry: {e}")
+                return
+
+            self.disk_bytes += len(data) - old_size
+            if self.disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        """Remove least recently used files until the disk tier fits (caller holds disk_lock)"""
+        entries = sorted(self._disk_entries(), key=lambda entry: entry.stat().st_mtime)
+        self.disk_bytes = sum(entry.stat().st_size for entry in entries)
+
+        for entry in entries:
+            if self.disk_bytes <= self.max_disk_bytes:
+                break
+            self.disk_bytes -= self._remove_file(entry.path)
+            with self.lock:
+                self.stats['disk_evictions'] += 1
+
+    def _remove_file(self, path: str) -> int:
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            return size
+        except OSError:
+            return 0
+
+    def __len__(self):
+        return len(self.memory)
+
+    def __str__(self):
+        return f"ResponseCache(memory={len(self.memory)}, disk_bytes={self.disk_bytes})"
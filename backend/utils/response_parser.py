@@ -0,0 +1,421 @@
+"""
+Response Parser - Splits the combined debate completion into agent sections
+Supports incremental parsing of streamed chunks, a tolerant single-pass
+parser for complete completions that counts parse failures and repairs,
+and validation of JSON-mode completions
+"""
+
+import json
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+# Section markers in the order the combined prompt asks for them
+AGENT_MARKERS = [
+    ('pro', '[PRO_AGENT]'),
+    ('con', '[CON_AGENT]'),
+    ('moderator', '[MODERATOR]'),
+]
+
+AGENT_NAMES = {'pro': 'Pro', 'con': 'Con', 'moderator': 'Moderator'}
+
+# The exact markers the prompt asks for at the start of a line, optionally wrapped
+# in markdown (**[CON_AGENT]**)
+EXACT_MARKER_RE = re.compile(
+    r'^[ \t>#*_]*\[(?P<bracketed>PRO_AGENT|CON_AGENT|MODERATOR)\][*_ \t]*:?[*_ \t]*',
+    re.MULTILINE
+)
+
+# Markdown that may precede a marker on its line
+_MARKUP_PREFIX_RE = re.compile(r'[ \t>#*_]*')
+
+# Marker spellings models produce when they skip the exact ones: [Pro Agent], [PRO]:,
+# or a bare "## MODERATOR" / "CON AGENT:" heading. Only used for agents without an
+# exact marker, and anchored to the start of a line so an inline "as [CON] argued" in
+# an argument is not taken for a marker
+SECTION_MARKER_RE = re.compile(
+    r'^[ \t>#*_]*\[\s*(?P<bracketed>PRO[ _-]?AGENT|CON[ _-]?AGENT|MODERATOR|PRO|CON)\s*\][*_ \t]*:?[*_ \t]*'
+    r'|^[ \t>#*_]*(?P<bare>PRO[ _-]?AGENT|CON[ _-]?AGENT|MODERATOR)[ \t*_]*:?[ \t*_]*$',
+    re.IGNORECASE | re.MULTILINE
+)
+
+# Round headers of multi-round completions ([ROUND 3], **Round 3:**, ## ROUND 3)
+ROUND_MARKER_RE = re.compile(
+    r'^[ \t>#*_]*\[?\s*ROUND[ \t]+(?P<round>\d+)\s*\]?[ \t*_]*:?[ \t*_]*$',
+    re.IGNORECASE | re.MULTILINE
+)
+
+# Code fence lines wrapping the whole completion (```text ... ```)
+_FENCE_RE = re.compile(r'^[ \t]*```[\w-]*[ \t]*$', re.MULTILINE)
+
+# Horizontal rules models put between sections
+_TRAILING_RULE_RE = re.compile(r'(?:\n[ \t]*(?:-{3,}|\*{3,}|_{3,})[ \t]*)+$')
+
+_MARKER_AGENTS = {
+    'PROAGENT': 'pro', 'PRO': 'pro',
+    'CONAGENT': 'con', 'CON': 'con',
+    'MODERATOR': 'moderator'
+}
+
+
+# Schema requested in JSON output mode (the OpenAPI subset Gemini's response_schema accepts)
+DEBATE_RESPONSE_SCHEMA = {
+    'type': 'OBJECT',
+    'properties': {
+        'pro': {'type': 'STRING'},
+        'pro_key_points': {'type': 'ARRAY', 'items': {'type': 'STRING'}},
+        'con': {'type': 'STRING'},
+        'con_key_points': {'type': 'ARRAY', 'items': {'type': 'STRING'}},
+        'moderator': {'type': 'STRING'},
+        'moderator_key_points': {'type': 'ARRAY', 'items': {'type': 'STRING'}}
+    },
+    'required': ['pro', 'con', 'moderator']
+}
+
+
+def missing_placeholder(agent: str) -> str:
+    """Placeholder text for a section that could not be parsed"""
+    return f"Error: Could not parse {AGENT_NAMES[agent]} response"
+
+
+def parse_sections(text: str) -> Dict[str, str]:
+    """
+    Split a complete combined completion into agent sections in one pass
+
+    Uses the exact [PRO_AGENT] / [CON_AGENT] / [MODERATOR] markers, and
+    marker variants at the start of a line for agents without an exact marker
+    (so a model mixing [PRO_AGENT] with [Con Agent] still splits). Any section
+    order and markdown / code fence wrapping are accepted.
+    Text before the first marker is dropped; if an agent's marker appears more
+    than once, its first non-empty section is kept.
+
+    Args:
+        text (str): Combined completion
+
+    Returns:
+        dict: agent -> section text, only for sections that were found
+    """
+    text = _FENCE_RE.sub('', text)
+    sections = {}
+    current = None
+    start = 0
+
+    markers = [(match, _marker_agent(match)) for match in EXACT_MARKER_RE.finditer(text)]
+    exact_agents = {agent for _, agent in markers}
+    if len(exact_agents) < len(AGENT_MARKERS):
+        markers += [
+            (match, agent) for match, agent in
+            ((match, _marker_agent(match)) for match in SECTION_MARKER_RE.finditer(text))
+            if agent not in exact_agents
+        ]
+        markers.sort(key=lambda marker: marker[0].start())
+
+    for match, agent in markers:
+        if current:
+            _add_section(sections, current, text[start:match.start()])
+        current = agent
+        start = match.end()
+
+    if current:
+        _add_section(sections, current, text[start:])
+
+    return sections
+
+
+def split_rounds(text: str) -> Dict[int, str]:
+    """
+    Split a multi-round completion into the text of each round
+
+    Text before the first round header is dropped; if a round number appears
+    more than once, its first block is kept.
+
+    Args:
+        text (str): Completion with [ROUND n] headers, each followed by agent sections
+
+    Returns:
+        dict: {round number: round text} for every header found
+    """
+    rounds = {}
+    matches = list(ROUND_MARKER_RE.finditer(text))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        rounds.setdefault(int(match.group('round')), text[match.end():end])
+    return rounds
+
+
+def parse_json_response(text: str) -> Optional[Dict]:
+    """
+    Validate a JSON-mode completion against DEBATE_RESPONSE_SCHEMA
+
+    The three agent fields must be non-empty strings. Key point arrays are
+    optional; non-string entries are dropped rather than failing the round.
+
+    Args:
+        text (str): Completion expected to contain one JSON object
+
+    Returns:
+        dict: {'pro', 'con', 'moderator'} plus 'key_points' {agent: [...]} when
+              present, or None if the completion is not valid
+    """
+    text = _FENCE_RE.sub('', text)
+    start, end = text.find('{'), text.rfind('}')
+    if start == -1 or end < start:
+        return None
+
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    responses = {}
+    for agent, _ in AGENT_MARKERS:
+        value = data.get(agent)
+        if not isinstance(value, str) or not value.strip():
+            return None
+        responses[agent] = value.strip()
+
+    key_points = {}
+    for agent, _ in AGENT_MARKERS:
+        points = data.get(f'{agent}_key_points')
+        if isinstance(points, list):
+            points = [point.strip() for point in points if isinstance(point, str) and point.strip()]
+            if points:
+                key_points[agent] = points
+    if key_points:
+        responses['key_points'] = key_points
+
+    return responses
+
+
+def _marker_agent(match) -> str:
+    return _MARKER_AGENTS[re.sub(r'[ _-]', '', match.group(match.lastgroup)).upper()]
+
+
+def _add_section(sections: Dict[str, str], agent: str, content: str) -> None:
+    content = _TRAILING_RULE_RE.sub('', content.strip()).strip()
+    if content and agent not in sections:
+        sections[agent] = content
+
+
+class CombinedResponseParser:
+    """
+    Parses complete combined completions with parse_sections() and keeps
+    counters of parse failures and of repairs of missing sections
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stats = {
+            'parsed': 0,
+            'complete': 0,
+            'failures': 0,
+            'missing_sections': 0,
+            'repaired': 0,
+            'repair_failures': 0,
+            'json_parsed': 0,
+            'json_failures': 0
+        }
+        self.missing_by_agent = {agent: 0 for agent, _ in AGENT_MARKERS}
+
+    def parse(self, text: str) -> Tuple[Dict[str, str], List[str]]:
+        """
+        Parse a combined completion
+
+        Args:
+            text (str): Combined completion
+
+        Returns:
+            tuple: (sections dict, list of missing agents in pro, con, moderator order)
+        """
+        sections = parse_sections(text)
+        missing = [agent for agent, _ in AGENT_MARKERS if agent not in sections]
+
+        with self.lock:
+            self.stats['parsed'] += 1
+            if missing:
+                self.stats['failures'] += 1
+                self.stats['missing_sections'] += len(missing)
+                for agent in missing:
+                    self.missing_by_agent[agent] += 1
+            else:
+                self.stats['complete'] += 1
+
+        return sections, missing
+
+    def parse_json(self, text: str) -> Optional[Dict]:
+        """
+        Validate a JSON-mode completion with parse_json_response()
+
+        Args:
+            text (str): Completion expected to contain one JSON object
+
+        Returns:
+            dict: Validated responses, or None if the caller should fall back to markers
+        """
+        responses = parse_json_response(text)
+        with self.lock:
+            self.stats['json_parsed'] += 1
+            if responses is None:
+                self.stats['json_failures'] += 1
+        return responses
+
+    def record_repair(self, success: bool) -> None:
+        """Count the outcome of regenerating one missing section"""
+        with self.lock:
+            self.stats['repaired' if success else 'repair_failures'] += 1
+
+    def get_stats(self) -> Dict:
+        """
+        Get parse and repair counters
+
+        Returns:
+            dict: Counters, missing sections per agent, and parse failure, repair and JSON failure rates
+        """
+        with self.lock:
+            stats = dict(self.stats)
+            stats['missing_by_agent'] = dict(self.missing_by_agent)
+        repairs = stats['repaired'] + stats['repair_failures']
+        stats['parse_failure_rate'] = stats['failures'] / stats['parsed'] if stats['parsed'] else 0.0
+        stats['repair_rate'] = stats['repaired'] / repairs if repairs else 0.0
+        stats['json_failure_rate'] = stats['json_failures'] / stats['json_parsed'] if stats['json_parsed'] else 0.0
+        return stats
+
+
+class StreamingSectionParser:
+    """
+    Incrementally parses [PRO_AGENT] / [CON_AGENT] / [MODERATOR] sections
+    from a stream of text chunks.
+
+    Like parse_sections, only markers at the start of a line (optionally
+    markdown-wrapped) switch sections, so an inline "[CON_AGENT]" mention stays
+    in the argument. Markers may be split across chunk boundaries, so a last
+    line that could still become a marker line is held back until the next
+    chunk (or finish()) resolves it.
+    """
+
+    def __init__(self):
+        self.current_agent = None
+        self.sections = {agent: '' for agent, _ in AGENT_MARKERS}
+        self.completed = []
+        self._buffer = ''
+        self._leading = True
+        # Whether the buffer starts at the start of a line
+        self._line_start = True
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        """
+        Feed a chunk of streamed text
+
+        Args:
+            chunk (str): Newly received text
+
+        Returns:
+            list: (event, payload) tuples, where event is 'delta' with
+                  payload (agent, text) or 'agent_done' with payload agent
+        """
+        self._buffer += chunk
+        return self._drain(final=False)
+
+    def finish(self) -> List[Tuple[str, str]]:
+        """
+        Flush any held-back text once the stream has ended
+
+        Returns:
+            list: Remaining (event, payload) tuples
+        """
+        events = self._drain(final=True)
+        if self.current_agent and self.current_agent not in self.completed:
+            self.sections[self.current_agent] = self.sections[self.current_agent].strip()
+            self.completed.append(self.current_agent)
+            events.append(('agent_done', self.current_agent))
+        return events
+
+    def get_responses(self) -> Dict[str, str]:
+        """
+        Get the parsed sections, with the same error placeholders as the
+        non-streaming parser for sections that never appeared
+
+        Returns:
+            dict: {'pro': '...', 'con': '...', 'moderator': '...'}
+        """
+        return {
+            agent: self.sections[agent].strip() or missing_placeholder(agent)
+            for agent, _ in AGENT_MARKERS
+        }
+
+    def _drain(self, final: bool) -> List[Tuple[str, str]]:
+        events = []
+
+        while self._buffer:
+            match = self._find_next_marker()
+
+            if match is not None and (match.end() < len(self._buffer) or final):
+                # Emit text before the marker to the current section, then switch
+                self._emit_raw(self._buffer[:match.start()], events)
+                self._buffer = self._buffer[match.end():]
+                self._line_start = False
+
+                if self.current_agent and self.current_agent not in self.completed:
+                    self.sections[self.current_agent] = self.sections[self.current_agent].strip()
+                    self.completed.append(self.current_agent)
+                    events.append(('agent_done', self.current_agent))
+
+                self.current_agent = _marker_agent(match)
+                self._leading = True
+                continue
+
+            # No complete marker (or one that may still grow, e.g. "**" after it) -
+            # emit everything except a last line that may turn into a marker line
+            if final:
+                safe_len = len(self._buffer)
+            elif match is not None:
+                safe_len = match.start()
+            else:
+                line_start = self._buffer.rfind('\n') + 1
+                if (line_start or self._line_start) and self._may_be_marker(self._buffer[line_start:]):
+                    safe_len = line_start
+                else:
+                    safe_len = len(self._buffer)
+
+            text, self._buffer = self._buffer[:safe_len], self._buffer[safe_len:]
+            self._emit_raw(text, events)
+            break
+
+        return events
+
+    def _find_next_marker(self):
+        """First exact marker at the start of a line (inline mentions are argument text)"""
+        for match in EXACT_MARKER_RE.finditer(self._buffer):
+            # ^ also matches at the buffer start, which is a line start only after a newline
+            if match.start() > 0 or self._line_start:
+                return match
+        return None
+
+    @staticmethod
+    def _may_be_marker(line: str) -> bool:
+        """Whether an unfinished line could still become a marker line"""
+        rest = line[_MARKUP_PREFIX_RE.match(line).end():]
+        return any(marker.startswith(rest) for _, marker in AGENT_MARKERS)
+
+    def _emit_raw(self, text: str, events: List) -> None:
+        if text:
+            self._line_start = text.endswith('\n')
+            self._emit_text(text, events)
+
+    def _emit_text(self, text: str, events: List) -> None:
+        # Text before the first marker (preamble) is dropped
+        if not text or not self.current_agent:
+            return
+
+        # Strip whitespace that directly follows a marker
+        if self._leading:
+            text = text.lstrip()
+            if not text:
+                return
+            self._leading = False
+
+        self.sections[self.current_agent] += text
+        events.append(('delta', (self.current_agent, text)))
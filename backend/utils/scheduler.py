@@ -0,0 +1,212 @@
+"""
+LLM Scheduler - Fair admission of generation calls across sessions
+Queues calls per session and priority, grants a bounded number of concurrent
+slots, and round-robins between sessions so one busy session can't crowd out others
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+# Lower value = served first
+PRIORITY_INTERACTIVE = 0    # /debate/start - a user is waiting for a new debate
+PRIORITY_CONTINUATION = 1   # /debate/next-round - a user is waiting for the next round
+PRIORITY_PREFETCH = 2       # Speculative background rounds
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: 'interactive',
+    PRIORITY_CONTINUATION: 'continuation',
+    PRIORITY_PREFETCH: 'prefetch'
+}
+
+
+class _Ticket:
+    __slots__ = ('session_id', 'priority', 'enqueued', 'event', 'granted')
+
+    def __init__(self, session_id: str, priority: int):
+        self.session_id = session_id
+        self.priority = priority
+        self.enqueued = time.monotonic()
+        self.event = threading.Event()
+        self.granted = False
+
+
+class FairScheduler:
+    def __init__(self, max_concurrent: int = 4, wait_window: int = 1000):
+        """
+        Initialize the scheduler
+
+        Args:
+            max_concurrent (int): Generation calls allowed to run at once
+            wait_window (int): Recent queue waits kept per priority for percentiles
+        """
+        self.max_concurrent = max_concurrent
+        # One queue per priority: session_id -> deque of waiting tickets, in round-robin order
+        self.queues = {priority: OrderedDict() for priority in PRIORITY_NAMES}
+        self.active = 0
+        self.lock = threading.Lock()
+        self.wait_times = {priority: deque(maxlen=wait_window) for priority in PRIORITY_NAMES}
+        self.stats = {
+            'submitted': 0,
+            'granted': 0,
+            'timeouts': 0,
+            'promoted': 0
+        }
+        print(f" LLM Scheduler initialized (max_concurrent={max_concurrent})")
+
+    @contextmanager
+    def slot(self, session_id: str, priority: int = PRIORITY_CONTINUATION, timeout: Optional[float] = None):
+        """
+        Hold a generation slot for the duration of a with-block
+
+        Args:
+            session_id (str): Session the call belongs to
+            priority (int): PRIORITY_INTERACTIVE, PRIORITY_CONTINUATION or PRIORITY_PREFETCH
+            timeout (float): Maximum seconds to wait in the queue (None waits forever)
+
+        Yields:
+            float: Seconds spent waiting in the queue
+        """
+        waited = self.acquire(session_id, priority, timeout)
+        try:
+            yield waited
+        finally:
+            self.release()
+
+    def acquire(self, session_id: str, priority: int = PRIORITY_CONTINUATION, timeout: Optional[float] = None) -> float:
+        """
+        Wait for a generation slot; release() must be called when the call is done
+
+        Args:
+            session_id (str): Session the call belongs to
+            priority (int): PRIORITY_INTERACTIVE, PRIORITY_CONTINUATION or PRIORITY_PREFETCH
+            timeout (float): Maximum seconds to wait in the queue (None waits forever)
+
+        Returns:
+            float: Seconds spent waiting in the queue
+
+        Raises:
+            TimeoutError: If no slot was granted within timeout
+        """
+        ticket = _Ticket(session_id, priority)
+
+        with self.lock:
+            self.stats['submitted'] += 1
+            self.queues[priority].setdefault(session_id, deque()).append(ticket)
+            self._dispatch()
+
+        if not ticket.event.wait(timeout):
+            with self.lock:
+                # The slot may have been granted just after the wait timed out
+                if not ticket.granted:
+                    self._remove(ticket)
+                    self.stats['timeouts'] += 1
+                    raise TimeoutError(f"No generation slot within {timeout}s")
+
+        return time.monotonic() - ticket.enqueued
+
+    def release(self) -> None:
+        """Return a slot and hand it to the next waiting call"""
+        with self.lock:
+            self.active -= 1
+            self._dispatch()
+
+    def promote(self, session_id: str, priority: int) -> int:
+        """
+        Raise queued calls of a session to a higher priority, e.g. when a user
+        starts waiting on a round that was queued as a prefetch
+
+        Args:
+            session_id (str): Session whose calls are promoted
+            priority (int): New priority
+
+        Returns:
+            int: Number of calls promoted
+        """
+        promoted = 0
+        with self.lock:
+            for old_priority, queue in self.queues.items():
+                if old_priority <= priority or session_id not in queue:
+                    continue
+                tickets = queue.pop(session_id)
+                for ticket in tickets:
+                    ticket.priority = priority
+                self.queues[priority].setdefault(session_id, deque()).extend(tickets)
+                promoted += len(tickets)
+            self.stats['promoted'] += promoted
+        return promoted
+
+    def _dispatch(self) -> None:
+        """Grant free slots to waiting calls (caller holds self.lock)"""
+        while self.active < self.max_concurrent:
+            ticket = self._next_ticket()
+            if ticket is None:
+                break
+            self.active += 1
+            ticket.granted = True
+            self.stats['granted'] += 1
+            self.wait_times[ticket.priority].append(time.monotonic() - ticket.enqueued)
+            ticket.event.set()
+
+    def _next_ticket(self) -> Optional[_Ticket]:
+        """Oldest call of the next session in round-robin order at the highest waiting priority"""
+        for priority in sorted(self.queues):
+            queue = self.queues[priority]
+            if not queue:
+                continue
+            session_id, tickets = next(iter(queue.items()))
+            ticket = tickets.popleft()
+            if tickets:
+                queue.move_to_end(session_id)
+            else:
+                del queue[session_id]
+            return ticket
+        return None
+
+    def _remove(self, ticket: _Ticket) -> None:
+        queue = self.queues[ticket.priority]
+        tickets = queue.get(ticket.session_id)
+        if tickets is not None and ticket in tickets:
+            tickets.remove(ticket)
+            if not tickets:
+                del queue[ticket.session_id]
+
+    def get_stats(self) -> Dict:
+        """
+        Get queue depth and wait-time statistics
+
+        Returns:
+            dict: Counters, active slots, and per-priority queue depth and wait percentiles (ms)
+        """
+        with self.lock:
+            stats = dict(self.stats)
+            stats['active'] = self.active
+            stats['max_concurrent'] = self.max_concurrent
+            stats['queued'] = 0
+
+            for priority, name in PRIORITY_NAMES.items():
+                queue = self.queues[priority]
+                depth = sum(len(tickets) for tickets in queue.values())
+                waits = sorted(self.wait_times[priority])
+                stats['queued'] += depth
+                stats[name] = {
+                    'queued': depth,
+                    'sessions': len(queue),
+                    'wait_p50_ms': _percentile(waits, 50) * 1000,
+                    'wait_p95_ms': _percentile(waits, 95) * 1000,
+                    'wait_p99_ms': _percentile(waits, 99) * 1000,
+                    'wait_max_ms': (waits[-1] if waits else 0.0) * 1000
+                }
+        return stats
+
+    def __str__(self):
+        return f"FairScheduler(active={self.active}, max_concurrent={self.max_concurrent})"
+
+
+def _percentile(ordered, pct) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
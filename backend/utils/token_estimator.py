@@ -0,0 +1,184 @@
+"""
+Token Estimator - Offline token counts without a count_tokens round trip
+Estimates Gemini token counts from the text's word, number, punctuation and
+non-ASCII pieces, memoizes the results in an LRU keyed by text hash, and can
+calibrate its scale against real counts seen during normal traffic
+"""
+
+import hashlib
+import math
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+# Word pieces: ASCII letter runs, digit runs, single non-space symbols / non-ASCII characters
+_PIECE_RE = re.compile(r"[A-Za-z]+|\d+|\S")
+
+# SentencePiece-style vocabularies keep short words whole and split long ones
+WORD_CHARS_PER_TOKEN = 6
+DIGITS_PER_TOKEN = 1
+
+# Calibration scale bounds and the samples needed before it is applied
+MIN_SCALE = 0.5
+MAX_SCALE = 2.0
+MIN_CALIBRATION_SAMPLES = 5
+
+
+def raw_token_estimate(text: str) -> int:
+    """
+    Uncalibrated token estimate
+
+    Args:
+        text (str): Input text
+
+    Returns:
+        int: Estimated token count
+    """
+    tokens = 0
+    for piece in _PIECE_RE.findall(text):
+        first = piece[0]
+        if first.isascii() and first.isalpha():
+            tokens += math.ceil(len(piece) / WORD_CHARS_PER_TOKEN)
+        elif first.isdigit():
+            tokens += math.ceil(len(piece) / DIGITS_PER_TOKEN)
+        else:
+            tokens += 1
+    return tokens
+
+
+class TokenEstimator:
+    def __init__(self, max_entries: int = 4096, calibration: bool = True, decay: float = 0.98):
+        """
+        Initialize the estimator with an empty memo and a neutral scale
+
+        Args:
+            max_entries (int): Raw estimates kept in the LRU memo
+            calibration (bool): Learn a scale factor from calibrate() samples
+            decay (float): Weight kept by earlier samples on each new one, so the
+                           scale follows changes in traffic
+        """
+        self.max_entries = max_entries
+        self.calibration = calibration
+        self.decay = decay
+
+        # text hash -> raw estimate, least recently used first
+        self.memo = OrderedDict()
+        self.scale = 1.0
+        self.actual_sum = 0.0
+        self.estimated_sum = 0.0
+        self.lock = threading.Lock()
+        self.stats = {
+            'estimates': 0,
+            'memo_hits': 0,
+            'calibration_samples': 0,
+            'abs_error_sum': 0.0
+        }
+        print(f" Token Estimator initialized (memo={max_entries}, calibration={calibration})")
+
+    @staticmethod
+    def _key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+    def _raw(self, text: str) -> int:
+        """Raw estimate through the memo"""
+        key = self._key(text)
+        with self.lock:
+            self.stats['estimates'] += 1
+            raw = self.memo.get(key)
+            if raw is not None:
+                self.memo.move_to_end(key)
+                self.stats['memo_hits'] += 1
+                return raw
+
+        raw = raw_token_estimate(text)
+
+        with self.lock:
+            self.memo[key] = raw
+            while len(self.memo) > self.max_entries:
+                self.memo.popitem(last=False)
+        return raw
+
+    def estimate(self, text: str) -> int:
+        """
+        Estimate the token count of a text
+
+        Args:
+            text (str): Input text
+
+        Returns:
+            int: Calibrated token estimate (at least 1)
+        """
+        if not text:
+            return 1
+        return max(1, round(self._raw(text) * self.scale))
+
+    def calibrate(self, text: str, actual_tokens: int) -> None:
+        """
+        Record the real token count of a text (e.g. usage metadata of a response
+        or a remote count_tokens result) to refine the scale
+
+        Args:
+            text (str): Text that was counted
+            actual_tokens (int): Token count reported by the API
+        """
+        if not self.calibration or not text or actual_tokens <= 0:
+            return
+
+        raw = self._raw(text)
+        with self.lock:
+            self.stats['calibration_samples'] += 1
+            self.stats['abs_error_sum'] += abs(raw * self.scale - actual_tokens) / actual_tokens
+
+            self.actual_sum = self.actual_sum * self.decay + actual_tokens
+            self.estimated_sum = self.estimated_sum * self.decay + raw
+            if self.stats['calibration_samples'] >= MIN_CALIBRATION_SAMPLES:
+                self.scale = min(MAX_SCALE, max(MIN_SCALE, self.actual_sum / self.estimated_sum))
+
+    def get_stats(self) -> Dict:
+        """
+        Get memo and calibration statistics
+
+        Returns:
+            dict: Counters, memo hit rate, current scale and mean relative error
+                  of the estimates checked against real counts
+        """
+        with self.lock:
+            stats = dict(self.stats)
+            stats['memo_entries'] = len(self.memo)
+            stats['scale'] = self.scale
+        abs_error_sum = stats.pop('abs_error_sum')
+        stats['memo_hit_rate'] = stats['memo_hits'] / stats['estimates'] if stats['estimates'] else 0.0
+        samples = stats['calibration_samples']
+        stats['mean_relative_error'] = abs_error_sum / samples if samples else None
+        return stats
+
+    def __len__(self):
+        return len(self.memo)
+
+    def __str__(self):
+        return f"TokenEstimator(memo={len(self.memo)}/{self.max_entries}, scale={self.scale:.3f})"
+
+
+_token_estimator: Optional[TokenEstimator] = None
+_token_estimator_lock = threading.Lock()
+
+
+def get_token_estimator() -> TokenEstimator:
+    """
+    Get the process-wide token estimator, configured from TOKEN_ESTIMATOR_MEMO_SIZE
+    and TOKEN_CALIBRATION_ENABLED
+
+    Returns:
+        TokenEstimator: Shared estimator instance
+    """
+    global _token_estimator
+    with _token_estimator_lock:
+        if _token_estimator is None:
+            _token_estimator = TokenEstimator(
+                max_entries=int(os.getenv('TOKEN_ESTIMATOR_MEMO_SIZE', '4096')),
+                calibration=os.getenv('TOKEN_CALIBRATION_ENABLED', 'true').lower() == 'true'
+            )
+        return _token_estimator
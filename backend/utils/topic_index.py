@@ -0,0 +1,314 @@
+"""
+Topic Index - Finds previously debated topics that are near-duplicates of a new question
+Normalizes questions into word shingles, finds candidates through LSH buckets of
+one-permutation MinHash signatures and verifies them by exact Jaccard similarity
+"""
+
+import hashlib
+import re
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+
+
+# Phrases rewritten to a canonical form before shingling
+SYNONYMS = [
+    ('artificial intelligence', 'ai'),
+    ('machine learning', 'ml'),
+    ('social media', 'socialmedia'),
+    ('united states', 'us'),
+    ('usa', 'us'),
+    ('electric vehicles', 'ev'),
+    ('electric cars', 'ev'),
+    ('cryptocurrencies', 'crypto'),
+    ('cryptocurrency', 'crypto'),
+    ('children', 'kids'),
+    ('teenagers', 'teens'),
+]
+
+STOPWORDS = {
+    'a', 'an', 'the', 'of', 'to', 'be', 'is', 'are', 'was', 'were', 'it', 'its',
+    'should', 'would', 'could', 'can', 'do', 'does', 'we', 'our', 'you', 'your',
+    'in', 'on', 'for', 'and', 'or', 'that', 'this', 'there', 'will', 'must'
+}
+
+# Words that flip the proposition - questions differing in these (or in numbers) never match
+NEGATIONS = {'not', 'no', 'never', 'without', 'against', 'ban', 'banned', 'stop'}
+
+_EMPTY_BIN = (1 << 64) - 1
+
+
+def normalize_question(question: str) -> List[str]:
+    """
+    Normalize a debate question into canonical tokens
+
+    Args:
+        question (str): Raw question text
+
+    Returns:
+        list: Lowercased, accent-free tokens with synonyms folded and stopwords removed
+    """
+    text = unicodedata.normalize('NFKD', question).encode('ascii', 'ignore').decode('ascii').lower()
+    text = re.sub(r"[^a-z0-9\s]", ' ', text)
+    text = ' '.join(text.split())
+
+    for phrase, replacement in SYNONYMS:
+        text = re.sub(rf'\b{phrase}\b', replacement, text)
+
+    tokens = []
+    for token in text.split():
+        if token in STOPWORDS:
+            continue
+        # Light plural folding ("taxes" / "tax", "cars" / "car")
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def shingle(tokens: List[str]) -> Set[str]:
+    """
+    Build word unigram and bigram shingles for a token list
+
+    Args:
+        tokens (list): Normalized tokens
+
+    Returns:
+        set: Shingle strings
+    """
+    shingles = set(tokens)
+    shingles.update(f"{first} {second}" for first, second in zip(tokens, tokens[1:]))
+    return shingles
+
+
+def shingle_hashes(shingles: Set[str]) -> array:
+    """
+    Hash shingles to sorted unsigned 64-bit values
+
+    Args:
+        shingles (set): Shingles from shingle()
+
+    Returns:
+        array: Sorted, unique shingle hashes
+    """
+    return array('Q', sorted({
+        int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), 'little')
+        for s in shingles
+    }))
+
+
+class TopicIndex:
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        max_entries: int = 10000,
+        num_perm: int = 32,
+        bands: int = 8
+    ):
+        """
+        Initialize the topic index
+
+        Args:
+            threshold (float): Minimum Jaccard similarity of word shingles for a match
+            max_entries (int): Maximum stored topics; least recently used are evicted
+            num_perm (int): Signature length (a power of two)
+            bands (int): LSH bands (num_perm must be divisible by bands)
+        """
+        if num_perm & (num_perm - 1) or num_perm % bands:
+            raise ValueError("num_perm must be a power of two divisible by bands")
+
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._bin_bits = num_perm.bit_length() - 1
+        self._value_bits = 64 - self._bin_bits
+
+        self.entries = OrderedDict()
+        # Bucket key -> entry id, or a set of ids when several topics share a bucket
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self._next_id = 0
+        self.stats = {
+            'lookups': 0,
+            'hits': 0,
+            'inserts': 0,
+            'evictions': 0
+        }
+
+    def signature(self, hashes: array) -> array:
+        """
+        Compute the one-permutation MinHash signature of a shingle set
+
+        The low bits of each shingle hash pick a bin and the minimum of the
+        remaining bits is kept per bin. Empty bins borrow the value of the
+        next non-empty bin (rotation densification), tagged with the distance
+        so they only match bins densified the same way.
+
+        Args:
+            hashes (array): Shingle hashes from shingle_hashes()
+
+        Returns:
+            array: num_perm unsigned 64-bit bin minimums
+        """
+        n = self.num_perm
+        mask = n - 1
+        bin_bits = self._bin_bits
+        bins = [_EMPTY_BIN] * n
+
+        for h in hashes:
+            i = h & mask
+            value = h >> bin_bits
+            if value < bins[i]:
+                bins[i] = value
+
+        if _EMPTY_BIN in bins and len(set(bins)) > 1:
+            value_bits = self._value_bits
+            densified = list(bins)
+            for i in range(n):
+                if bins[i] != _EMPTY_BIN:
+                    continue
+                distance = 1
+                while bins[(i + distance) & mask] == _EMPTY_BIN:
+                    distance += 1
+                densified[i] = (distance << value_bits) | bins[(i + distance) & mask]
+            bins = densified
+
+        return array('Q', bins)
+
+    def _guard(self, tokens: List[str]) -> tuple:
+        """Tokens that must match exactly - negations and numbers change the proposition"""
+        return tuple(sorted({token for token in tokens if token in NEGATIONS or token.isdigit()}))
+
+    def _bucket_keys(self, signature: array, guard: tuple) -> List[int]:
+        rows = self.rows
+        return [
+            hash((band, guard) + tuple(signature[band * rows:(band + 1) * rows]))
+            for band in range(self.bands)
+        ]
+
+    def _similarity(self, query: Set[int], hashes: array) -> float:
+        """Exact Jaccard similarity of two shingle hash sets"""
+        shared = sum(1 for h in hashes if h in query)
+        union = len(query) + len(hashes) - shared
+        return shared / union if union else 1.0
+
+    def lookup(self, question: str) -> Optional[Dict]:
+        """
+        Find the most similar stored topic above the threshold
+
+        Args:
+            question (str): New debate question
+
+        Returns:
+            dict: {'question', 'similarity', 'value'} of the best match, or None
+        """
+        tokens = normalize_question(question)
+        hashes = shingle_hashes(shingle(tokens))
+        query = set(hashes)
+        guard = self._guard(tokens)
+        bucket_keys = self._bucket_keys(self.signature(hashes), guard)
+
+        with self.lock:
+            self.stats['lookups'] += 1
+
+            candidates = set()
+            for key in bucket_keys:
+                ids = self.buckets.get(key)
+                if ids is None:
+                    continue
+                if isinstance(ids, set):
+                    candidates.update(ids)
+                else:
+                    candidates.add(ids)
+
+            best = None
+            best_similarity = 0.0
+            for entry_id in candidates:
+                _, entry_hashes, entry_guard, _ = self.entries[entry_id]
+                if entry_guard != guard:
+                    continue
+                similarity = self._similarity(query, entry_hashes)
+                if similarity >= self.threshold and similarity > best_similarity:
+                    best, best_similarity = entry_id, similarity
+
+            if best is None:
+                return None
+
+            self.entries.move_to_end(best)
+            self.stats['hits'] += 1
+            entry_question, _, _, value = self.entries[best]
+            return {
+                'question': entry_question,
+                'similarity': best_similarity,
+                'value': value
+            }
+
+    def add(self, question: str, value) -> None:
+        """
+        Store a topic and its value (e.g. the generated round-1 responses)
+
+        Args:
+            question (str): Debate question
+            value: Data served for near-duplicate questions
+        """
+        tokens = normalize_question(question)
+        hashes = shingle_hashes(shingle(tokens))
+        guard = self._guard(tokens)
+        bucket_keys = self._bucket_keys(self.signature(hashes), guard)
+
+        with self.lock:
+            while self.max_entries and len(self.entries) >= self.max_entries:
+                self._evict_oldest()
+
+            entry_id = self._next_id
+            self._next_id += 1
+            # Tuples keep per-topic overhead low at 100k+ entries
+            self.entries[entry_id] = (question, hashes, guard, value)
+
+            for key in bucket_keys:
+                ids = self.buckets.get(key)
+                if ids is None:
+                    self.buckets[key] = entry_id
+                elif isinstance(ids, set):
+                    ids.add(entry_id)
+                else:
+                    self.buckets[key] = {ids, entry_id}
+
+            self.stats['inserts'] += 1
+
+    def _evict_oldest(self) -> None:
+        """Remove the least recently used topic from entries and buckets (caller holds self.lock)"""
+        entry_id, (_, hashes, guard, _) = self.entries.popitem(last=False)
+        for key in self._bucket_keys(self.signature(hashes), guard):
+            ids = self.buckets.get(key)
+            if isinstance(ids, set):
+                ids.discard(entry_id)
+                if len(ids) == 1:
+                    self.buckets[key] = ids.pop()
+            elif ids == entry_id:
+                del self.buckets[key]
+        self.stats['evictions'] += 1
+
+    def get_stats(self) -> Dict:
+        """
+        Get lookup/insert counters and occupancy
+
+        Returns:
+            dict: Index statistics
+        """
+        with self.lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self.entries)
+            stats['buckets'] = len(self.buckets)
+            stats['threshold'] = self.threshold
+        return stats
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __str__(self):
+        return f"TopicIndex(entries={len(self.entries)}, threshold={self.threshold})"
@@ -0,0 +1,129 @@
+"""
+Generation Mode Benchmark - Round latency of the combined vs parallel generation modes
+Uses a simulated model whose latency grows with output length (time to first token
+plus tokens / throughput), or the real API with --live
+Run: python benchmarks/bench_generation_modes.py --rounds 20
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+# A high quota so the limiter never throttles the simulated model
+os.environ.setdefault('GEMINI_API_KEY', 'benchmark')
+os.environ.setdefault('GEMINI_RPM', '100000')
+os.environ.setdefault('PREFETCH_ENABLED', 'false')
+os.environ.setdefault('TOPIC_INDEX_ENABLED', 'false')
+
+import app
+
+
+class SimulatedResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class SimulatedModel:
+    """Stand-in for genai.GenerativeModel with output-length dependent latency"""
+
+    def __init__(self, ttft, chars_per_second, pro_chars, con_chars, moderator_chars, seed):
+        self.ttft = ttft
+        self.chars_per_second = chars_per_second
+        self.pro_chars = pro_chars
+        self.con_chars = con_chars
+        self.moderator_chars = moderator_chars
+        self.rng = random.Random(seed)
+        self.calls = 0
+
+    def _output(self, prompt):
+        if 'You are the PRO side' in prompt:
+            return 'p' * self.pro_chars
+        if 'You are the CON side' in prompt:
+            return 'c' * self.con_chars
+        if 'neutral moderator' in prompt:
+            return 'm' * self.moderator_chars
+        return (
+            f"[PRO_AGENT]\n{'p' * self.pro_chars}\n\n"
+            f"[CON_AGENT]\n{'c' * self.con_chars}\n\n"
+            f"[MODERATOR]\n{'m' * self.moderator_chars}"
+        )
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        self.calls += 1
+        text = self._output(prompt)
+        latency = (self.ttft + len(text) / self.chars_per_second) * self.rng.uniform(0.9, 1.1)
+        await asyncio.sleep(latency)
+        return SimulatedResponse(text)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run_mode(mode, rounds, bypass_cache):
+    latencies = []
+    for i in range(rounds):
+        history = [{'role': 'user', 'content': 'Should homework be banned?'}]
+        start = time.perf_counter()
+        # The app logs every generation; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            responses = app.generate_all_responses(
+                f'Should homework be banned? ({mode} {i})', 1 + i % 3, history,
+                bypass_cache=bypass_cache, session_id=f'bench-{mode}', mode=mode
+            )
+        latencies.append(time.perf_counter() - start)
+        assert set(responses) == {'pro', 'con', 'moderator'}
+
+    return {
+        'rounds': rounds,
+        'p50_s': percentile(latencies, 50),
+        'p95_s': percentile(latencies, 95),
+        'mean_s': sum(latencies) / len(latencies),
+        'api_calls_per_round': 1 if mode == 'combined' else 3
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare round latency of combined and parallel generation')
+    parser.add_argument('--rounds', type=int, default=20, help='Rounds generated per mode')
+    parser.add_argument('--ttft', type=float, default=0.6, help='Simulated time to first token (s)')
+    parser.add_argument('--chars-per-second', type=float, default=1200, help='Simulated output throughput')
+    parser.add_argument('--pro-chars', type=int, default=1400)
+    parser.add_argument('--con-chars', type=int, default=1400)
+    parser.add_argument('--moderator-chars', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--live', action='store_true', help='Call the real Gemini API (uses quota)')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    if not args.live:
+        app.gemini_client.model = SimulatedModel(
+            args.ttft, args.chars_per_second,
+            args.pro_chars, args.con_chars, args.moderator_chars, args.seed
+        )
+
+    results = {
+        'simulated': not args.live,
+        'combined': run_mode('combined', args.rounds, bypass_cache=True),
+        'parallel': run_mode('parallel', args.rounds, bypass_cache=True)
+    }
+    results['parallel_speedup_p50'] = results['combined']['p50_s'] / results['parallel']['p50_s']
+
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
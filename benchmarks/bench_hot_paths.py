@@ -0,0 +1,271 @@
+"""
+Hot Path Benchmark - CPU time and allocations of the per-request code paths
+Prompt assembly (with the context builder's history scan), response parsing
+and session store operations, each at a realistic and a stress size (long
+histories, many sessions). No API calls are made
+Run: python benchmarks/bench_hot_paths.py --output baseline.json
+     python benchmarks/bench_hot_paths.py --baseline baseline.json
+     python benchmarks/bench_hot_paths.py --filter session --sessions 100000
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+os.environ.setdefault('LLM_PROVIDER', 'fake')
+os.environ.setdefault('PREFETCH_ENABLED', 'false')
+os.environ.setdefault('TOPIC_INDEX_ENABLED', 'false')
+os.environ.setdefault('SESSION_BACKEND', 'memory')
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import app
+    from memory.session_store import SessionStore
+    from memory.sqlite_store import SQLiteSessionStore
+    from utils.fake_provider import FakeProvider
+    from utils.response_parser import StreamingSectionParser, parse_json_response, parse_sections, split_rounds
+
+
+QUESTION = "Should cities ban private cars from their centers?"
+
+
+def make_round(rng, provider):
+    """Agent responses of one round, as the app stores them"""
+    text = provider.respond(f'"{QUESTION}" round {rng.random()}')
+    return parse_sections(text)
+
+
+def make_history(rng, provider, rounds, comments_every=2):
+    """Question, rounds of pro/con/moderator messages and an occasional comment"""
+    history = [{'role': 'user', 'content': QUESTION}]
+    for round_num in range(1, rounds + 1):
+        responses = make_round(rng, provider)
+        for agent in ('pro', 'con', 'moderator'):
+            history.append({'role': agent, 'content': responses[agent]})
+        if comments_every and round_num % comments_every == 0:
+            history.append({'role': 'user', 'content': f"What about enforcement in round {round_num}?"})
+    return history
+
+
+def seed_session(session_id, history):
+    """Store a history (and its rolling summary) in the app's session store"""
+    app.session_store.clear_session(session_id)
+    app.session_store.add_message(session_id, 'user', history[0]['content'])
+    round_num, responses = 0, {}
+    for message in history[1:]:
+        if message['role'] == 'user':
+            app.session_store.add_message(session_id, 'user', message['content'])
+            continue
+        responses[message['role']] = message['content']
+        if len(responses) == 3:
+            round_num += 1
+            app.store_round(session_id, round_num, responses)
+            responses = {}
+    return round_num
+
+
+def measure(fn, number, repeat):
+    """Per-call time (best and median of the repeats) and traced allocations"""
+    fn()  # warm up caches and lazily created state
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            fn()
+        timings.append((time.perf_counter_ns() - start) / number)
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    for _ in range(number):
+        fn()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    median = statistics.median(timings)
+    return {
+        'number': number,
+        'repeat': repeat,
+        'best_ns': min(timings),
+        'median_ns': median,
+        'ops_per_s': 1e9 / median if median else None,
+        'alloc_peak_bytes': peak - before,
+        'retained_bytes_per_op': (after - before) / number
+    }
+
+
+def prompt_cases(rng, provider):
+    cases = {}
+
+    cases['prompt.round1'] = (lambda: app.build_debate_prompt(QUESTION, 1, [], 'bench-prompt-1'), 2000)
+
+    for label, rounds in (('realistic', 4), ('long_history', 60)):
+        history = make_history(rng, provider, rounds)
+        session_id = f'bench-prompt-{label}'
+        round_num = seed_session(session_id, history) + 1
+        cases[f'prompt.continuation.{label}'] = (
+            lambda h=history, s=session_id, r=round_num: app.build_debate_prompt(QUESTION, r, h, s), 1000
+        )
+        cases[f'prompt.multi_round.{label}'] = (
+            lambda h=history, s=session_id, r=round_num: app.build_multi_round_prompt(QUESTION, r, r + 2, h, s), 1000
+        )
+
+    responses = make_round(rng, provider)
+    summary_session = 'bench-summary'
+    counter = iter(range(1, 10 ** 9))
+    cases['context.update'] = (
+        lambda: app.context_builder.update(summary_session, next(counter), responses), 2000
+    )
+    return cases
+
+
+def parse_cases(rng, provider):
+    cases = {}
+
+    marker_text = provider.respond(f'"{QUESTION}"')
+    long_marker_text = '\n\n'.join(
+        provider.respond(f'"{QUESTION}" {i}').split('[CON_AGENT]')[0] for i in range(10)
+    ) + '\n\n' + marker_text
+    json_text = provider.respond(f'"{QUESTION}" OUTPUT FORMAT OVERRIDE')
+    multi_round_text = provider.respond(f'"{QUESTION}" Rounds 2 to 4')
+
+    cases['parse.markers'] = (lambda: app.section_parser.parse(marker_text), 5000)
+    cases['parse.markers.long'] = (lambda: app.section_parser.parse(long_marker_text), 1000)
+    cases['parse.json'] = (lambda: parse_json_response(json_text), 5000)
+    cases['parse.split_rounds'] = (lambda: split_rounds(multi_round_text), 5000)
+
+    def stream_parse(chunk_chars=32):
+        parser = StreamingSectionParser()
+        for start in range(0, len(marker_text), chunk_chars):
+            parser.feed(marker_text[start:start + chunk_chars])
+        parser.finish()
+
+    cases['parse.streaming'] = (stream_parse, 500)
+    return cases
+
+
+def session_cases(rng, provider, session_count):
+    cases = {}
+    content = make_round(rng, provider)['pro']
+
+    # One session per debate, a few rounds in
+    store = SessionStore(max_sessions=1000, ttl_seconds=3600)
+    store.add_messages('realistic', [(message['role'], message['content'])
+                                     for message in make_history(rng, provider, 4)])
+    cases['session.add_message.realistic'] = (lambda: store.add_message('appends', 'pro', content), 20000)
+    cases['session.get_history.realistic'] = (lambda: store.get_history('realistic'), 20000)
+
+    # A single very long debate
+    long_store = SessionStore(max_sessions=1000, ttl_seconds=3600)
+    long_store.add_messages('long', [('pro', content)] * 2000)
+    cases['session.get_history.long_history'] = (lambda: long_store.get_history('long'), 2000)
+
+    # Many live sessions: LRU reordering, TTL checks and eviction at the cap
+    big_store = SessionStore(max_sessions=session_count, ttl_seconds=3600)
+    for i in range(session_count):
+        big_store.add_message(f'session-{i}', 'user', QUESTION)
+    ids = [f'session-{rng.randrange(session_count)}' for _ in range(4096)]
+    new_ids = (f'new-{i}' for i in range(10 ** 9))
+    lookups = iter(range(10 ** 9))
+
+    cases['session.add_message.many_sessions'] = (
+        lambda: big_store.add_message(ids[next(lookups) % len(ids)], 'pro', content), 20000
+    )
+    cases['session.get_history.many_sessions'] = (
+        lambda: big_store.get_history(ids[next(lookups) % len(ids)]), 20000
+    )
+    cases['session.new_session_with_eviction'] = (
+        lambda: big_store.add_message(next(new_ids), 'user', QUESTION), 20000
+    )
+    cases['session.get_stats.many_sessions'] = (big_store.get_stats, 20)
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix='bench-hot-paths-'), 'sessions.db')
+    sqlite_store = SQLiteSessionStore(db_path=db_path, ttl_seconds=3600)
+    sqlite_store.add_messages('realistic', [(message['role'], message['content'])
+                                            for message in make_history(rng, provider, 4)])
+    sqlite_store.flush()
+    cases['sqlite.add_message'] = (lambda: sqlite_store.add_message('appends', 'pro', content), 5000)
+    cases['sqlite.get_history.realistic'] = (lambda: sqlite_store.get_history('realistic'), 2000)
+    return cases
+
+
+def compare(results, baseline, tolerance):
+    """Benchmarks whose median time grew by more than the tolerance over the baseline"""
+    regressions = []
+    for name, current in results['benchmarks'].items():
+        previous = baseline.get('benchmarks', {}).get(name)
+        if previous and current['median_ns'] > previous['median_ns'] * (1 + tolerance):
+            regressions.append({
+                'benchmark': name,
+                'baseline_ns': previous['median_ns'],
+                'current_ns': current['median_ns'],
+                'change': current['median_ns'] / previous['median_ns'] - 1
+            })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark prompt building, parsing and session operations')
+    parser.add_argument('--filter', help='Only run benchmarks whose name contains this text')
+    parser.add_argument('--sessions', type=int, default=100000, help='Sessions in the many-sessions store')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed repeats per benchmark')
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplier for the calls per repeat')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write results as JSON to this file (use as a later --baseline)')
+    parser.add_argument('--baseline', help='Earlier --output file; exit 1 if a benchmark regressed')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Relative slowdown counted as a regression')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cases = {}
+    # The stores and the provider announce themselves on stdout, which carries the JSON
+    with contextlib.redirect_stdout(io.StringIO()):
+        provider = FakeProvider(seed=args.seed)
+        cases.update(prompt_cases(rng, provider))
+        cases.update(parse_cases(rng, provider))
+        cases.update(session_cases(rng, provider, args.sessions))
+
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'sessions': args.sessions,
+        'benchmarks': {}
+    }
+    for name, (fn, number) in cases.items():
+        if args.filter and args.filter not in name:
+            continue
+        results['benchmarks'][name] = measure(fn, max(1, int(number * args.scale)), args.repeat)
+        result = results['benchmarks'][name]
+        print(f" {name:40s} {result['median_ns'] / 1000:10.1f} us  "
+              f"{result['alloc_peak_bytes'] / 1024:8.1f} KiB peak", file=sys.stderr)
+
+    regressions = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        results['regressions'] = regressions
+
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) against {args.baseline}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
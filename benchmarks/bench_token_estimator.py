@@ -0,0 +1,154 @@
+"""
+Token Estimator Benchmark - Throughput of the offline estimator and its accuracy
+against real token counts
+Accuracy needs reference counts: --live asks the count_tokens API (uses quota) and
+--record saves them, so later runs can pass --counts instead of calling the API
+Run: python benchmarks/bench_token_estimator.py --texts 2000
+     python benchmarks/bench_token_estimator.py --live --texts 200 --record counts.jsonl
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from utils.token_estimator import TokenEstimator, raw_token_estimate
+
+
+SENTENCES = [
+    "Artificial intelligence could automate up to 30% of routine office tasks by 2030.",
+    "Critics argue that standardized testing narrows the curriculum and rewards memorization.",
+    "• Remote work saves commuters an average of 72 minutes per day",
+    "The moderator notes that both sides agree on the goal but not on the means.",
+    "Nuclear power emits roughly 12 gCO2/kWh over its life cycle, comparable to wind.",
+    "Pro's strongest point: access to education shouldn't depend on a family's income!",
+    "Con counters that subsidies distort prices; who pays when budgets tighten?",
+    "**Key clash:** individual liberty vs. collective safety (see Round 2).",
+    "Les villes européennes ont réduit le trafic de 20 % grâce aux zones piétonnes.",
+    "The data from 2019-2023 shows a 4.5x increase in e-bike sales across 14 countries.",
+    "However, implementation costs, enforcement challenges and unintended consequences remain.",
+    "[MODERATOR] Summarize the key clash in THIS round and note how the debate evolved.",
+]
+
+
+def make_texts(count, rng):
+    """Synthetic debate-like texts from a few words to a full combined prompt"""
+    texts = []
+    for _ in range(count):
+        sentences = rng.choices(SENTENCES, k=rng.choice([1, 3, 8, 20, 60]))
+        texts.append('\n'.join(sentences) + f" (#{rng.randint(0, 10 ** 6)})")
+    return texts
+
+
+def relative_error(estimate, actual):
+    return abs(estimate - actual) / actual
+
+
+def time_estimates(estimator, texts):
+    start = time.perf_counter()
+    for text in texts:
+        estimator.estimate(text)
+    elapsed = time.perf_counter() - start
+    return {
+        'estimates_per_second': len(texts) / elapsed,
+        'mb_per_second': sum(len(text) for text in texts) / elapsed / 1e6
+    }
+
+
+def measure_throughput(texts):
+    estimator = TokenEstimator(max_entries=len(texts) * 2)
+    cold = time_estimates(estimator, texts)
+    warm = time_estimates(estimator, texts)
+
+    start = time.perf_counter()
+    for text in texts:
+        len(text) // 4 + 1
+    chars_elapsed = time.perf_counter() - start
+
+    return {
+        'cold': cold,
+        'memo_hit': warm,
+        'len_div_4_estimates_per_second': len(texts) / chars_elapsed
+    }
+
+
+def fetch_remote_counts(texts):
+    """Exact counts from the count_tokens API, with per-call latency"""
+    from utils.gemini_client import get_gemini_client
+
+    model = get_gemini_client().model
+    counts, latencies = [], []
+    for text in texts:
+        start = time.perf_counter()
+        counts.append(model.count_tokens(text).total_tokens)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return counts, {
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+    }
+
+
+def measure_accuracy(texts, counts):
+    """Mean relative error of len/4, the raw estimate, and the estimate calibrated on the first half"""
+    half = len(texts) // 2
+    estimator = TokenEstimator(max_entries=len(texts) * 2)
+    for text, actual in zip(texts[:half], counts[:half]):
+        estimator.calibrate(text, actual)
+
+    evaluated = list(zip(texts[half:], counts[half:]))
+
+    def mean_error(estimate_fn):
+        return sum(relative_error(estimate_fn(text), actual) for text, actual in evaluated) / len(evaluated)
+
+    return {
+        'samples': len(evaluated),
+        'len_div_4': mean_error(lambda text: len(text) // 4 + 1),
+        'raw': mean_error(raw_token_estimate),
+        'calibrated': mean_error(estimator.estimate),
+        'scale': estimator.scale
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the offline token estimator')
+    parser.add_argument('--texts', type=int, default=2000, help='Synthetic texts to estimate')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--live', action='store_true', help='Fetch reference counts from the API (uses quota)')
+    parser.add_argument('--counts', help='JSONL of {"text", "tokens"} reference counts to check accuracy against')
+    parser.add_argument('--record', help='Save the reference counts fetched with --live to this JSONL file')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    texts = make_texts(args.texts, random.Random(args.seed))
+    results = {'texts': len(texts), 'throughput': measure_throughput(texts)}
+
+    counts = None
+    if args.counts:
+        with open(args.counts) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        texts = [record['text'] for record in records]
+        counts = [record['tokens'] for record in records]
+    elif args.live:
+        counts, results['remote_count_tokens'] = fetch_remote_counts(texts)
+        if args.record:
+            with open(args.record, 'w') as f:
+                for text, tokens in zip(texts, counts):
+                    f.write(json.dumps({'text': text, 'tokens': tokens}) + '\n')
+
+    if counts:
+        results['mean_relative_error'] = measure_accuracy(texts, counts)
+
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
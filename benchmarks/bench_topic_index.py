@@ -0,0 +1,133 @@
+"""
+Topic Index Benchmark - Insert/lookup latency and memory of TopicIndex at scale
+Run: python benchmarks/bench_topic_index.py --topics 100000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from utils.topic_index import TopicIndex
+
+
+SUBJECTS = [
+    'AI', 'social media', 'remote work', 'nuclear power', 'universal basic income', 'space exploration',
+    'electric cars', 'homework', 'school uniforms', 'cryptocurrency', 'genetic engineering', 'video games',
+    'fast food', 'public transport', 'zoos', 'standardized testing', 'the four-day week', 'self-driving cars',
+    'online voting', 'rent control', 'carbon taxes', 'free college', 'animal testing', 'nuclear weapons'
+]
+VERBS = ['be regulated', 'be banned', 'be subsidized', 'be taxed', 'be mandatory', 'replace teachers',
+         'be publicly funded', 'be expanded', 'be limited', 'be encouraged']
+AUDIENCES = ['for kids', 'in cities', 'by governments', 'in schools', 'worldwide', 'in Europe', 'for adults',
+             'in developing countries', 'at work', 'in hospitals']
+
+
+def make_topics(count, rng):
+    """Generate distinct synthetic debate questions"""
+    topics = set()
+    while len(topics) < count:
+        topics.add(
+            f"Should {rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(AUDIENCES)} "
+            f"by {rng.randint(2025, 2100)}?"
+        )
+    return list(topics)
+
+
+def perturb(question, rng):
+    """Produce a near-duplicate the way users retype a question"""
+    variants = [
+        question.lower(),
+        question.rstrip('?'),
+        question.replace('Should', 'should').replace('?', ' ?'),
+        '  ' + question.upper() + '  ',
+        question.replace('AI', 'artificial intelligence'),
+    ]
+    return rng.choice(variants)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def time_lookups(index, queries):
+    latencies = []
+    hits = 0
+    for query in queries:
+        start = time.perf_counter()
+        result = index.lookup(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += result is not None
+    return {
+        'count': len(queries),
+        'hit_rate': hits / len(queries),
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'mean_ms': sum(latencies) / len(latencies)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark TopicIndex insert and lookup')
+    parser.add_argument('--topics', type=int, default=100000, help='Number of stored topics')
+    parser.add_argument('--queries', type=int, default=2000, help='Lookups per query type')
+    parser.add_argument('--threshold', type=float, default=0.8, help='Similarity threshold')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help='Skip the traced memory build')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    topics = make_topics(args.topics, rng)
+
+    index = TopicIndex(threshold=args.threshold, max_entries=args.topics)
+
+    start = time.perf_counter()
+    for i, topic in enumerate(topics):
+        index.add(topic, {'round': 1, 'id': i})
+    insert_seconds = time.perf_counter() - start
+
+    # Memory is measured on a second build since tracing slows inserts down
+    memory_bytes = None
+    if args.memory:
+        tracemalloc.start()
+        traced_index = TopicIndex(threshold=args.threshold, max_entries=args.topics)
+        for i, topic in enumerate(topics):
+            traced_index.add(topic, {'round': 1, 'id': i})
+        memory_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del traced_index
+
+    stored = rng.sample(topics, min(args.queries, len(topics)))
+    stored_set = set(topics)
+    unseen = make_topics(args.topics + args.queries, random.Random(args.seed + 1))
+    unseen = [topic for topic in unseen if topic not in stored_set][:args.queries]
+
+    results = {
+        'topics': args.topics,
+        'threshold': args.threshold,
+        'insert_total_s': insert_seconds,
+        'insert_per_topic_us': insert_seconds / args.topics * 1e6,
+        'index_memory_mb': memory_bytes / 1024 / 1024 if memory_bytes is not None else None,
+        'lookup_exact': time_lookups(index, stored),
+        'lookup_near_duplicate': time_lookups(index, [perturb(topic, rng) for topic in stored]),
+        'lookup_unseen': time_lookups(index, unseen),
+        'index_stats': index.get_stats()
+    }
+
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
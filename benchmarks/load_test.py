@@ -0,0 +1,426 @@
+"""
+Load Test - Concurrent simulated debaters against the backend over HTTP
+Each user starts a debate, reads every round (lognormal think time), sometimes
+comments or abandons the debate, and starts a new one when it is over. Reports
+throughput, p50/p95/p99 latency and error rate per endpoint, and how the
+session store grows over the run. By default the app runs in-process on a
+local port with the fake LLM provider (LLM_PROVIDER=fake, no API key needed)
+Run: python benchmarks/load_test.py --users 50 --duration 120 --output load.json
+     python benchmarks/load_test.py --users 50 --duration 120 --baseline load.json
+     python benchmarks/load_test.py --url http://localhost:5000 --users 10
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+ENDPOINTS = ('/debate/start', '/debate/next-round', '/debate/add-comment')
+
+TOPICS = [
+    "Should homework be banned?",
+    "Is remote work better than office work?",
+    "Should social media be regulated like tobacco?",
+    "Is nuclear power the answer to climate change?",
+    "Should voting be mandatory?",
+    "Will AI create more jobs than it destroys?",
+    "Should cities ban cars from their centers?",
+    "Is a four-day work week realistic?",
+]
+
+COMMENTS = [
+    "What about the cost to taxpayers?",
+    "Con, you ignored the evidence from Finland.",
+    "Can you both address the impact on small businesses?",
+    "Pro's last point seems too optimistic.",
+]
+
+# Latency metrics compared against a baseline run
+REGRESSION_METRICS = ('p95_ms', 'p99_ms')
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def deep_sizeof(obj, seen=None):
+    """Bytes used by an object and the dicts, lists, tuples and strings it holds"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(key, seen) + deep_sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    return size
+
+
+def rss_mb():
+    """Resident memory of this process (Linux), or None"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Recorder:
+    """Latency and outcome of every request, per endpoint"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {endpoint: [] for endpoint in ENDPOINTS}
+        self.errors = {endpoint: 0 for endpoint in ENDPOINTS}
+        self.error_samples = []
+        self.debates_started = 0
+        self.debates_completed = 0
+        self.debates_abandoned = 0
+
+    def record(self, endpoint, latency, error=None):
+        with self.lock:
+            self.latencies[endpoint].append(latency)
+            if error:
+                self.errors[endpoint] += 1
+                if len(self.error_samples) < 10:
+                    self.error_samples.append(f"{endpoint}: {error}"[:200])
+
+    def count(self, counter):
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def endpoint_report(self, elapsed):
+        report = {}
+        with self.lock:
+            for endpoint in ENDPOINTS:
+                latencies = self.latencies[endpoint]
+                if not latencies:
+                    continue
+                report[endpoint] = {
+                    'requests': len(latencies),
+                    'errors': self.errors[endpoint],
+                    'error_rate': self.errors[endpoint] / len(latencies),
+                    'requests_per_s': len(latencies) / elapsed,
+                    'p50_ms': percentile(latencies, 50) * 1000,
+                    'p95_ms': percentile(latencies, 95) * 1000,
+                    'p99_ms': percentile(latencies, 99) * 1000,
+                    'mean_ms': sum(latencies) / len(latencies) * 1000,
+                    'max_ms': max(latencies) * 1000
+                }
+        return report
+
+
+def post(base_url, endpoint, payload, timeout):
+    """POST JSON; returns (latency_s, body or None, error or None)"""
+    request = urllib.request.Request(
+        base_url + endpoint,
+        data=json.dumps(payload).encode('utf-8'),
+        headers={'Content-Type': 'application/json'}
+    )
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            body = json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return time.perf_counter() - start, None, f"HTTP {e.code}"
+    except Exception as e:
+        return time.perf_counter() - start, None, f"{type(e).__name__}: {e}"
+
+    latency = time.perf_counter() - start
+    if not body.get('success', True):
+        return latency, body, body.get('error', 'success=false')
+    return latency, body, None
+
+
+class SimulatedUser(threading.Thread):
+    def __init__(self, user_id, args, base_url, recorder, stop, start_delay):
+        super().__init__(name=f'user-{user_id}', daemon=True)
+        self.user_id = user_id
+        self.args = args
+        self.base_url = base_url
+        self.recorder = recorder
+        self.stop = stop
+        self.start_delay = start_delay
+        self.rng = random.Random(args.seed * 100003 + user_id)
+
+    def think(self, median):
+        """Wait a lognormal think time; False if the test ended meanwhile"""
+        if median <= 0:
+            return not self.stop.is_set()
+        return not self.stop.wait(self.rng.lognormvariate(math.log(median), self.args.think_sigma))
+
+    def call(self, endpoint, payload):
+        latency, body, error = post(self.base_url, endpoint, payload, self.args.timeout)
+        # Requests cut off by the end of the test are not counted
+        if self.stop.is_set() and error:
+            return None
+        self.recorder.record(endpoint, latency, error)
+        return None if error else body
+
+    def run(self):
+        if self.stop.wait(self.start_delay):
+            return
+
+        debate = 0
+        while not self.stop.is_set():
+            debate += 1
+            self.run_debate(f'load-{self.user_id}-{debate}')
+            if not self.think(self.args.think_time * 2):
+                return
+
+    def run_debate(self, session_id):
+        total_rounds = self.args.rounds
+        body = self.call('/debate/start', {
+            'question': self.rng.choice(TOPICS),
+            'session_id': session_id,
+            'rounds': total_rounds
+        })
+        if body is None:
+            return
+        self.recorder.count('debates_started')
+
+        for current_round in range(1, total_rounds):
+            # Three speeches to read per round
+            if not self.think(self.args.think_time):
+                return
+            if self.rng.random() < self.args.abandon_rate:
+                self.recorder.count('debates_abandoned')
+                return
+            if self.rng.random() < self.args.comment_rate:
+                self.call('/debate/add-comment', {'session_id': session_id, 'comment': self.rng.choice(COMMENTS)})
+                if not self.think(self.args.think_time / 3):
+                    return
+
+            body = self.call('/debate/next-round', {
+                'session_id': session_id,
+                'current_round': current_round,
+                'total_rounds': total_rounds
+            })
+            if body is None:
+                return
+
+        self.recorder.count('debates_completed')
+
+
+class MemorySampler(threading.Thread):
+    """Samples session store occupancy and size at a fixed interval"""
+
+    def __init__(self, interval, stop, session_store=None, base_url=None):
+        super().__init__(name='memory-sampler', daemon=True)
+        self.interval = interval
+        self.stop = stop
+        self.session_store = session_store
+        self.base_url = base_url
+        self.samples = []
+        self.start_time = time.monotonic()
+
+    def sample(self):
+        entry = {'t_s': round(time.monotonic() - self.start_time, 1)}
+        if self.session_store is not None:
+            stats = self.session_store.get_stats()
+            if hasattr(self.session_store, 'sessions'):
+                with self.session_store.lock:
+                    entry['store_bytes'] = deep_sizeof(self.session_store.sessions)
+            else:
+                entry['store_bytes'] = sum(
+                    os.path.getsize(path) for path in (self.session_store.db_path, self.session_store.db_path + '-wal')
+                    if os.path.exists(path)
+                )
+            entry['rss_mb'] = rss_mb()
+        else:
+            try:
+                with urllib.request.urlopen(self.base_url + '/stats', timeout=10) as response:
+                    stats = json.loads(response.read())['stats']['session_store']
+            except Exception:
+                return
+        entry['sessions'] = stats['sessions']
+        entry['messages'] = stats['messages']
+        self.samples.append(entry)
+
+    def run(self):
+        self.sample()
+        while not self.stop.wait(self.interval):
+            self.sample()
+        self.sample()
+
+    def report(self):
+        if not self.samples:
+            return {}
+        first, last = self.samples[0], self.samples[-1]
+        report = {
+            'sessions_start': first['sessions'],
+            'sessions_end': last['sessions'],
+            'sessions_peak': max(sample['sessions'] for sample in self.samples),
+            'messages_end': last['messages'],
+            'samples': self.samples
+        }
+        if 'store_bytes' in last:
+            report['store_bytes_growth'] = last['store_bytes'] - first['store_bytes']
+            report['store_bytes_per_session'] = last['store_bytes'] / last['sessions'] if last['sessions'] else 0
+            report['store_bytes_per_message'] = last['store_bytes'] / last['messages'] if last['messages'] else 0
+        if last.get('rss_mb') is not None and first.get('rss_mb') is not None:
+            report['rss_mb_growth'] = last['rss_mb'] - first['rss_mb']
+        return report
+
+
+def start_local_server(app, verbose=False):
+    """Serve the Flask app on a free local port from a background thread"""
+    from werkzeug.serving import make_server
+
+    if not verbose:
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    server = make_server('127.0.0.1', 0, app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='load-test-server', daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def compare(results, baseline, tolerance, error_tolerance):
+    """
+    Endpoint metrics that got worse than the baseline: latency by more than
+    tolerance (relative), error rate by more than error_tolerance (absolute,
+    since the baseline rate is usually zero)
+    """
+    regressions = []
+    for endpoint, current in results['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(endpoint)
+        if not previous:
+            continue
+        checks = [(metric, previous[metric] > 0 and current[metric] > previous[metric] * (1 + tolerance))
+                  for metric in REGRESSION_METRICS]
+        checks.append(('error_rate', current['error_rate'] - previous['error_rate'] > error_tolerance))
+        for metric, worse in checks:
+            if worse:
+                regressions.append({
+                    'endpoint': endpoint, 'metric': metric,
+                    'baseline': previous[metric], 'current': current[metric]
+                })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the debate backend with simulated users')
+    parser.add_argument('--users', type=int, default=20, help='Concurrent simulated users')
+    parser.add_argument('--duration', type=float, default=60, help='Test length in seconds (after ramp-up starts)')
+    parser.add_argument('--ramp-up', type=float, default=10, help='Seconds over which users join')
+    parser.add_argument('--rounds', type=int, default=3, help='Rounds per debate')
+    parser.add_argument('--think-time', type=float, default=5, help='Median seconds a user spends reading a round')
+    parser.add_argument('--think-sigma', type=float, default=0.6, help='Spread of the lognormal think time')
+    parser.add_argument('--comment-rate', type=float, default=0.2, help='Chance of a comment before a round')
+    parser.add_argument('--abandon-rate', type=float, default=0.1, help='Chance of leaving before a round')
+    parser.add_argument('--timeout', type=float, default=120, help='Request timeout in seconds')
+    parser.add_argument('--sample-interval', type=float, default=5, help='Seconds between memory samples')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--url', help='Test a running server instead of an in-process one')
+    parser.add_argument('--live', action='store_true', help='In-process server with the configured LLM provider (uses quota)')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--baseline', help='Earlier --output file; exit 1 if p95/p99 latency or error rate regressed')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Relative latency increase counted as a regression')
+    parser.add_argument('--error-tolerance', type=float, default=0.01, help='Error rate increase counted as a regression')
+    parser.add_argument('--verbose', action='store_true', help='Show the app log')
+    args = parser.parse_args()
+
+    # The app (and its background prefetches) log to stdout until the process exits
+    report_out = sys.stdout
+    if not args.verbose:
+        sys.stdout = open(os.devnull, 'w')
+
+    server = session_store = None
+    if args.url:
+        base_url = args.url.rstrip('/')
+    else:
+        if not args.live:
+            # Measure the app, not the API quota
+            os.environ.setdefault('LLM_PROVIDER', 'fake')
+            os.environ.setdefault('GEMINI_RPM', '100000')
+            os.environ.setdefault('GEMINI_TPM', '1000000000')
+        import app
+        server, base_url = start_local_server(app, args.verbose)
+        session_store = app.session_store
+
+    recorder = Recorder()
+    stop = threading.Event()
+    users = [
+        SimulatedUser(user_id, args, base_url, recorder, stop, args.ramp_up * user_id / max(1, args.users))
+        for user_id in range(args.users)
+    ]
+    sampler = MemorySampler(args.sample_interval, stop, session_store=session_store, base_url=base_url)
+
+    print(f"{args.users} users for {args.duration:.0f}s against {base_url}", file=sys.stderr)
+    start = time.monotonic()
+    sampler.start()
+    for user in users:
+        user.start()
+    try:
+        while True:
+            remaining = args.duration - (time.monotonic() - start)
+            if remaining <= 0:
+                break
+            time.sleep(min(10, remaining))
+            done = sum(len(latencies) for latencies in recorder.latencies.values())
+            print(f" {time.monotonic() - start:.0f}s: {done} requests, "
+                  f"{recorder.debates_completed} debates completed", file=sys.stderr)
+    except KeyboardInterrupt:
+        print("\nInterrupted - reporting the requests so far", file=sys.stderr)
+    stop.set()
+    elapsed = time.monotonic() - start
+    for user in users:
+        user.join(timeout=args.timeout)
+    sampler.join()
+
+    results = {
+        'config': {
+            'users': args.users,
+            'duration_s': args.duration,
+            'rounds': args.rounds,
+            'think_time_s': args.think_time,
+            'comment_rate': args.comment_rate,
+            'abandon_rate': args.abandon_rate,
+            'target': 'url' if args.url else ('live' if args.live else 'fake'),
+            'session_backend': os.getenv('SESSION_BACKEND', 'memory') if not args.url else None
+        },
+        'elapsed_s': round(elapsed, 1),
+        'debates_started': recorder.debates_started,
+        'debates_completed': recorder.debates_completed,
+        'debates_abandoned': recorder.debates_abandoned,
+        'debates_per_min': recorder.debates_completed / (elapsed / 60),
+        'endpoints': recorder.endpoint_report(elapsed),
+        'session_store': sampler.report(),
+        'error_samples': recorder.error_samples
+    }
+
+    if server is not None:
+        server.shutdown()
+
+    regressions = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.error_tolerance)
+        results['regressions'] = regressions
+
+    print(json.dumps(results, indent=2), file=report_out)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) against {args.baseline}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,8 @@
 const MOCK_MODE = false; // true: without backend
+const USE_STREAMING = true; // true: stream agent sections as they are generated (SSE)
+const USE_JOBS = false; // true (with USE_STREAMING false): submit rounds as background jobs and long-poll for results
+const JOB_POLL_WAIT_SECONDS = 25; // Long-poll duration per /jobs request
+const USE_ROUND_BATCHING = true; // true: "continue without comment" generates the added rounds in one call (/debate/rounds)
 
 // Configuration
 const API_BASE_URL = 'http://localhost:5000';
@@ -11,11 +15,18 @@ let currentAgentIndex = 0; // 0=pro, 1=con, 2=moderator
 let currentRoundResponses = null; // Store all three responses
 let debateActive = false;
 let additionalRounds = 2; // Default additional rounds for continue
+let pendingAgents = new Set(); // Agents whose section is still streaming
+let historyPendingAgent = null; // Visible agent waiting for its section to finish
+let roundStreaming = null; // Promise for the round currently being streamed
+
+const AGENT_ORDER = ['pro', 'con', 'moderator'];
+const AGENT_NAMES = { pro: 'Pro Agent', con: 'Con Agent', moderator: 'Moderator' };
 
 // DOM Elements
 const setupSection = document.getElementById('setup-section');
 const arenaSection = document.getElementById('arena-section');
 const questionInput = document.getElementById('question-input');
+const freshDebateInput = document.getElementById('fresh-debate-input');
 const startDebateBtn = document.getElementById('start-debate-btn');
 const nextTurnBtn = document.getElementById('next-turn-btn');
 const addCommentBtn = document.getElementById('add-comment-btn');
@@ -110,23 +121,31 @@ async function startDebate() {
         return;
     }
 
+    // REAL BACKEND (STREAMING)
+    if (USE_STREAMING) {
+        try {
+            console.log('Starting debate with streaming API call...');
+            await startDebateStreaming(question);
+        } catch (error) {
+            console.error('Error:', error);
+            showError(`Failed to start debate: ${error.message}`);
+        } finally {
+            setLoadingState(startDebateBtn, false);
+        }
+        return;
+    }
+
     // REAL BACKEND (SINGLE API CALL)
     try {
         console.log('Starting debate with single API call...');
         
-        const response = await fetch(`${API_BASE_URL}/debate/start`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                question: question,
-                session_id: sessionId,
-                rounds: totalRounds
-            })
+        const data = await requestRound('/debate/start', {
+            question: question,
+            session_id: sessionId,
+            rounds: totalRounds,
+            bypass_cache: freshDebateInput.checked
         });
 
-        if (!response.ok) throw new Error(`Server error: ${response.status}`);
-        const data = await response.json();
-
         console.log(' Received all responses:', {
             pro: data.responses.pro.length + ' chars',
             con: data.responses.con.length + ' chars',
@@ -156,18 +175,207 @@ async function startDebate() {
     }
 }
 
+// POST a round request; with USE_JOBS the server answers 202 with a job id that is long-polled
+async function requestRound(path, body) {
+    const response = await fetch(`${API_BASE_URL}${path}`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(USE_JOBS ? { ...body, async: true } : body)
+    });
+
+    if (!response.ok) throw new Error(`Server error: ${response.status}`);
+    const data = await response.json();
+
+    if (response.status !== 202) return data;
+    return pollJob(data.job_id);
+}
+
+async function pollJob(jobId) {
+    while (true) {
+        const response = await fetch(`${API_BASE_URL}/jobs/${jobId}?wait=${JOB_POLL_WAIT_SECONDS}`);
+        if (!response.ok) throw new Error(`Server error: ${response.status}`);
+        const job = await response.json();
+
+        if (job.status === 'done') return job.result;
+        if (job.status === 'error') throw new Error(job.error);
+    }
+}
+
 function showCurrentAgent() {
-    const agents = ['pro', 'con', 'moderator'];
-    const agentNames = ['Pro Agent', 'Con Agent', 'Moderator'];
-    
-    const agentType = agents[currentAgentIndex];
-    const agentName = agentNames[currentAgentIndex];
+    const agentType = AGENT_ORDER[currentAgentIndex];
+    const agentName = AGENT_NAMES[agentType];
     const content = currentRoundResponses[agentType];
     
     console.log(` Showing ${agentName}:`, content.substring(0, 100) + '...');
     
-    showAgent(agentType, content);
-    addToHistory(agentName, content, agentType);
+    showAgent(agentType, content || '...');
+
+    if (pendingAgents.has(agentType)) {
+        // Still streaming - add to history once the section is complete
+        historyPendingAgent = agentType;
+    } else {
+        addToHistory(agentName, content, agentType);
+    }
+}
+
+async function streamRound(path, body, handlers) {
+    const response = await fetch(`${API_BASE_URL}${path}`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(body)
+    });
+
+    if (!response.ok) throw new Error(`Server error: ${response.status}`);
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let result = null;
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+
+        // Events are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = 'message';
+            let data = '';
+            rawEvent.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) event = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            });
+
+            const payload = data ? JSON.parse(data) : {};
+            if (event === 'error') throw new Error(payload.error);
+            if (event === 'done') result = payload;
+            else if (handlers[event]) handlers[event](payload);
+        }
+    }
+
+    if (!result) throw new Error('Stream ended before the round was complete');
+    return result;
+}
+
+function createStreamHandlers(onFirstDelta) {
+    const handlers = {
+        started: false,
+        ensureStarted() {
+            if (!handlers.started) {
+                handlers.started = true;
+                onFirstDelta();
+            }
+        },
+        meta(data) {
+            currentRoundResponses = { pro: '', con: '', moderator: '' };
+            pendingAgents = new Set(AGENT_ORDER);
+            historyPendingAgent = null;
+            currentRound = data.round;
+            currentAgentIndex = 0;
+        },
+        delta(data) {
+            currentRoundResponses[data.agent] += data.text;
+            if (!handlers.started) {
+                handlers.ensureStarted();
+            } else if (AGENT_ORDER[currentAgentIndex] === data.agent) {
+                updateAgentSpeech(data.agent, currentRoundResponses[data.agent]);
+            }
+        },
+        agent_done(data) {
+            pendingAgents.delete(data.agent);
+            flushPendingHistory();
+        }
+    };
+    return handlers;
+}
+
+function finishStreamedRound(data) {
+    roundStreaming = null;
+    if (!data.responses) return;
+
+    // Final responses are trimmed and include placeholders for missing sections
+    currentRoundResponses = data.responses;
+    pendingAgents.clear();
+
+    const visibleAgent = AGENT_ORDER[currentAgentIndex];
+    if (visibleAgent) updateAgentSpeech(visibleAgent, currentRoundResponses[visibleAgent]);
+    flushPendingHistory();
+}
+
+function flushPendingHistory() {
+    if (historyPendingAgent && !pendingAgents.has(historyPendingAgent)) {
+        const agentType = historyPendingAgent;
+        historyPendingAgent = null;
+        addToHistory(AGENT_NAMES[agentType], currentRoundResponses[agentType], agentType);
+    }
+}
+
+async function startDebateStreaming(question) {
+    const handlers = createStreamHandlers(() => {
+        debateActive = true;
+
+        setupSection.style.display = 'none';
+        arenaSection.style.display = 'block';
+
+        document.getElementById('current-round').textContent = currentRound;
+        document.getElementById('total-rounds').textContent = totalRounds;
+        updateProgress();
+
+        showCurrentAgent();
+        setLoadingState(startDebateBtn, false);
+    });
+
+    roundStreaming = streamRound('/debate/start/stream', {
+        question: question,
+        session_id: sessionId,
+        rounds: totalRounds,
+        bypass_cache: freshDebateInput.checked
+    }, handlers);
+
+    try {
+        const data = await roundStreaming;
+        handlers.ensureStarted();
+        finishStreamedRound(data);
+    } finally {
+        roundStreaming = null;
+    }
+}
+
+async function loadNextRoundStreaming() {
+    const handlers = createStreamHandlers(() => {
+        document.getElementById('current-round').textContent = currentRound;
+        updateProgress();
+
+        // Show first agent of new round (Pro) as soon as it starts streaming
+        showCurrentAgent();
+        setLoadingState(nextTurnBtn, false);
+    });
+
+    roundStreaming = streamRound('/debate/next-round/stream', {
+        session_id: sessionId,
+        current_round: currentRound,
+        total_rounds: totalRounds
+    }, handlers);
+
+    try {
+        const data = await roundStreaming;
+
+        if (data.debate_complete && !data.responses) {
+            debateComplete();
+            return;
+        }
+
+        console.log(' Streamed Round ' + data.round + ' responses');
+        handlers.ensureStarted();
+        finishStreamedRound(data);
+    } finally {
+        roundStreaming = null;
+    }
 }
 
 async function showNextAgent() {
@@ -221,6 +429,9 @@ async function showNextAgent() {
             return;
         }
         
+        // Wait for a round that is still streaming before loading the next one
+        if (roundStreaming) await roundStreaming.catch(() => {});
+
         // Load next round
         await loadNextRound();
     } else {
@@ -234,21 +445,20 @@ async function loadNextRound() {
     hideError();
 
     try {
+        if (USE_STREAMING) {
+            console.log(` Streaming Round ${currentRound + 1}...`);
+            await loadNextRoundStreaming();
+            return;
+        }
+
         console.log(` Loading Round ${currentRound + 1} with single API call...`);
         
-        const response = await fetch(`${API_BASE_URL}/debate/next-round`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                session_id: sessionId,
-                current_round: currentRound,
-                total_rounds: totalRounds
-            })
+        const data = await requestRound('/debate/next-round', {
+            session_id: sessionId,
+            current_round: currentRound,
+            total_rounds: totalRounds
         });
 
-        if (!response.ok) throw new Error(`Server error: ${response.status}`);
-        const data = await response.json();
-
         if (data.debate_complete && !data.responses) {
             debateComplete();
             return;
@@ -294,16 +504,8 @@ function showAgent(turn, content) {
     if (characterId && speechId) {
         const character = document.getElementById(characterId);
         const speech = document.getElementById(speechId);
-        const bubble = speech.closest('.speech-bubble');
 
-        speech.textContent = content;
-        
-        // Dynamic sizing based on content length
-        if (content.length > 500) {
-            bubble.classList.add('long-content');
-        } else {
-            bubble.classList.remove('long-content');
-        }
+        renderSpeech(turn, speech, content);
         
         character.style.display = 'flex';
 
@@ -319,6 +521,44 @@ function showAgent(turn, content) {
     }
 }
 
+function updateAgentSpeech(turn, content) {
+    const speech = document.getElementById(`${turn}-speech`);
+    if (!speech) return;
+
+    renderSpeech(turn, speech, content || '...');
+}
+
+// Render an agent's text, plus its key points when the server returned structured output
+function renderSpeech(turn, speech, content) {
+    const bubble = speech.closest('.speech-bubble');
+    const keyPoints = currentRoundResponses && currentRoundResponses.key_points
+        ? currentRoundResponses.key_points[turn]
+        : null;
+
+    speech.textContent = content;
+
+    let list = bubble.querySelector('.key-points');
+    if (list) list.remove();
+
+    if (keyPoints && keyPoints.length) {
+        list = document.createElement('ul');
+        list.className = 'key-points';
+        keyPoints.forEach(point => {
+            const item = document.createElement('li');
+            item.textContent = point;
+            list.appendChild(item);
+        });
+        speech.after(list);
+    }
+
+    // Dynamic sizing: structured rounds always carry a list, otherwise size by length
+    if ((keyPoints && keyPoints.length) || content.length > 500) {
+        bubble.classList.add('long-content');
+    } else {
+        bubble.classList.remove('long-content');
+    }
+}
+
 function hideAllAgents() {
     ['pro-character', 'con-character', 'moderator-character'].forEach(id => {
         const el = document.getElementById(id);
@@ -440,10 +680,10 @@ async function continueWithComment() {
 
 async function continueWithoutComment() {
     continueModal.style.display = 'none';
-    await continueDebateRounds();
+    await continueDebateRounds(USE_ROUND_BATCHING);
 }
 
-async function continueDebateRounds() {
+async function continueDebateRounds(batchRounds = false) {
     // Extend total rounds
     totalRounds += additionalRounds;
     document.getElementById('total-rounds').textContent = totalRounds;
@@ -478,11 +718,53 @@ async function continueDebateRounds() {
         updateProgress();
         
         showCurrentAgent();
+    } else if (batchRounds) {
+        await loadBatchedRounds();
     } else {
         await loadNextRound();
     }
 }
 
+// Generate all remaining rounds in one call; the backend serves the later ones
+// to loadNextRound() one at a time (or regenerates them if a comment is added)
+async function loadBatchedRounds() {
+    setLoadingState(nextTurnBtn, true);
+    hideError();
+
+    try {
+        console.log(` Loading Rounds ${currentRound + 1}-${totalRounds} with single API call...`);
+
+        const data = await requestRound('/debate/rounds', {
+            session_id: sessionId,
+            current_round: currentRound,
+            total_rounds: totalRounds,
+            through_round: totalRounds
+        });
+
+        if (data.debate_complete && !data.responses) {
+            debateComplete();
+            return;
+        }
+
+        console.log(' Received Round ' + data.round + ' responses (' + data.batched_rounds + ' rounds generated)');
+
+        currentRoundResponses = data.responses;
+        currentRound = data.round;
+        currentAgentIndex = 0;
+
+        document.getElementById('current-round').textContent = currentRound;
+        updateProgress();
+
+        showCurrentAgent();
+
+    } catch (error) {
+        console.error('Error:', error);
+        showError(`Failed to load next round: ${error.message}`);
+    } finally {
+        setLoadingState(nextTurnBtn, false);
+    }
+}
+
 function debateComplete() {
     debateActive = false;
     nextTurnBtn.style.display = 'none';
@@ -500,6 +782,8 @@ function resetDebate() {
     currentAgentIndex = 0;
     currentRoundResponses = null;
     debateActive = false;
+    pendingAgents.clear();
+    historyPendingAgent = null;
     
     setupSection.style.display = 'block';
     arenaSection.style.display = 'none';
@@ -545,4 +829,7 @@ function hideError() {
 
 console.log('Gemini Debate Arena v3.1 initialized (Improved Readability + Dynamic Sizing)');
 console.log('Mock Mode:', MOCK_MODE ? 'ENABLED' : 'DISABLED');
+console.log('Streaming:', USE_STREAMING ? 'ENABLED' : 'DISABLED');
+console.log('Jobs:', USE_JOBS && !USE_STREAMING ? 'ENABLED' : 'DISABLED');
+console.log('Round batching:', USE_ROUND_BATCHING ? 'ENABLED' : 'DISABLED');
 console.log('Session ID:', sessionId);
\ No newline at end of file
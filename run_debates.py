@@ -0,0 +1,229 @@
+"""
+Batch Debate Runner - Generate debates for a file of topics without the web UI
+Runs N rounds per topic with bounded concurrency (every call shares the app's
+rate limiter), checkpoints after each round so an interrupted run resumes where
+it stopped, and appends every finished debate to a JSONL file
+Run: python run_debates.py topics.txt --rounds 3 --concurrency 4 --output debates.jsonl
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+# Speculative rounds and topic reuse only help interactive sessions
+os.environ.setdefault('PREFETCH_ENABLED', 'false')
+os.environ.setdefault('TOPIC_INDEX_ENABLED', 'false')
+
+
+def read_topics(path):
+    """
+    Read debate questions from a text file (one per line, # comments allowed)
+    or a JSONL file with a "question" field per line
+    """
+    topics = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if path.endswith('.jsonl'):
+                line = json.loads(line)['question'].strip()
+            topics.append(line)
+    return topics
+
+
+def topic_id(question):
+    """Stable id of a question, used to match output and checkpoint entries across runs"""
+    return hashlib.sha1(question.strip().lower().encode('utf-8')).hexdigest()[:12]
+
+
+def read_completed(output_path):
+    """Ids of the debates already written to the output file"""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+
+    with open(output_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                completed.add(json.loads(line)['topic_id'])
+            except (ValueError, KeyError):
+                # A line cut short by an interrupted write; that debate is rerun
+                continue
+    return completed
+
+
+class Checkpoint:
+    """Rounds of unfinished debates, rewritten atomically after every round"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.debates = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.debates = json.load(f)
+
+    def rounds(self, debate_id):
+        with self.lock:
+            return list(self.debates.get(debate_id, {}).get('rounds', []))
+
+    def record_round(self, debate_id, question, rounds):
+        with self.lock:
+            self.debates[debate_id] = {'question': question, 'rounds': list(rounds)}
+            self._save()
+
+    def finish(self, debate_id):
+        with self.lock:
+            if self.debates.pop(debate_id, None) is not None:
+                self._save()
+
+    def _save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.debates, f)
+        os.replace(tmp_path, self.path)
+
+
+def run_debate(app, debate_id, question, total_rounds, checkpoint, stop, mode=None):
+    """
+    Generate (or finish) one debate through the app's generation pipeline
+
+    Returns: output record, or None if the run was stopped before the debate finished
+    """
+    session_id = f'batch-{debate_id}'
+    rounds = checkpoint.rounds(debate_id)
+    resumed_from = len(rounds) + 1
+
+    # Rebuild the session (history and rolling summary) from the checkpointed rounds
+    app.session_store.clear_session(session_id)
+    app.session_store.add_message(session_id, 'user', question)
+    for round_num, responses in enumerate(rounds, 1):
+        app.store_round(session_id, round_num, responses)
+
+    start = time.monotonic()
+    for round_num in range(resumed_from, total_rounds + 1):
+        if stop.is_set():
+            return None
+
+        history = app.session_store.get_history(session_id)
+        responses = app.generate_all_responses(
+            question, round_num, history,
+            session_id=session_id,
+            priority=app.PRIORITY_CONTINUATION,
+            mode=mode
+        )
+        app.store_round(session_id, round_num, responses)
+        rounds.append(responses)
+        checkpoint.record_round(debate_id, question, rounds)
+
+    app.session_store.clear_session(session_id)
+
+    return {
+        'topic_id': debate_id,
+        'question': question,
+        'rounds': [{'round': round_num, 'responses': responses} for round_num, responses in enumerate(rounds, 1)],
+        'resumed_from_round': resumed_from,
+        'elapsed_s': round(time.monotonic() - start, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate debates for a file of topics')
+    parser.add_argument('topics', help='Text file with one question per line, or JSONL with a "question" field')
+    parser.add_argument('--rounds', type=int, default=3, help='Rounds per debate')
+    parser.add_argument('--concurrency', type=int, default=4, help='Debates generated at once')
+    parser.add_argument('--output', default='debates.jsonl', help='JSONL file finished debates are appended to')
+    parser.add_argument('--checkpoint', help='Progress file for resuming (default: <output>.checkpoint.json)')
+    parser.add_argument('--mode', choices=['combined', 'parallel', 'auto'], help='Overrides GENERATION_MODE')
+    parser.add_argument('--verbose', action='store_true', help='Show the app log instead of progress lines only')
+    args = parser.parse_args()
+
+    load_dotenv()
+    if os.getenv('LLM_PROVIDER', 'gemini').lower() == 'gemini' and not (os.getenv('GEMINI_API_KEY') or os.getenv('GEMINI_API_KEYS')):
+        print("GEMINI_API_KEY (or GEMINI_API_KEYS) not found in .env file (or set LLM_PROVIDER=fake)")
+        sys.exit(1)
+
+    checkpoint = Checkpoint(args.checkpoint or args.output + '.checkpoint.json')
+    completed = read_completed(args.output)
+
+    pending = []
+    for question in read_topics(args.topics):
+        debate_id = topic_id(question)
+        if debate_id not in completed:
+            completed.add(debate_id)
+            pending.append((debate_id, question))
+
+    print(f"{len(pending)} debates to run ({len(completed) - len(pending)} already in {args.output}), "
+          f"{args.rounds} rounds each, concurrency {args.concurrency}", file=sys.stderr)
+    if not pending:
+        return
+
+    log = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, 'w'))
+    with log:
+        import app
+
+    limiter = app.gemini_client.rate_limiter
+    before = limiter.get_stats()
+    stop = threading.Event()
+    finished = failed = 0
+    start = time.monotonic()
+
+    executor = ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix='debate')
+    try:
+        with log, open(args.output, 'a', encoding='utf-8') as output:
+            futures = {
+                executor.submit(run_debate, app, debate_id, question, args.rounds, checkpoint, stop, args.mode): question
+                for debate_id, question in pending
+            }
+            for future in as_completed(futures):
+                try:
+                    record = future.result()
+                except Exception as e:
+                    failed += 1
+                    print(f" FAILED: {futures[future][:60]} - {e}", file=sys.stderr)
+                    continue
+                if record is None:
+                    continue
+
+                output.write(json.dumps(record) + '\n')
+                output.flush()
+                checkpoint.finish(record['topic_id'])
+                finished += 1
+                print(f" [{finished + failed}/{len(pending)}] {record['question'][:60]} "
+                      f"({record['elapsed_s']:.1f}s)", file=sys.stderr)
+    except KeyboardInterrupt:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+        print("\nInterrupted - run the same command again to resume", file=sys.stderr)
+    else:
+        executor.shutdown()
+
+    elapsed = time.monotonic() - start
+    after = limiter.get_stats()
+    minutes = elapsed / 60
+    report = {
+        'debates': finished,
+        'failed': failed,
+        'rounds_per_debate': args.rounds,
+        'elapsed_s': round(elapsed, 1),
+        'debates_per_min': round(finished / minutes, 2) if minutes else 0.0,
+        'api_requests': after['acquired'] - before['acquired'],
+        'tokens_per_min': round((after['tokens_used'] - before['tokens_used']) / minutes) if minutes else 0,
+        'rate_limit_wait_s': round(after['total_wait_seconds'] - before['total_wait_seconds'], 1)
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
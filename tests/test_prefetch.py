@@ -0,0 +1,59 @@
+"""
+Round prefetcher tests - bounds on unclaimed prefetched rounds
+Run: python -m unittest discover tests
+"""
+
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from memory.session_store import SessionStore
+from utils.prefetch import RoundPrefetcher
+
+
+def generate(session_id, question, round_num, history):
+    return {'pro': f"{session_id} pro", 'con': 'con', 'moderator': 'moderator'}
+
+
+class PendingBoundsTest(unittest.TestCase):
+    def test_oldest_round_dropped_over_limit(self):
+        prefetcher = RoundPrefetcher(generate, max_pending=2, ttl_seconds=None)
+        for session_id in ('a', 'b', 'c'):
+            prefetcher.schedule(session_id, 'Q?', 2, [], 3)
+        self.assertEqual(list(prefetcher.pending), ['b', 'c'])
+        self.assertIsNone(prefetcher.take('a', 2, 0))
+        self.assertEqual(prefetcher.take('c', 2, 0)['pro'], 'c pro')
+        self.assertEqual(prefetcher.get_stats()['evicted'], 1)
+
+    def test_rescheduled_round_moves_to_the_end(self):
+        prefetcher = RoundPrefetcher(generate, max_pending=2, ttl_seconds=None)
+        prefetcher.schedule('a', 'Q?', 2, [], 3)
+        prefetcher.schedule('b', 'Q?', 2, [], 3)
+        prefetcher.schedule('a', 'Q?', 3, [], 3)
+        prefetcher.schedule('c', 'Q?', 2, [], 3)
+        self.assertEqual(list(prefetcher.pending), ['a', 'c'])
+
+    def test_unclaimed_round_expires(self):
+        prefetcher = RoundPrefetcher(generate, ttl_seconds=0.01)
+        prefetcher.schedule('a', 'Q?', 2, [], 3)
+        time.sleep(0.02)
+        self.assertIsNone(prefetcher.take('a', 2, 0))
+        self.assertEqual(prefetcher.get_stats()['pending'], 0)
+        self.assertEqual(prefetcher.get_stats()['expired'], 1)
+
+    def test_session_eviction_drops_round(self):
+        store = SessionStore(max_sessions=1, ttl_seconds=None)
+        prefetcher = RoundPrefetcher(generate)
+        store.on_evict = prefetcher.invalidate
+
+        store.add_message('a', 'user', 'Q?')
+        prefetcher.schedule('a', 'Q?', 2, store.get_history('a'), 3)
+        store.add_message('b', 'user', 'Q?')  # evicts 'a'
+        self.assertNotIn('a', prefetcher.pending)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+Request profiler tests - sampling of work handed to other threads
+Run: python -m unittest discover tests
+"""
+
+import contextvars
+import os
+import sys
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from utils.profiler import RequestProfiler, attach_thread
+
+
+def busy_agent_call(seconds=0.2):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+    return 'done'
+
+
+def run_agent():
+    with attach_thread():
+        return busy_agent_call()
+
+
+class WorkerSamplingTest(unittest.TestCase):
+    def setUp(self):
+        self.profiler = RequestProfiler(interval=0.002)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='agent')
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def profile(self, submit):
+        profile_id = self.profiler.start('POST /debate/start')
+        try:
+            self.assertEqual(submit().result(), 'done')
+        finally:
+            self.profiler.stop(profile_id, 200)
+        return self.profiler.collapsed(profile_id)
+
+    def test_agent_call_in_copied_context_is_sampled(self):
+        collapsed = self.profile(
+            lambda: self.executor.submit(contextvars.copy_context().run, run_agent)
+        )
+        agent_stacks = [line for line in collapsed.splitlines() if 'busy_agent_call' in line]
+        self.assertTrue(agent_stacks)
+        self.assertTrue(all(line.startswith('agent_0;') for line in agent_stacks))
+
+    def test_awaited_worker_is_sampled(self):
+        def submit():
+            started = threading.Event()
+            thread_ids = []
+            future = self.executor.submit(
+                lambda: thread_ids.append(threading.get_ident()) or started.set() or busy_agent_call()
+            )
+            started.wait()
+            with attach_thread(thread_id=thread_ids[0]):
+                future.result()
+            return future
+        self.assertIn('busy_agent_call', self.profile(submit))
+
+    def test_unattached_worker_is_not_sampled(self):
+        collapsed = self.profile(lambda: self.executor.submit(busy_agent_call))
+        self.assertNotIn('busy_agent_call', collapsed)
+
+    def test_attach_after_stop_is_ignored(self):
+        profile_id = self.profiler.start('POST /debate/start')
+        self.profiler.stop(profile_id)
+        self.assertEqual(self.executor.submit(contextvars.copy_context().run, run_agent).result(), 'done')
+        self.assertEqual(self.profiler.get_stats()['active'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
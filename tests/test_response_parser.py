@@ -0,0 +1,84 @@
+"""
+Response parser tests - marker detection in combined completions
+Run: python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from utils.response_parser import StreamingSectionParser, parse_sections
+
+
+class ParseSectionsTest(unittest.TestCase):
+    def test_exact_markers(self):
+        sections = parse_sections("[PRO_AGENT]\nYes.\n\n[CON_AGENT]\nNo.\n\n[MODERATOR]\nBoth.")
+        self.assertEqual(sections, {'pro': 'Yes.', 'con': 'No.', 'moderator': 'Both.'})
+
+    def test_inline_mentions_with_exact_markers(self):
+        text = (
+            "[PRO_AGENT]\nAs [CON] argued last round, costs matter, but [PRO] evidence wins.\n"
+            "Con agent\n\n"
+            "[CON_AGENT]\nThe [PRO_AGENT] side ignores enforcement.\n\n"
+            "[MODERATOR]\nBoth sides cite [PRO] and [CON] data."
+        )
+        sections = parse_sections(text)
+        self.assertEqual(sections['pro'], "As [CON] argued last round, costs matter, but [PRO] evidence wins.\nCon agent")
+        self.assertEqual(sections['con'], "The [PRO_AGENT] side ignores enforcement.")
+        self.assertEqual(sections['moderator'], "Both sides cite [PRO] and [CON] data.")
+
+    def test_inline_mentions_with_loose_markers(self):
+        text = (
+            "**[Pro]:** As [CON] argued, costs matter.\n\n"
+            "## CON AGENT\nThe [PRO] case ignores enforcement.\n\n"
+            "[Moderator]\nBoth raise fair points."
+        )
+        sections = parse_sections(text)
+        self.assertEqual(sections['pro'], "As [CON] argued, costs matter.")
+        self.assertEqual(sections['con'], "The [PRO] case ignores enforcement.")
+        self.assertEqual(sections['moderator'], "Both raise fair points.")
+
+    def test_mixed_exact_and_loose_markers(self):
+        sections = parse_sections("[PRO_AGENT]\nYes.\n\n[Con Agent]\nNo.\n\n[Moderator]\nBoth.")
+        self.assertEqual(sections, {'pro': 'Yes.', 'con': 'No.', 'moderator': 'Both.'})
+
+    def test_loose_marker_ignored_for_agent_with_exact_marker(self):
+        sections = parse_sections("[PRO_AGENT]\nYes.\nCon agent:\nstill pro.\n\n[CON_AGENT]\nNo.\n\n## Moderator\nBoth.")
+        self.assertEqual(sections, {'pro': 'Yes.\nCon agent:\nstill pro.', 'con': 'No.', 'moderator': 'Both.'})
+
+
+class StreamingSectionParserTest(unittest.TestCase):
+    def stream(self, text, chunk_size):
+        parser = StreamingSectionParser()
+        deltas = {}
+        for i in range(0, len(text), chunk_size):
+            for event, data in parser.feed(text[i:i + chunk_size]):
+                if event == 'delta':
+                    deltas[data[0]] = deltas.get(data[0], '') + data[1]
+        for event, data in parser.finish():
+            if event == 'delta':
+                deltas[data[0]] = deltas.get(data[0], '') + data[1]
+        return parser, deltas
+
+    def test_inline_marker_mention_does_not_split(self):
+        text = (
+            "[PRO_AGENT]\nYes. As the [CON_AGENT] side will say, costs.\n\n"
+            "**[CON_AGENT]:**\nNo.\n\n[MODERATOR]\nBoth."
+        )
+        expected = {'pro': 'Yes. As the [CON_AGENT] side will say, costs.', 'con': 'No.', 'moderator': 'Both.'}
+        for chunk_size in (1, 3, 7, len(text)):
+            parser, deltas = self.stream(text, chunk_size)
+            self.assertEqual(parser.get_responses(), expected)
+            self.assertEqual(parser.completed, ['pro', 'con', 'moderator'])
+            self.assertEqual({agent: text.strip() for agent, text in deltas.items()}, expected)
+
+    def test_streamed_text_matches_parse_sections(self):
+        text = "Sure!\n[PRO_AGENT] Yes.\n> [CON_AGENT]\nNo, [MODERATOR] aside.\n[MODERATOR]\nBoth."
+        parser, _ = self.stream(text, 2)
+        self.assertEqual(parser.get_responses(), parse_sections(text))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Session store tests - running message count
+Run: python -m unittest discover tests
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from memory.session_store import SessionStore
+
+
+def total_messages(store):
+    return sum(len(session['messages']) for session in store.sessions.values())
+
+
+class MessageCountTest(unittest.TestCase):
+    def test_count_follows_adds_clears_and_evictions(self):
+        store = SessionStore(max_sessions=2, ttl_seconds=None)
+        store.add_message('a', 'user', 'Q?')
+        store.add_messages('a', [('pro', 'Yes.'), ('con', 'No.'), ('moderator', 'Both.')])
+        store.add_message('b', 'user', 'Q?')
+        self.assertEqual(store.get_stats()['messages'], 5)
+
+        store.add_message('c', 'user', 'Q?')  # evicts 'a'
+        self.assertEqual(store.get_stats()['messages'], 2)
+
+        store.clear_session('b')
+        self.assertEqual(store.get_stats()['messages'], 1)
+
+    def test_count_after_ttl_expiry(self):
+        store = SessionStore(ttl_seconds=0.01)
+        store.add_messages('a', [('pro', 'Yes.'), ('con', 'No.')])
+        time.sleep(0.02)
+        self.assertEqual(store.get_history('a'), [])
+        self.assertEqual(store.get_stats()['messages'], 0)
+
+    def test_count_under_concurrent_writes_and_evictions(self):
+        store = SessionStore(max_sessions=5, ttl_seconds=None)
+
+        def write(worker):
+            for i in range(500):
+                store.add_message(f"{worker}-{i % 8}", 'user', 'Q?')
+                if i % 50 == 0:
+                    store.clear_session(f"{worker}-0")
+
+        threads = [threading.Thread(target=write, args=(worker,)) for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(store.get_stats()['messages'], total_messages(store))
+
+    def test_count_when_session_is_cleared_during_append(self):
+        store = SessionStore(ttl_seconds=None)
+        store.add_message('a', 'user', 'Q?')
+        session = store.sessions['a']
+
+        class ClearOnRelease:
+            """Session lock that tries to clear the session right after the append"""
+            def __init__(self):
+                self.lock = threading.Lock()
+                self.clearer = None
+
+            def __enter__(self):
+                self.lock.acquire()
+
+            def __exit__(self, *exc):
+                self.lock.release()
+                if self.clearer is None:
+                    self.clearer = threading.Thread(target=store.clear_session, args=('a',))
+                    self.clearer.start()
+                    # Give the clear every chance to run before add_message finishes
+                    self.clearer.join(0.2)
+
+        session['lock'] = ClearOnRelease()
+        store.add_message('a', 'pro', 'Yes.')
+        session['lock'].clearer.join()
+
+        self.assertNotIn('a', store.sessions)
+        self.assertEqual(store.get_stats()['messages'], total_messages(store))
+        self.assertEqual(store.get_stats()['messages'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
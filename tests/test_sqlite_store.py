@@ -0,0 +1,95 @@
+"""
+SQLite session store tests - visibility of writes across stores on one database
+Run: python -m unittest discover tests
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from memory.sqlite_store import SQLiteSessionStore
+
+
+class TwoStoresTestCase(unittest.TestCase):
+    """Two stores on one database file, like two worker processes"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        db_path = os.path.join(self.tmpdir, 'sessions.db')
+        # A long flush interval so only explicit commits reach the other store
+        self.writer = SQLiteSessionStore(db_path, flush_interval=60)
+        self.reader = SQLiteSessionStore(db_path, flush_interval=60)
+
+    def tearDown(self):
+        self.writer.close()
+        self.reader.close()
+        shutil.rmtree(self.tmpdir)
+
+
+class SharedDatabaseTest(TwoStoresTestCase):
+    def test_user_message_is_visible_to_other_store(self):
+        self.writer.add_message('s', 'user', 'Should cities ban cars?')
+        history = self.reader.get_history('s')
+        self.assertEqual([(m['role'], m['content']) for m in history], [('user', 'Should cities ban cars?')])
+
+    def test_agent_messages_are_batched(self):
+        self.writer.add_message('s', 'user', 'Q?')
+        self.writer.add_message('s', 'pro', 'Yes.')
+        self.assertEqual(self.reader.get_message_count('s'), 1)
+        self.writer.flush()
+        self.assertEqual(self.reader.get_message_count('s'), 2)
+
+    def test_round_is_visible_to_other_store(self):
+        self.writer.add_message('s', 'user', 'Q?')
+        self.writer.add_messages('s', [('pro', 'Yes.'), ('con', 'No.'), ('moderator', 'Both.')])
+        self.writer.add_message('s', 'user', 'What about buses?')
+        self.assertEqual(self.reader.get_session_info('s')['message_count'], 5)
+        self.assertEqual(self.reader.get_round_messages('s', 2)[0]['content'], 'What about buses?')
+
+
+class CountersTest(TwoStoresTestCase):
+    def assert_counts_match_tables(self, store):
+        conn = store._get_connection()
+        stats = store.get_stats()
+        self.assertEqual(stats['sessions'], conn.execute('SELECT COUNT(*) FROM sessions').fetchone()[0])
+        self.assertEqual(stats['messages'], conn.execute('SELECT COUNT(*) FROM messages').fetchone()[0])
+
+    def test_counts_follow_writes_from_both_stores(self):
+        self.writer.add_message('a', 'user', 'Q?')
+        self.writer.add_messages('a', [('pro', 'Yes.'), ('con', 'No.'), ('moderator', 'Both.')])
+        self.reader.add_message('b', 'user', 'Q?')
+        stats = self.writer.get_stats()
+        self.assertEqual((stats['sessions'], stats['messages']), (2, 5))
+
+        self.reader.clear_session('a')
+        stats = self.writer.get_stats()
+        self.assertEqual((stats['sessions'], stats['messages']), (1, 1))
+        self.assertEqual(len(self.writer), 1)
+        self.assert_counts_match_tables(self.writer)
+
+    def test_counts_after_purge(self):
+        self.writer.add_messages('a', [('user', 'Q?'), ('pro', 'Yes.')])
+        self.writer.ttl_seconds = 0.01
+        time.sleep(0.02)
+        self.writer.purge_expired()
+        self.assertEqual(self.writer.get_stats()['messages'], 0)
+        self.assert_counts_match_tables(self.writer)
+
+    def test_counters_seeded_for_existing_database(self):
+        self.writer.add_messages('a', [('user', 'Q?'), ('pro', 'Yes.')])
+        self.writer._get_connection().execute('DELETE FROM counters')
+        reopened = SQLiteSessionStore(os.path.join(self.tmpdir, 'sessions.db'), flush_interval=60)
+        try:
+            self.assertEqual(reopened.get_stats()['messages'], 2)
+            self.assert_counts_match_tables(reopened)
+        finally:
+            reopened.close()
+
+
+if __name__ == '__main__':
+    unittest.main()